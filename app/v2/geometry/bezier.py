@@ -8,6 +8,8 @@ import math
 from typing import List, Tuple
 from dataclasses import dataclass
 
+import numpy as np
+
 
 @dataclass
 class Point3D:
@@ -61,6 +63,10 @@ class BezierCurve:
     def sample_points(self, num_samples: int = 50) -> List[Point3D]:
         """Sample points along the curve."""
         return [self.point_at(t / (num_samples - 1)) for t in range(num_samples)]
+    
+    def points_at(self, ts: np.ndarray) -> np.ndarray:
+        """Get points for an array of parameters as an (N, 3) float array."""
+        return np.array([self.point_at(float(t)).to_tuple() for t in ts], dtype=np.float64).reshape(-1, 3)
 
 
 class QuadraticBezier(BezierCurve):
@@ -124,6 +130,25 @@ class QuadraticBezier(BezierCurve):
         
         return Point3D(x, y, z)
     
+    def points_at(self, ts: np.ndarray) -> np.ndarray:
+        """
+        Vectorized point_at: evaluate the curve at many parameters at once.
+        
+        Args:
+            ts: 1D array of parameters (clamped to [0, 1])
+            
+        Returns:
+            (N, 3) float array of points
+        """
+        t = np.clip(np.asarray(ts, dtype=np.float64), 0.0, 1.0)[:, None]
+        mt = 1.0 - t
+        
+        p0 = np.array(self.p0.to_tuple())
+        p1 = np.array(self.p1.to_tuple())
+        p2 = np.array(self.p2.to_tuple())
+        
+        return mt * mt * p0 + 2 * mt * t * p1 + t * t * p2
+    
     def tangent_at(self, t: float) -> Point3D:
         """
         Calculate tangent vector at parameter t.
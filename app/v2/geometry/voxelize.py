@@ -5,9 +5,63 @@ to discrete Minecraft block coordinates.
 Implements 3D Bresenham-style algorithms with oversampling for gap-free results.
 """
 from typing import List, Set, Tuple
+
+import numpy as np
+
 from .bezier import BezierCurve, Point3D, QuadraticBezier, bilinear_interpolate
 
 
+# Bit layout for packed voxel keys: x and z get 26 bits (Minecraft's +/-30M
+# world border fits), y gets 11 bits; 63 bits total so keys stay non-negative.
+_XZ_BITS = 26
+_Y_BITS = 11
+_XZ_OFFSET = 1 << (_XZ_BITS - 1)
+_Y_OFFSET = 1 << (_Y_BITS - 1)
+
+
+def pack_voxel_keys(points: np.ndarray) -> np.ndarray:
+    """
+    Pack an (N, 3) integer voxel array into one int64 key per voxel.
+    
+    Keys are independent of the batch (no bounding box), so they can be
+    compared across calls. Hashing/sorting an int64 is much cheaper than a tuple.
+    """
+    points = np.asarray(points, dtype=np.int64).reshape(-1, 3)
+    return (
+        ((points[:, 0] + _XZ_OFFSET) << (_Y_BITS + _XZ_BITS))
+        | ((points[:, 1] + _Y_OFFSET) << _XZ_BITS)
+        | (points[:, 2] + _XZ_OFFSET)
+    )
+
+
+def unpack_voxel_keys(keys: np.ndarray) -> np.ndarray:
+    """Inverse of pack_voxel_keys: int64 keys back to an (N, 3) int64 array."""
+    keys = np.asarray(keys, dtype=np.int64)
+    x = (keys >> (_Y_BITS + _XZ_BITS)) - _XZ_OFFSET
+    y = ((keys >> _XZ_BITS) & ((1 << _Y_BITS) - 1)) - _Y_OFFSET
+    z = (keys & ((1 << _XZ_BITS) - 1)) - _XZ_OFFSET
+    return np.stack([x, y, z], axis=-1)
+
+
+def unique_voxel_indices(points: np.ndarray) -> np.ndarray:
+    """
+    Indices of the first occurrence of each distinct row of an (N, 3) voxel array.
+    
+    Rows are packed into int64 keys so the dedupe is one np.unique call
+    instead of a set of tuples. The returned indices are sorted, i.e. they
+    keep first-occurrence order.
+    """
+    keys = pack_voxel_keys(points)
+    _, first = np.unique(keys, return_index=True)
+    return np.sort(first)
+
+
+def unique_voxels(points: np.ndarray) -> np.ndarray:
+    """Deduplicate an (N, 3) integer voxel array, keeping first-occurrence order."""
+    points = np.asarray(points, dtype=np.int64).reshape(-1, 3)
+    return points[unique_voxel_indices(points)]
+
+
 def voxelize_curve(curve: BezierCurve, samples_per_block: int = 3) -> List[Tuple[int, int, int]]:
     """
     Convert a Bezier curve to a list of discrete voxel coordinates.
@@ -5,6 +5,8 @@ Provides Streamlit-compatible 3D visualization of block placements
 using plotly for interactive 3D scatter plots.
 """
 import plotly.graph_objects as go
+from collections import Counter
+from operator import itemgetter
 from typing import List, Dict, Any, Optional
 import numpy as np
 
@@ -251,30 +253,37 @@ def get_block_statistics(blocks: List[Dict]) -> Dict[str, Any]:
     if not blocks:
         return {"total": 0}
     
-    # Count by type
-    type_counts = {}
-    for block in blocks:
-        block_type = block.get("type", "unknown").replace("minecraft:", "")
+    # Count by type: count the raw type strings first, then fold the
+    # (few) distinct ones into their base type
+    type_counts = Counter()
+    for block_type, count in Counter(b.get("type", "unknown") for b in blocks).items():
+        block_type = block_type.replace("minecraft:", "")
         if "[" in block_type:
             block_type = block_type.split("[")[0]
-        type_counts[block_type] = type_counts.get(block_type, 0) + 1
+        type_counts[block_type] += count
     
     # Bounding box
-    x_coords = [b["x"] for b in blocks]
-    y_coords = [b["y"] for b in blocks]
-    z_coords = [b["z"] for b in blocks]
+    x_min, x_max = _min_max(map(itemgetter("x"), blocks))
+    y_min, y_max = _min_max(map(itemgetter("y"), blocks))
+    z_min, z_max = _min_max(map(itemgetter("z"), blocks))
     
     return {
         "total": len(blocks),
         "type_distribution": dict(sorted(type_counts.items(), key=lambda x: -x[1])),
         "bounding_box": {
-            "x": (min(x_coords), max(x_coords)),
-            "y": (min(y_coords), max(y_coords)),
-            "z": (min(z_coords), max(z_coords)),
+            "x": (x_min, x_max),
+            "y": (y_min, y_max),
+            "z": (z_min, z_max),
         },
         "dimensions": {
-            "width": max(x_coords) - min(x_coords) + 1,
-            "height": max(y_coords) - min(y_coords) + 1,
-            "depth": max(z_coords) - min(z_coords) + 1,
+            "width": x_max - x_min + 1,
+            "height": y_max - y_min + 1,
+            "depth": z_max - z_min + 1,
         }
     }
+
+
+def _min_max(values) -> tuple:
+    """(min, max) of an iterable, materialized once."""
+    values = list(values)
+    return min(values), max(values)
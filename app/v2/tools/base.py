@@ -2,7 +2,20 @@
 Base class for all Carpenter tools.
 """
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from dataclasses import dataclass
+from typing import List, Dict, Any, Sequence
+
+import numpy as np
+
+
+# (dx, dz) of the axis a wall-mounted feature runs along, by the way it faces.
+# Unknown facings fall back to the Z axis, like the east/west case.
+FACING_AXIS = {
+    "north": (1, 0),
+    "south": (1, 0),
+    "east": (0, 1),
+    "west": (0, 1),
+}
 
 
 class Block:
@@ -34,6 +47,103 @@ class Block:
         return hash((self.x, self.y, self.z, self.type))
 
 
+class Palette:
+    """
+    Interns material names to small integer ids.
+    
+    Blocks of a batch then store a 2-byte id instead of repeating the
+    material string, and materials can be compared as integers.
+    """
+    
+    def __init__(self, names: Sequence[str] = ()):
+        self.names: List[str] = []
+        self._ids: Dict[str, int] = {}
+        for name in names:
+            self.intern(name)
+    
+    def __len__(self) -> int:
+        return len(self.names)
+    
+    def intern(self, name: str) -> int:
+        """Return the id for a material name, adding it if new."""
+        material_id = self._ids.get(name)
+        if material_id is None:
+            material_id = self._ids[name] = len(self.names)
+            self.names.append(name)
+        return material_id
+
+
+@dataclass
+class BlockArray:
+    """
+    Struct-of-arrays batch of block placements.
+    
+    Coordinates live in three int arrays and materials are small integer
+    ids into ``palette``, so large surfaces don't need one Python object
+    per voxel. Use ``to_blocks()`` where a List[Block] is expected.
+    """
+    xs: np.ndarray
+    ys: np.ndarray
+    zs: np.ndarray
+    material_ids: np.ndarray
+    palette: List[str]
+    
+    def __len__(self) -> int:
+        return len(self.xs)
+    
+    @classmethod
+    def empty(cls) -> 'BlockArray':
+        zeros = np.zeros(0, dtype=np.int64)
+        return cls(zeros, zeros, zeros, np.zeros(0, dtype=np.int16), [])
+    
+    @classmethod
+    def filled(cls, xs, ys, zs, material: str) -> 'BlockArray':
+        """Create a batch where every block has the same material."""
+        xs, ys, zs = np.broadcast_arrays(*(np.asarray(a, dtype=np.int64) for a in (xs, ys, zs)))
+        return cls(xs.ravel(), ys.ravel(), zs.ravel(), np.zeros(xs.size, dtype=np.int16), [material])
+    
+    @classmethod
+    def from_blocks(cls, blocks: Sequence[Block]) -> 'BlockArray':
+        palette = Palette()
+        ids = [palette.intern(b.type) for b in blocks]
+        return cls(
+            np.array([b.x for b in blocks], dtype=np.int64),
+            np.array([b.y for b in blocks], dtype=np.int64),
+            np.array([b.z for b in blocks], dtype=np.int64),
+            np.array(ids, dtype=np.int16),
+            palette.names,
+        )
+    
+    @classmethod
+    def concat(cls, parts: Sequence['BlockArray']) -> 'BlockArray':
+        """Concatenate batches in order, merging their palettes."""
+        parts = [p for p in parts if len(p)]
+        if not parts:
+            return cls.empty()
+        
+        palette = Palette()
+        ids = []
+        for part in parts:
+            remap = np.array([palette.intern(name) for name in part.palette], dtype=np.int16)
+            ids.append(remap[part.material_ids])
+        
+        return cls(
+            np.concatenate([p.xs for p in parts]),
+            np.concatenate([p.ys for p in parts]),
+            np.concatenate([p.zs for p in parts]),
+            np.concatenate(ids),
+            palette.names,
+        )
+    
+    def to_blocks(self) -> List[Block]:
+        palette = self.palette
+        return [
+            Block(x, y, z, palette[m])
+            for x, y, z, m in zip(self.xs.tolist(), self.ys.tolist(), self.zs.tolist(),
+                                  self.material_ids.tolist())
+        ]
+
+
 class BaseTool(ABC):
     """
     Abstract base class for all building tools.
@@ -59,6 +169,25 @@ class BaseTool(ABC):
         """
         pass
     
+    def execute_array(self, params: Dict[str, Any], origin: tuple = (0, 0, 0)) -> BlockArray:
+        """
+        Execute the tool and return the blocks as a BlockArray.
+        
+        Tools that generate their geometry as arrays override this (and
+        implement execute via to_blocks()); the default wraps execute().
+        """
+        return BlockArray.from_blocks(self.execute(params, origin))
+    
+    def execute_many(self, params_list: Sequence[Dict[str, Any]], origin: tuple = (0, 0, 0)) -> BlockArray:
+        """
+        Execute the tool for many parameter sets and return one BlockArray.
+        
+        Equivalent to concatenating execute_array for each item in order.
+        Tools that are called in bulk (roads, zones) override this with a
+        batched implementation.
+        """
+        return BlockArray.concat([self.execute_array(params, origin) for params in params_list])
+    
     def validate_params(self, params: Dict[str, Any]) -> bool:
         """
         Validate the parameters before execution.
@@ -4,9 +4,12 @@ Curve Loft Tool - Creates curved surfaces (roofs, domes, arches).
 Uses Bezier curves and lofting between them to create smooth architectural features.
 """
 from typing import List, Dict, Any, Optional, Set, Tuple
+
+import numpy as np
+
 from .base import BaseTool, Block
 from ..geometry.bezier import QuadraticBezier, Point3D
-from ..geometry.voxelize import voxelize_surface, fill_between_curves
+from ..geometry.voxelize import voxelize_surface, fill_between_curves, unique_voxels
 
 
 class CurveLoftTool(BaseTool):
@@ -169,40 +172,19 @@ class CurveLoftTool(BaseTool):
         
         Used for more visible frame structures.
         """
-        blocks = []
-        seen: Set[Tuple[int, int, int]] = set()
+        t_u = np.arange(50) / 49
+        pa = curve_a.points_at(t_u)  # (50, 3)
+        pb = curve_b.points_at(t_u)  # (50, 3)
         
-        for i in range(num_ribs + 1):
-            t_v = i / num_ribs
-            
-            # Create an interpolated curve at this v position
-            # Sample along this rib
-            for j in range(50):
-                t_u = j / 49
-                
-                pa = curve_a.point_at(t_u)
-                pb = curve_b.point_at(t_u)
-                
-                x = int(pa.x + (pb.x - pa.x) * t_v)
-                y = int(pa.y + (pb.y - pa.y) * t_v)
-                z = int(pa.z + (pb.z - pa.z) * t_v)
-                
-                if (x, y, z) not in seen:
-                    seen.add((x, y, z))
-                    blocks.append(Block(x, y, z, frame_material))
-        
-        # Also add longitudinal ribs (along the curves)
-        for curve in [curve_a, curve_b]:
-            for j in range(50):
-                t = j / 49
-                point = curve.point_at(t)
-                x, y, z = point.to_int_tuple()
-                
-                if (x, y, z) not in seen:
-                    seen.add((x, y, z))
-                    blocks.append(Block(x, y, z, frame_material))
+        # Interpolated curves at each rib position, all at once: (num_ribs+1, 50, 3)
+        t_v = (np.arange(num_ribs + 1) / num_ribs)[:, None, None]
+        rib_points = (pa + t_v * (pb - pa)).astype(np.int32).reshape(-1, 3)
         
-        return blocks
+        # Also add longitudinal ribs (along the curves): pa/pb are exactly those samples
+        long_points = np.rint(np.concatenate([pa, pb])).astype(np.int32)
+        
+        voxels = unique_voxels(np.concatenate([rib_points, long_points]))
+        return [Block(x, y, z, frame_material) for x, y, z in voxels.tolist()]
     
     def validate_params(self, params: Dict[str, Any]) -> bool:
         """Validate curve loft parameters."""
@@ -20,10 +20,9 @@ class PlaceDecorationTool(BaseTool):
     
     name = "place_decoration"
     
-    def get_schema(self) -> Dict[str, Any]:
-        return {
-            "name": "place_decoration",
-            "description": """Places decorative elements at specified positions.
+    _SCHEMA: Dict[str, Any] = {
+        "name": "place_decoration",
+        "description": """Places decorative elements at specified positions.
 
 Example - lantern on wall:
 {
@@ -42,37 +41,41 @@ Example - flower pots:
   "positions": [[3, 2, 0], [7, 2, 0]],
   "decoration_type": "potted_red_tulip"
 }""",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "positions": {
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "positions": {
+                    "type": "array",
+                    "items": {
                         "type": "array",
-                        "items": {
-                            "type": "array",
-                            "items": {"type": "integer"}
-                        },
-                        "description": "List of [x, y, z] positions"
+                        "items": {"type": "integer"}
                     },
-                    "decoration_type": {
-                        "type": "string",
-                        "enum": [
-                            # Lights
-                            "lantern", "soul_lantern", "torch", "wall_torch",
-                            # Fences
-                            "oak_fence", "dark_oak_fence", "spruce_fence", "cobblestone_wall",
-                            # Plants
-                            "potted_red_tulip", "potted_orange_tulip", "potted_white_tulip",
-                            "potted_oak_sapling", "flower_pot", "rose_bush", "lilac",
-                            # Other
-                            "barrel", "chest", "crafting_table", "anvil",
-                            "white_banner", "red_banner", "blue_banner"
-                        ],
-                        "description": "Type of decoration"
-                    }
+                    "description": "List of [x, y, z] positions"
                 },
-                "required": ["positions", "decoration_type"]
-            }
+                "decoration_type": {
+                    "type": "string",
+                    "enum": [
+                        # Lights
+                        "lantern", "soul_lantern", "torch", "wall_torch",
+                        # Fences
+                        "oak_fence", "dark_oak_fence", "spruce_fence", "cobblestone_wall",
+                        # Plants
+                        "potted_red_tulip", "potted_orange_tulip", "potted_white_tulip",
+                        "potted_oak_sapling", "flower_pot", "rose_bush", "lilac",
+                        # Other
+                        "barrel", "chest", "crafting_table", "anvil",
+                        "white_banner", "red_banner", "blue_banner"
+                    ],
+                    "description": "Type of decoration"
+                }
+            },
+            "required": ["positions", "decoration_type"]
         }
+    }
+    
+    def get_schema(self) -> Dict[str, Any]:
+        """Return the (shared, read-only) function-calling schema."""
+        return self._SCHEMA
     
     def validate_params(self, params: Dict[str, Any]) -> bool:
         return "positions" in params and "decoration_type" in params
@@ -81,11 +84,6 @@ Example - flower pots:
         positions = params["positions"]
         decoration_type = params["decoration_type"]
         
-        blocks = []
-        for pos in positions:
-            x = pos[0] + origin[0]
-            y = pos[1] + origin[1]
-            z = pos[2] + origin[2]
-            blocks.append(Block(x, y, z, decoration_type))
-        
-        return blocks
+        # One block per position: build the list in a single pass
+        ox, oy, oz = origin[0], origin[1], origin[2]
+        return [Block(pos[0] + ox, pos[1] + oy, pos[2] + oz, decoration_type) for pos in positions]
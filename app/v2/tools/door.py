@@ -4,7 +4,7 @@ Door Tool - Place doors in walls
 Creates door openings with proper door blocks.
 """
 from typing import List, Dict, Any
-from .base import BaseTool, Block
+from .base import BaseTool, Block, FACING_AXIS
 
 
 class PlaceDoorTool(BaseTool):
@@ -19,10 +19,9 @@ class PlaceDoorTool(BaseTool):
     
     name = "place_door"
     
-    def get_schema(self) -> Dict[str, Any]:
-        return {
-            "name": "place_door",
-            "description": """Places a door at a specified position.
+    _SCHEMA: Dict[str, Any] = {
+        "name": "place_door",
+        "description": """Places a door at a specified position.
 
 Example - oak double door with porch:
 {
@@ -41,41 +40,53 @@ Example - simple single door:
   "door_type": "dark_oak_door",
   "is_double": false
 }""",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "position": {
-                        "type": "array",
-                        "items": {"type": "integer"},
-                        "description": "[x, y, z] - bottom of door"
-                    },
-                    "facing": {
-                        "type": "string",
-                        "enum": ["north", "south", "east", "west"],
-                        "description": "Direction the door faces"
-                    },
-                    "door_type": {
-                        "type": "string",
-                        "enum": ["oak_door", "dark_oak_door", "spruce_door", "birch_door", "iron_door", "acacia_door"],
-                        "description": "Type of door"
-                    },
-                    "is_double": {
-                        "type": "boolean",
-                        "description": "Whether it's a double door"
-                    },
-                    "has_porch": {
-                        "type": "boolean",
-                        "description": "Whether to add a small porch/awning above"
-                    },
-                    "porch_material": {
-                        "type": "string",
-                        "enum": ["oak_planks", "dark_oak_planks", "spruce_planks", "cobblestone", "stone_bricks"],
-                        "description": "Material for porch roof"
-                    }
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "position": {
+                    "type": "array",
+                    "items": {"type": "integer"},
+                    "description": "[x, y, z] - bottom of door"
+                },
+                "facing": {
+                    "type": "string",
+                    "enum": ["north", "south", "east", "west"],
+                    "description": "Direction the door faces"
+                },
+                "door_type": {
+                    "type": "string",
+                    "enum": ["oak_door", "dark_oak_door", "spruce_door", "birch_door", "iron_door", "acacia_door"],
+                    "description": "Type of door"
+                },
+                "is_double": {
+                    "type": "boolean",
+                    "description": "Whether it's a double door"
+                },
+                "has_porch": {
+                    "type": "boolean",
+                    "description": "Whether to add a small porch/awning above"
                 },
-                "required": ["position", "facing", "door_type"]
-            }
+                "porch_material": {
+                    "type": "string",
+                    "enum": ["oak_planks", "dark_oak_planks", "spruce_planks", "cobblestone", "stone_bricks"],
+                    "description": "Material for porch roof"
+                }
+            },
+            "required": ["position", "facing", "door_type"]
         }
+    }
+    
+    # Offset from the door to the space in front of it
+    _FRONT_OFFSET = {
+        "north": (0, 0, -1),
+        "south": (0, 0, 1),
+        "east": (1, 0, 0),
+        "west": (-1, 0, 0),
+    }
+    
+    def get_schema(self) -> Dict[str, Any]:
+        """Return the (shared, read-only) function-calling schema."""
+        return self._SCHEMA
     
     def validate_params(self, params: Dict[str, Any]) -> bool:
         required = ["position", "facing", "door_type"]
@@ -93,49 +104,31 @@ Example - simple single door:
         blocks = []
         
         # Determine direction offsets based on facing
-        if facing in ["north", "south"]:
-            dx, dz = 1, 0  # Door extends in X direction
-            front_offset = (0, 0, -1 if facing == "north" else 1)
-        else:  # east, west
-            dx, dz = 0, 1  # Door extends in Z direction
-            front_offset = (-1 if facing == "west" else 1, 0, 0)
+        dx, dz = FACING_AXIS.get(facing, (0, 1))
+        front_offset = self._FRONT_OFFSET.get(facing, (1, 0, 0))
         
         # Door height is 2 blocks
         door_width = 2 if is_double else 1
         
-        # Place door blocks (bottom and top)
-        for i in range(door_width):
-            bx = x + i * dx
-            bz = z + i * dz
-            # Bottom half of door
-            blocks.append(Block(bx, y, bz, door_type))
-            # Top half of door
-            blocks.append(Block(bx, y + 1, bz, door_type))
+        # Place door blocks (bottom and top half)
+        blocks.extend([Block(x + i * dx, y + dy, z + i * dz, door_type)
+                       for i in range(door_width) for dy in (0, 1)])
         
         # Add porch/awning if requested
         if has_porch:
             porch_depth = 2
             porch_width = door_width + 2
+            fx, fz = front_offset[0], front_offset[2]
             
             # Porch roof (above door)
-            for i in range(-1, door_width + 1):
-                for d in range(porch_depth):
-                    bx = x + i * dx + front_offset[0] * d
-                    bz = z + i * dz + front_offset[2] * d
-                    blocks.append(Block(bx, y + 3, bz, porch_material))
-            
-            # Porch supports
-            # Left support
-            blocks.append(Block(x - dx + front_offset[0], y, z - dz + front_offset[2], "oak_fence"))
-            blocks.append(Block(x - dx + front_offset[0], y + 1, z - dz + front_offset[2], "oak_fence"))
-            blocks.append(Block(x - dx + front_offset[0], y + 2, z - dz + front_offset[2], "oak_fence"))
+            blocks.extend([Block(x + i * dx + fx * d, y + 3, z + i * dz + fz * d, porch_material)
+                           for i in range(-1, door_width + 1) for d in range(porch_depth)])
             
-            # Right support
-            rx = x + (door_width - 1) * dx + dx + front_offset[0]
-            rz = z + (door_width - 1) * dz + dz + front_offset[2]
-            blocks.append(Block(rx, y, rz, "oak_fence"))
-            blocks.append(Block(rx, y + 1, rz, "oak_fence"))
-            blocks.append(Block(rx, y + 2, rz, "oak_fence"))
+            # Porch supports (left, right)
+            rx = x + door_width * dx + fx
+            rz = z + door_width * dz + fz
+            for sx, sz in ((x - dx + fx, z - dz + fz), (rx, rz)):
+                blocks.extend([Block(sx, y + dy, sz, "oak_fence") for dy in range(3)])
             
             # Lanterns on each side
             blocks.append(Block(x - dx, y + 2, z - dz, "lantern"))
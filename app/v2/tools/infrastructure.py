@@ -1,9 +1,23 @@
 """
 Infrastructure Tools - Roads, Zoning, and Public Works.
 """
-from typing import List, Dict, Any
-from .base import BaseTool, Block
-import math
+from typing import List, Dict, Any, Sequence, Tuple
+from .base import BaseTool, Block, BlockArray, Palette
+from ..geometry.voxelize import pack_voxel_keys
+
+import numpy as np
+
+
+def _segment_index(counts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    For a batch of calls producing counts[k] items each, return for every
+    output item the call it belongs to and its index within that call.
+    """
+    call = np.repeat(np.arange(len(counts)), counts)
+    starts = np.cumsum(counts) - counts  # exclusive prefix sum
+    local = np.arange(call.size) - starts[call]
+    return call, local
+
 
 class DrawRoadTool(BaseTool):
     """
@@ -31,64 +45,69 @@ class DrawRoadTool(BaseTool):
         return all(k in params for k in ["start", "end", "width", "material"])
     
     def execute(self, params: Dict[str, Any], origin: tuple = (0, 0, 0)) -> List[Block]:
-        start = params["start"] # [x, z]
-        end = params["end"]
-        width = int(params["width"])
-        material = params["material"]
-        
-        # Determine relative coordinates
-        # Assume Y=0 relative (ground level)
-        x1, z1 = start
-        x2, z2 = end
+        return self.execute_array(params, origin).to_blocks()
+    
+    def execute_array(self, params: Dict[str, Any], origin: tuple = (0, 0, 0)) -> BlockArray:
+        return self.execute_many([params], origin)
+    
+    def execute_many(self, params_list: Sequence[Dict[str, Any]], origin: tuple = (0, 0, 0)) -> BlockArray:
+        """
+        Draw many roads in one batched pass.
         
-        # Vector along road
-        dx = x2 - x1
-        dz = z2 - z1
-        length = math.sqrt(dx*dx + dz*dz)
+        Every road's samples are laid out back to back (offsets from a prefix
+        sum of per-road sample counts) and computed with flat array ops.
+        """
+        palette = Palette()
         
-        blocks = []
-        if length == 0: return blocks
+        # Determine relative coordinates: start/end are [x, z]
+        # Assume Y=0 relative (ground level)
+        starts = np.array([p["start"] for p in params_list], dtype=np.int64).reshape(-1, 2)
+        ends = np.array([p["end"] for p in params_list], dtype=np.int64).reshape(-1, 2)
+        widths = np.array([int(p["width"]) for p in params_list], dtype=np.int64)
+        mat_ids = np.array([palette.intern(p["material"]) for p in params_list], dtype=np.int16)
         
-        # Normalize direction
-        ux = dx / length
-        uz = dz / length
+        # Vector along road; zero-length roads place nothing
+        delta = ends - starts
+        keep = (delta != 0).any(axis=1)
+        starts, delta, widths, mat_ids = starts[keep], delta[keep], widths[keep], mat_ids[keep]
+        if len(starts) == 0:
+            return BlockArray.empty()
+        dx, dz = delta[:, 0], delta[:, 1]
         
-        # Perpendicular vector (for width)
-        px = -uz
-        pz = ux
+        # Perpendicular unit vector (for width)
+        length = np.hypot(dx, dz)
+        px = -dz / length
+        pz = dx / length
         
         # Draw roadway
-        # Iterate along length
-        step = 0.5 # Sampling step size
+        # Two samples per block along the dominant axis (Chebyshev length),
+        # 0.5 steps across the width
         w_step = 0.5
+        rows = np.maximum(np.abs(dx), np.abs(dz)) * 2 + 1
+        cols = np.maximum(widths * 2 + 1, 0)
         
-        curr_len = 0
-        while curr_len <= length:
-            # Center point on line
-            cx = x1 + ux * curr_len
-            cz = z1 + uz * curr_len
-            
-            # Iterate along width
-            w_offset = -width / 2.0
-            while w_offset <= width / 2.0:
-                # Sample point
-                sx = cx + px * w_offset
-                sz = cz + pz * w_offset
-                
-                # Round to block coords
-                bx = int(round(sx))
-                bz = int(round(sz))
-                
-                # Add block (at relative Y=-1 to be flush with ground? Or Y=0?)
-                # If foundation is at Y=64, and origin Y=64.
-                # Usually we replace the floor block. relative Y=-1.
-                # Let's assume Y=-1 is the "floor" layer.
-                blocks.append(Block(bx + origin[0], origin[1] - 1, bz + origin[2], material))
-                
-                w_offset += w_step
-            curr_len += step
-            
-        return blocks
+        call, local = _segment_index(rows * cols)
+        r, c = np.divmod(local, cols[call])
+        t = r / (rows[call] - 1)
+        w_offset = -widths[call] / 2.0 + c * w_step
+        
+        # Center point on line, offset across the width
+        sx = starts[call, 0] + dx[call] * t + px[call] * w_offset
+        sz = starts[call, 1] + dz[call] * t + pz[call] * w_offset
+        
+        # Round to block coords
+        bx = np.rint(sx).astype(np.int64) + origin[0]
+        bz = np.rint(sz).astype(np.int64) + origin[2]
+        
+        # Replace the floor block: relative Y=-1 is the "floor" layer.
+        by = np.full_like(bx, origin[1] - 1)
+        
+        # The 0.5 step oversamples ~4x; keep one block per cell per road
+        keys = pack_voxel_keys(np.stack([bx, by, bz], axis=1))
+        _, first = np.unique(np.stack([call, keys], axis=1), axis=0, return_index=True)
+        first = np.sort(first)
+        
+        return BlockArray(bx[first], by[first], bz[first], mat_ids[call[first]], palette.names)
 
 class FillZoneTool(BaseTool):
     """
@@ -117,6 +136,9 @@ class FillZoneTool(BaseTool):
         return all(k in params for k in ["x", "z", "width", "depth", "material"])
 
     def execute(self, params: Dict[str, Any], origin: tuple = (0, 0, 0)) -> List[Block]:
+        return self.execute_array(params, origin).to_blocks()
+    
+    def execute_array(self, params: Dict[str, Any], origin: tuple = (0, 0, 0)) -> BlockArray:
         x = params["x"]
         z = params["z"]
         w = params["width"]
@@ -124,19 +146,64 @@ class FillZoneTool(BaseTool):
         mat = params["material"]
         decor_type = params.get("decoration_type", "none")
         
-        blocks = []
-        for i in range(w):
-            for j in range(d):
-                # Floor layer (Y=-1)
-                blocks.append(Block(x + i + origin[0], origin[1] - 1, z + j + origin[2], mat))
-                
-                # Simple random logic for decoration could go here (e.g. random flower)
-                # But kept simple for now
-                if decor_type == "park":
-                    # Chance for tree handled by separate tool?
-                    pass
+        # Floor layer (Y=-1), x-major like the original w*d loop
+        xs = (x + origin[0] + np.arange(w))[:, None]
+        zs = (z + origin[2] + np.arange(d))[None, :]
+        blocks = BlockArray.filled(xs, origin[1] - 1, zs, mat)
+        
+        # Simple random logic for decoration could go here (e.g. random flower)
+        # But kept simple for now
+        if decor_type == "park":
+            # Chance for tree handled by separate tool?
+            pass
                     
         return blocks
+    
+    def execute_many(self, params_list: Sequence[Dict[str, Any]], origin: tuple = (0, 0, 0)) -> BlockArray:
+        """
+        Fill many zones in one batched pass (e.g. every plot of a city).
+        
+        Zones are laid out back to back using a prefix sum of w*d, so the
+        whole batch is a handful of flat array ops.
+        """
+        palette = Palette()
+        xs0 = np.array([p["x"] for p in params_list], dtype=np.int64) + origin[0]
+        zs0 = np.array([p["z"] for p in params_list], dtype=np.int64) + origin[2]
+        w = np.maximum(np.array([p["width"] for p in params_list], dtype=np.int64), 0)
+        d = np.maximum(np.array([p["depth"] for p in params_list], dtype=np.int64), 0)
+        mat_ids = np.array([palette.intern(p["material"]) for p in params_list], dtype=np.int16)
+        
+        # Floor layer (Y=-1), x-major within each zone
+        call, local = _segment_index(w * d)
+        i, j = np.divmod(local, d[call])
+        xs = xs0[call] + i
+        zs = zs0[call] + j
+        ys = np.full_like(xs, origin[1] - 1)
+        
+        return BlockArray(xs, ys, zs, mat_ids[call], palette.names)
+
+def _tree_template() -> np.ndarray:
+    """
+    Relative (dx, dy, dz, material_id) rows of the simple street tree.
+    
+    Same order as PlaceStreetDecorTool.execute: 4 logs, the 3x3 leaf ring
+    (minus the trunk) at y+2 and y+3, then the top leaf. Ids: 0=log, 1=leaves.
+    """
+    logs = np.array([[0, dy, 0, 0] for dy in range(4)])
+    
+    lx, lz = np.meshgrid([-1, 0, 1], [-1, 0, 1], indexing="ij")
+    ring = (lx != 0) | (lz != 0)
+    lx, lz = lx[ring], lz[ring]
+    
+    # Interleave the two leaf layers per ring position: (8, 2, 4) -> (16, 4)
+    leaves = np.stack([
+        np.stack([lx, np.full_like(lx, dy), lz, np.ones_like(lx)], axis=1)
+        for dy in (2, 3)
+    ], axis=1).reshape(-1, 4)
+    
+    top = np.array([[0, 4, 0, 1]])
+    return np.concatenate([logs, leaves, top])
+
 
 class PlaceStreetDecorTool(BaseTool):
     """
@@ -144,6 +211,9 @@ class PlaceStreetDecorTool(BaseTool):
     """
     name = "place_street_decor"
     
+    _TREE_TEMPLATE = _tree_template()
+    _TREE_PALETTE = ["oak_log", "oak_leaves"]
+    
     def get_schema(self) -> Dict[str, Any]:
         return {
             "name": "place_street_decor",
@@ -162,41 +232,79 @@ class PlaceStreetDecorTool(BaseTool):
         return all(k in params for k in ["x", "z", "type"])
         
     def execute(self, params: Dict[str, Any], origin: tuple = (0, 0, 0)) -> List[Block]:
+        return self.execute_array(params, origin).to_blocks()
+    
+    def execute_array(self, params: Dict[str, Any], origin: tuple = (0, 0, 0)) -> BlockArray:
         x = params["x"] + origin[0]
         z = params["z"] + origin[2]
         y = origin[1] # On top of ground
         t = params["type"]
         
-        blocks = []
+        # Materials are interned once per call; blocks carry the id
+        palette = Palette()
+        coords = []
+        ids = []
         
         if t == "lantern_post":
             # Simple lamp post
             # Fence x 3
-            blocks.append(Block(x, y, z, "mossy_cobblestone_wall"))
-            blocks.append(Block(x, y+1, z, "mossy_cobblestone_wall"))
-            blocks.append(Block(x, y+2, z, "mossy_cobblestone_wall"))
-            blocks.append(Block(x, y+3, z, "lantern"))
+            wall_id = palette.intern("mossy_cobblestone_wall")
+            lantern_id = palette.intern("lantern")
+            coords += [(x, y, z), (x, y+1, z), (x, y+2, z), (x, y+3, z)]
+            ids += [wall_id, wall_id, wall_id, lantern_id]
             
         elif t == "tree":
-             # Extremely simple tree
-             # Oak Log x 4
-             blocks.append(Block(x, y, z, "oak_log"))
-             blocks.append(Block(x, y+1, z, "oak_log"))
-             blocks.append(Block(x, y+2, z, "oak_log"))
-             blocks.append(Block(x, y+3, z, "oak_log"))
-             # Leaves
-             for lx in range(-1, 2):
-                 for lz in range(-1, 2):
-                     if lx == 0 and lz == 0: continue
-                     blocks.append(Block(x+lx, y+2, z+lz, "oak_leaves"))
-                     blocks.append(Block(x+lx, y+3, z+lz, "oak_leaves"))
-             blocks.append(Block(x, y+4, z, "oak_leaves"))
+             # Extremely simple tree: 4 oak logs + leaves, from the precomputed template
+             return self._place_trees(np.array([[x, z]]), y)
              
         elif t == "bench":
-             blocks.append(Block(x, y, z, "spruce_stairs[facing=east]"))
+             coords.append((x, y, z))
+             ids.append(palette.intern("spruce_stairs[facing=east]"))
              
         elif t == "flower_bed":
-             blocks.append(Block(x, y, z, "grass_block"))
-             blocks.append(Block(x, y+1, z, "poppy"))
-             
-        return blocks
+             coords += [(x, y, z), (x, y+1, z)]
+             ids += [palette.intern("grass_block"), palette.intern("poppy")]
+        
+        if not coords:
+            return BlockArray.empty()
+        
+        xyz = np.array(coords, dtype=np.int64)
+        return BlockArray(xyz[:, 0], xyz[:, 1], xyz[:, 2], np.array(ids, dtype=np.int16), palette.names)
+    
+    def execute_batch(self, centers: np.ndarray, types: np.ndarray,
+                      origin: tuple = (0, 0, 0)) -> BlockArray:
+        """
+        Place many decorations at once.
+        
+        Args:
+            centers: (N, 2) array of relative [x, z] positions
+            types: (N,) array of decoration types (same values as params["type"])
+            origin: World origin offset
+            
+        Trees are generated for all centers in one broadcast against the tree
+        template; other types go through execute_array. The result is grouped
+        by type (trees first), not interleaved in input order.
+        """
+        centers = np.asarray(centers, dtype=np.int64).reshape(-1, 2)
+        types = np.asarray(types)
+        is_tree = types == "tree"
+        parts = []
+        
+        if is_tree.any():
+            parts.append(self._place_trees(centers[is_tree] + (origin[0], origin[2]), origin[1]))
+        
+        for (x, z), t in zip(centers[~is_tree].tolist(), types[~is_tree].tolist()):
+            parts.append(self.execute_array({"x": x, "z": z, "type": t}, origin))
+        
+        return BlockArray.concat(parts)
+    
+    def _place_trees(self, tree_xz: np.ndarray, y: int) -> BlockArray:
+        """Translate the tree template to each (N, 2) world [x, z] with its base at y."""
+        template = self._TREE_TEMPLATE
+        
+        # (trees, template rows) coordinates, flattened tree by tree
+        xs = tree_xz[:, 0:1] + template[None, :, 0]
+        zs = tree_xz[:, 1:2] + template[None, :, 2]
+        ys = np.broadcast_to(y + template[:, 1], xs.shape)
+        ids = np.broadcast_to(template[:, 3].astype(np.int16), xs.shape)
+        return BlockArray(xs.ravel(), ys.ravel(), zs.ravel(), ids.ravel(), list(self._TREE_PALETTE))
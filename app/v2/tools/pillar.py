@@ -1,8 +1,27 @@
 """
 Pillar Tool - Creates pillars with optional decorative styles.
 """
-from typing import List, Dict, Any
-from .base import BaseTool, Block
+from functools import lru_cache
+from typing import List, Dict, Any, Tuple
+
+import numpy as np
+
+from .base import BaseTool, Block, BlockArray
+
+
+# Outward-facing stairs around a pillar: facing and (dx, dz) offset
+_STAIR_FACINGS = ("north", "south", "east", "west")
+_STAIR_DX = np.array([0, 0, 1, -1])
+_STAIR_DZ = np.array([-1, 1, 0, 0])
+_STAIR_IDS = np.arange(4, dtype=np.int16)
+
+
+@lru_cache(maxsize=None)
+def _stair_variants(stair: str) -> Tuple[List[str], List[str]]:
+    """Block states for the base (upright) and capital (upside down) stairs."""
+    base = [f"{stair}[facing={facing}]" for facing in _STAIR_FACINGS]
+    capital = [f"{stair}[facing={facing},half=top]" for facing in _STAIR_FACINGS]
+    return base, capital
 
 
 class PlacePillarTool(BaseTool):
@@ -71,6 +90,10 @@ class PlacePillarTool(BaseTool):
             }
             origin: World origin offset
         """
+        return self.execute_array(params, origin).to_blocks()
+    
+    def execute_array(self, params: Dict[str, Any], origin: tuple = (0, 0, 0)) -> BlockArray:
+        """Generate the pillar as a BlockArray (see execute)."""
         base = params.get("base", [0, 0, 0])
         top = params.get("top", [0, 0, 0])
         material = params.get("material", "stone_bricks")
@@ -83,92 +106,79 @@ class PlacePillarTool(BaseTool):
         y_min = min(base[1], top[1]) + oy
         y_max = max(base[1], top[1]) + oy
         
-        blocks: List[Block] = []
-        
+        # Geometry only depends on (style, height, material): translate the cached template,
+        # copying its ids and palette so callers can't mutate the cache through the result
+        template = self._pillar_template(style, y_max - y_min + 1, material)
+        return BlockArray(template.xs + x, template.ys + y_min, template.zs + z,
+                          template.material_ids.copy(), list(template.palette))
+    
+    @classmethod
+    @lru_cache(maxsize=128)
+    def _pillar_template(cls, style: str, height: int, material: str) -> BlockArray:
+        """
+        Pillar blocks relative to its base at (0, 0, 0). Cached; do not mutate.
+        """
         if style == "classical":
-            blocks.extend(self._create_classical_pillar(x, y_min, y_max, z, material))
+            return cls._create_classical_pillar(height, material)
         elif style == "modern":
-            blocks.extend(self._create_modern_pillar(x, y_min, y_max, z, material))
+            return cls._create_modern_pillar(height, material)
         else:  # simple
-            blocks.extend(self._create_simple_pillar(x, y_min, y_max, z, material))
-        
-        return blocks
+            return cls._create_simple_pillar(height, material)
+    
+    @staticmethod
+    def _create_shaft(y_start: int, y_end: int, material: str) -> BlockArray:
+        """Vertical run of one material from y_start to y_end (inclusive)."""
+        ys = np.arange(y_start, y_end + 1)
+        return BlockArray.filled(0, ys, 0, material)
     
-    def _create_simple_pillar(self, x: int, y_min: int, y_max: int, z: int, material: str) -> List[Block]:
+    @classmethod
+    def _create_simple_pillar(cls, height: int, material: str) -> BlockArray:
         """Create a simple vertical column."""
-        blocks = []
-        for y in range(y_min, y_max + 1):
-            blocks.append(Block(x, y, z, material))
-        return blocks
+        return cls._create_shaft(0, height - 1, material)
     
-    def _create_classical_pillar(self, x: int, y_min: int, y_max: int, z: int, material: str) -> List[Block]:
+    @classmethod
+    def _create_classical_pillar(cls, height: int, material: str) -> BlockArray:
         """
         Create a classical pillar with decorative capital and base.
         
         Uses stairs facing outward at top (capital) and bottom (base).
         """
-        blocks = []
-        height = y_max - y_min + 1
-        
-        # Get stair material
-        stair = self.STAIR_MATERIALS.get(material, f"{material}_stairs")
+        # Main shaft
+        shaft = cls._create_shaft(0, height - 1, material)
+        if height < 3:
+            return shaft
         
-        # Base decoration (bottom layer with stairs facing outward)
-        if height >= 3:
-            # Four stairs around the base
-            for facing, (dx, dz) in [
-                ("north", (0, -1)),
-                ("south", (0, 1)),
-                ("east", (1, 0)),
-                ("west", (-1, 0))
-            ]:
-                blocks.append(Block(x + dx, y_min, z + dz, f"{stair}[facing={facing}]"))
+        # Get stair material and its precomputed facing variants
+        stair = cls.STAIR_MATERIALS.get(material, f"{material}_stairs")
+        base_names, capital_names = _stair_variants(stair)
         
-        # Main shaft
-        for y in range(y_min, y_max + 1):
-            blocks.append(Block(x, y, z, material))
+        # Base decoration (bottom layer, four stairs facing outward)
+        base = BlockArray(_STAIR_DX, np.zeros(4, dtype=np.int64), _STAIR_DZ, _STAIR_IDS, base_names)
         
-        # Capital decoration (top layer with stairs facing outward, upside down)
-        if height >= 3:
-            for facing, (dx, dz) in [
-                ("north", (0, -1)),
-                ("south", (0, 1)),
-                ("east", (1, 0)),
-                ("west", (-1, 0))
-            ]:
-                blocks.append(Block(x + dx, y_max, z + dz, f"{stair}[facing={facing},half=top]"))
+        # Capital decoration (top layer, upside down)
+        capital = BlockArray(_STAIR_DX, np.full(4, height - 1), _STAIR_DZ, _STAIR_IDS, capital_names)
         
-        return blocks
+        return BlockArray.concat([base, shaft, capital])
     
-    def _create_modern_pillar(self, x: int, y_min: int, y_max: int, z: int, material: str) -> List[Block]:
+    @classmethod
+    def _create_modern_pillar(cls, height: int, material: str) -> BlockArray:
         """
         Create a modern-style pillar with clean lines.
         
         Uses slabs at transitions for subtle accent.
         """
-        blocks = []
-        height = y_max - y_min + 1
+        if height < 4:
+            return cls._create_shaft(0, height - 1, material)
         
         # Get slab material
-        slab = self.SLAB_MATERIALS.get(material, f"{material}_slab")
-        
-        # Slim base (slab on bottom)
-        if height >= 4:
-            blocks.append(Block(x, y_min, z, f"{slab}[type=bottom]"))
-            start_y = y_min + 1
-        else:
-            start_y = y_min
-        
-        # Main shaft
-        end_y = y_max - 1 if height >= 4 else y_max
-        for y in range(start_y, end_y + 1):
-            blocks.append(Block(x, y, z, material))
-        
-        # Slim cap (slab on top)
-        if height >= 4:
-            blocks.append(Block(x, y_max, z, f"{slab}[type=top]"))
-        
-        return blocks
+        slab = cls.SLAB_MATERIALS.get(material, f"{material}_slab")
+        
+        # Slim base (slab on bottom), main shaft, slim cap (slab on top)
+        return BlockArray.concat([
+            BlockArray.filled(0, 0, 0, f"{slab}[type=bottom]"),
+            cls._create_shaft(1, height - 2, material),
+            BlockArray.filled(0, height - 1, 0, f"{slab}[type=top]"),
+        ])
     
     def validate_params(self, params: Dict[str, Any]) -> bool:
         """Validate pillar parameters."""
@@ -7,8 +7,137 @@ Creates a filled surface between two lines (edges), enabling:
 - Sloped roofs (angled planes)
 - Any quadrilateral surface
 """
-from typing import List, Dict, Any, Tuple
-from .base import BaseTool, Block
+import math
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+from .base import BaseTool, Block, BlockArray
+from ..geometry.voxelize import unique_voxel_indices
+
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+
+def _plane_kernel(a1: tuple, a2: tuple, b1: tuple, b2: tuple,
+                  cross_samples: int, edge_samples: int,
+                  window_grid: Optional[Tuple[int, int]] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Voxelize the quadrilateral and classify window voxels in one pass.
+    
+    The surface is cross_samples lines from edge_a to edge_b, each sampled at
+    edge_samples points, and a voxel is kept where a sample rounds into it.
+    Instead of evaluating every sample, each line is traversed DDA-style: the
+    only samples that can open a new voxel are the first ones past a block
+    boundary crossing, so one sample is evaluated per crossing. Rounding just
+    those gives the same voxels, and the same first (line, sample) index per
+    voxel, as the full grid. Voxels are deduped via packed int64 keys and the
+    window grid is tested on the first sample index of each kept voxel.
+    
+    Args:
+        window_grid: (period, size) of the window pattern in sample units,
+            evaluated on the (cross_samples, edge_samples) grid; None for none.
+    
+    Returns:
+        (coords, is_window): (K, 3) int64 unique voxel coordinates in sampling
+        order and a (K,) bool array marking glass voxels.
+    """
+    a1, a2, b1, b2 = (np.array(p, dtype=np.float64) for p in (a1, a2, b1, b2))
+    if HAS_NUMBA:
+        period, size = window_grid if window_grid is not None else (1, 0)
+        return _plane_kernel_compiled(a1, a2, b1, b2, cross_samples, edge_samples, period, size)
+    
+    t = np.arange(cross_samples) / max(cross_samples - 1, 1)  # 0 to 1 across edges
+    last = max(edge_samples - 1, 1)  # Sample index at the end of a line
+    
+    # Line endpoints for every cross sample: (cross_samples, 3)
+    p1 = a1 + t[:, None] * (b1 - a1)
+    p2 = a2 + t[:, None] * (b2 - a2)
+    delta = p2 - p1
+    
+    # Block boundaries (k + 0.5) crossed by each line, per axis: (cross_samples, 3).
+    # The range is padded slightly since p1 + 1.0 * delta may not round-trip to p2.
+    first_k = np.ceil(np.minimum(p1, p2) - 0.5 - 1e-9)
+    counts = np.floor(np.maximum(p1, p2) - 0.5 + 1e-9) - first_k + 1
+    counts = np.where(delta != 0, counts, 0).astype(np.int64)
+    
+    # First sample of each line past every block boundary it crosses, padded with inf:
+    # (cross_samples, 1 + crossings); every line also keeps its start sample
+    candidates = [np.zeros((cross_samples, 1))]
+    for axis, width in enumerate(counts.max(axis=0).tolist()):
+        if width == 0:
+            continue
+        k = np.arange(width)
+        boundary = first_k[:, axis, None] + k + 0.5
+        start, step = p1[:, axis, None], delta[:, axis, None]
+        entered = boundary + np.where(step > 0, 0.5, -0.5)  # Block on the far side
+        with np.errstate(divide='ignore', invalid='ignore'):
+            j = np.ceil((boundary - start) / step * last - 1e-6)
+            # A sample on (or within float noise of) the boundary may round
+            # back, in which case the next sample is the first one across
+            j += np.rint(start + j / last * step) != entered
+        j[(k >= counts[:, axis, None]) | (j > last)] = np.inf
+        candidates.append(j)
+    candidates = np.concatenate(candidates, axis=1)
+    candidates.sort(axis=1)
+    
+    # Flatten in (line, sample) order so dedupe keeps the grid's first hit
+    cross_idx, col = np.nonzero(np.isfinite(candidates))
+    edge_idx = candidates[cross_idx, col].astype(np.int64)
+    s = edge_idx / last  # 0 to 1 along the line
+    points = p1[cross_idx] + s[:, None] * delta[cross_idx]
+    coords = np.rint(points).astype(np.int64)
+    
+    first = unique_voxel_indices(coords)
+    coords = coords[first]
+    
+    if window_grid is None:
+        return coords, np.zeros(len(coords), dtype=bool)
+    
+    # Windows repeat every `period` samples, only in the middle area
+    cross_idx, edge_idx = cross_idx[first], edge_idx[first]
+    period, size = window_grid
+    is_window = (
+        (cross_idx % period < size) & (cross_idx > 2) & (cross_idx < cross_samples - 2)
+        & (edge_idx % period < size) & (edge_idx > 2) & (edge_idx < edge_samples - 2)
+    )
+    return coords, is_window
+
+
+if HAS_NUMBA:
+    @njit(cache=True)
+    def _plane_kernel_compiled(a1, a2, b1, b2, cross_samples, edge_samples, period, size):
+        """Compiled _plane_kernel: walks the full sample grid, first hit per voxel wins."""
+        last = max(edge_samples - 1, 1)
+        coords = np.empty((cross_samples * edge_samples, 3), dtype=np.int64)
+        is_window = np.empty(cross_samples * edge_samples, dtype=np.bool_)
+        seen = set()
+        count = 0
+        p1 = np.empty(3)
+        delta = np.empty(3)
+        for i in range(cross_samples):
+            t = i / max(cross_samples - 1, 1)
+            for axis in range(3):
+                p1[axis] = a1[axis] + t * (b1[axis] - a1[axis])
+                delta[axis] = (a2[axis] + t * (b2[axis] - a2[axis])) - p1[axis]
+            window_row = i % period < size and 2 < i < cross_samples - 2
+            for j in range(edge_samples):
+                s = j / last
+                x = np.int64(np.rint(p1[0] + s * delta[0]))
+                y = np.int64(np.rint(p1[1] + s * delta[1]))
+                z = np.int64(np.rint(p1[2] + s * delta[2]))
+                if (x, y, z) in seen:
+                    continue
+                seen.add((x, y, z))
+                coords[count, 0] = x
+                coords[count, 1] = y
+                coords[count, 2] = z
+                is_window[count] = window_row and j % period < size and 2 < j < edge_samples - 2
+                count += 1
+        return coords[:count], is_window[:count]
 
 
 class PlaneTool(BaseTool):
@@ -34,6 +163,12 @@ class PlaneTool(BaseTool):
     
     name = "draw_plane"
     
+    # Window grids: pattern -> (period, window size) in sample units
+    _WINDOW_GRIDS = {
+        "grid_2x2": (4, 2),
+        "grid_3x3": (5, 3),
+    }
+    
     def get_schema(self) -> Dict[str, Any]:
         return {
             "name": "draw_plane",
@@ -111,6 +246,10 @@ Example - sloped roof:
         
         Uses linear interpolation between edges to fill the surface.
         """
+        return self.execute_array(params, origin).to_blocks()
+    
+    def execute_array(self, params: Dict[str, Any], origin: tuple = (0, 0, 0)) -> BlockArray:
+        """Generate the quadrilateral surface as a BlockArray (see execute)."""
         edge_a = params["edge_a"]
         edge_b = params["edge_b"]
         material = params["material"]
@@ -122,89 +261,26 @@ Example - sloped roof:
         b1 = (edge_b[0][0] + origin[0], edge_b[0][1] + origin[1], edge_b[0][2] + origin[2])
         b2 = (edge_b[1][0] + origin[0], edge_b[1][1] + origin[1], edge_b[1][2] + origin[2])
         
-        blocks = []
-        placed = set()
-        
-        # Get window pattern function
-        window_func = self._get_window_pattern(window_pattern)
-        
-        # Determine sampling resolution based on edge lengths
-        len_a = self._line_length(a1, a2)
-        len_b = self._line_length(b1, b2)
-        max_edge_len = max(len_a, len_b, 1)
+        # Determine sampling resolution based on edge lengths: compare squared
+        # lengths and take a single sqrt of the longest
+        max_edge_len = math.sqrt(max(self._length_sq(a1, a2), self._length_sq(b1, b2), 1))
         
         # Cross-edge length (between edges)
-        cross_len = max(self._line_length(a1, b1), self._line_length(a2, b2), 1)
+        cross_len = math.sqrt(max(self._length_sq(a1, b1), self._length_sq(a2, b2), 1))
         
         # Sample density (oversample for smooth voxelization)
         edge_samples = int(max_edge_len * 2) + 1
         cross_samples = int(cross_len * 2) + 1
         
-        # Fill the quadrilateral surface
-        for i in range(cross_samples):
-            t = i / max(cross_samples - 1, 1)  # 0 to 1 across edges
-            
-            # Interpolate start and end points along each edge
-            # Line from edge_a to edge_b at parameter t
-            p1 = self._lerp_point(a1, b1, t)
-            p2 = self._lerp_point(a2, b2, t)
-            
-            # Draw line from p1 to p2
-            for j in range(edge_samples):
-                s = j / max(edge_samples - 1, 1)  # 0 to 1 along the line
-                
-                px = int(round(p1[0] + s * (p2[0] - p1[0])))
-                py = int(round(p1[1] + s * (p2[1] - p1[1])))
-                pz = int(round(p1[2] + s * (p2[2] - p1[2])))
-                
-                pos = (px, py, pz)
-                if pos in placed:
-                    continue
-                placed.add(pos)
-                
-                # Check window pattern
-                if window_func and window_func(i, j, cross_samples, edge_samples):
-                    blocks.append(Block(px, py, pz, "glass"))
-                else:
-                    blocks.append(Block(px, py, pz, material))
-        
-        return blocks
-    
-    def _lerp_point(self, p1: tuple, p2: tuple, t: float) -> tuple:
-        """Linear interpolation between two points."""
-        return (
-            p1[0] + t * (p2[0] - p1[0]),
-            p1[1] + t * (p2[1] - p1[1]),
-            p1[2] + t * (p2[2] - p1[2])
-        )
-    
-    def _line_length(self, p1: tuple, p2: tuple) -> float:
-        """Calculate distance between two points."""
-        return ((p2[0]-p1[0])**2 + (p2[1]-p1[1])**2 + (p2[2]-p1[2])**2) ** 0.5
-    
-    def _get_window_pattern(self, pattern: str):
-        """Get window pattern check function."""
-        if pattern == "none" or not pattern:
-            return None
-        
-        if pattern == "grid_2x2":
-            def check(cross_idx, edge_idx, cross_total, edge_total):
-                # Create 2x2 windows with spacing
-                cross_mod = cross_idx % 4
-                edge_mod = edge_idx % 4
-                # Window in the middle area
-                in_middle_cross = cross_idx > 2 and cross_idx < cross_total - 2
-                in_middle_edge = edge_idx > 2 and edge_idx < edge_total - 2
-                return cross_mod < 2 and edge_mod < 2 and in_middle_cross and in_middle_edge
-            return check
+        # Fill the quadrilateral surface and check the window pattern
+        window_grid = self._WINDOW_GRIDS.get(window_pattern) if window_pattern else None
+        coords, is_window = _plane_kernel(a1, a2, b1, b2, cross_samples, edge_samples, window_grid)
         
-        if pattern == "grid_3x3":
-            def check(cross_idx, edge_idx, cross_total, edge_total):
-                cross_mod = cross_idx % 5
-                edge_mod = edge_idx % 5
-                in_middle_cross = cross_idx > 2 and cross_idx < cross_total - 2
-                in_middle_edge = edge_idx > 2 and edge_idx < edge_total - 2
-                return cross_mod < 3 and edge_mod < 3 and in_middle_cross and in_middle_edge
-            return check
-        
-        return None
+        # Material id 0 is the surface, 1 is glass
+        return BlockArray(coords[:, 0], coords[:, 1], coords[:, 2],
+                          is_window.astype(np.int16), [material, "glass"])
+    
+    def _length_sq(self, p1: tuple, p2: tuple) -> float:
+        """Squared distance between two points."""
+        dx, dy, dz = p2[0] - p1[0], p2[1] - p1[1], p2[2] - p1[2]
+        return dx * dx + dy * dy + dz * dz
@@ -2,7 +2,45 @@
 Wall Tool - Creates walls with optional window patterns.
 """
 from typing import List, Dict, Any, Optional
-from .base import BaseTool, Block
+
+import numpy as np
+
+from .base import BaseTool, Block, BlockArray
+
+
+def _window_none(h, v, w, ht):
+    return False
+
+
+def _window_grid_2x2(h, v, w, ht):
+    """Windows every 4 blocks, 2x2 size, starting at offset 1."""
+    # Skip edges (frame)
+    inner = (v != 0) & (v != ht - 1) & (h != 0) & (h != w - 1)
+    
+    # 2x2 windows in 4x4 grid pattern
+    h_mod = (h - 1) % 4
+    v_mod = (v - 1) % 4
+    return inner & (h_mod < 2) & (v_mod < 2) & (v > 1)  # Not on bottom row
+
+
+def _window_grid_3x3(h, v, w, ht):
+    """Larger windows, 3x3 size in 5x5 grid."""
+    inner = (v != 0) & (v != ht - 1) & (h != 0) & (h != w - 1)
+    
+    h_mod = (h - 1) % 5
+    v_mod = (v - 1) % 5
+    return inner & (h_mod < 3) & (v_mod < 3) & (v > 1)
+
+
+def _window_arched(h, v, w, ht):
+    """Arched windows (taller than wide)."""
+    inner = (v != 0) & (v != ht - 1) & (v != 1) & (h != 0) & (h != w - 1)
+    
+    h_mod = (h - 1) % 4
+    v_mod = (v - 2) % 6
+    
+    # Arch shape: center 2 blocks for the shaft (v_mod < 4) and arch top (v_mod == 4)
+    return inner & (h_mod >= 1) & (h_mod <= 2) & (v_mod <= 4)
 
 
 class DrawWallTool(BaseTool):
@@ -18,6 +56,14 @@ class DrawWallTool(BaseTool):
     name = "draw_wall"
     description = "Creates a wall between start and end coordinates with optional window pattern"
     
+    # Window pattern checks, resolved once per pattern name
+    _WINDOW_FUNCS = {
+        "none": _window_none,
+        "grid_2x2": _window_grid_2x2,
+        "grid_3x3": _window_grid_3x3,
+        "arched": _window_arched,
+    }
+    
     def execute(self, params: Dict[str, Any], origin: tuple = (0, 0, 0)) -> List[Block]:
         """
         Execute wall creation.
@@ -31,6 +77,10 @@ class DrawWallTool(BaseTool):
             }
             origin: World origin offset
         """
+        return self.execute_array(params, origin).to_blocks()
+    
+    def execute_array(self, params: Dict[str, Any], origin: tuple = (0, 0, 0)) -> BlockArray:
+        """Generate the wall as a BlockArray (see execute)."""
         start = params.get("start", [0, 0, 0])
         end = params.get("end", [0, 0, 0])
         material = params.get("material", "stone_bricks")
@@ -46,8 +96,6 @@ class DrawWallTool(BaseTool):
         y_min, y_max = min(y1, y2), max(y1, y2)
         z_min, z_max = min(z1, z2), max(z1, z2)
         
-        blocks: List[Block] = []
-        
         # Determine wall orientation
         # XY plane (Z constant) or YZ plane (X constant)
         is_x_wall = (x_max - x_min) > 0 and (z_max - z_min) == 0
@@ -56,97 +104,55 @@ class DrawWallTool(BaseTool):
         # Get window pattern
         window_func = self._get_window_pattern(window_pattern)
         
-        # Generate blocks
-        for x in range(x_min, x_max + 1):
-            for y in range(y_min, y_max + 1):
-                for z in range(z_min, z_max + 1):
-                    # Calculate relative position for window pattern
-                    if is_x_wall:
-                        rel_h = x - x_min  # Horizontal position along wall
-                        rel_v = y - y_min  # Vertical position
-                        width = x_max - x_min + 1
-                    elif is_z_wall:
-                        rel_h = z - z_min
-                        rel_v = y - y_min
-                        width = z_max - z_min + 1
-                    else:
-                        # Thick wall or single column
-                        rel_h, rel_v = 0, y - y_min
-                        width = 1
-                    
-                    height = y_max - y_min + 1
-                    
-                    # Check if this position should be a window
-                    if window_func(rel_h, rel_v, width, height):
-                        block_type = "glass"
-                    else:
-                        block_type = material
-                    
-                    blocks.append(Block(x, y, z, block_type))
-        
-        return blocks
+        # Dispatch to a routine specialized for the orientation
+        if is_x_wall:
+            return self._execute_x_wall(x_min, x_max, y_min, y_max, z_min, material, window_func)
+        elif is_z_wall:
+            return self._execute_z_wall(x_min, y_min, y_max, z_min, z_max, material, window_func)
+        else:
+            return self._execute_thick(x_min, x_max, y_min, y_max, z_min, z_max, material, window_func)
+    
+    def _execute_x_wall(self, x_min: int, x_max: int, y_min: int, y_max: int, z: int,
+                        material: str, window_func) -> BlockArray:
+        """1-thick wall along X (Z constant): a 2D (x, y) grid."""
+        hs, vs = np.meshgrid(np.arange(x_max - x_min + 1), np.arange(y_max - y_min + 1), indexing="ij")
+        is_window = window_func(hs, vs, x_max - x_min + 1, y_max - y_min + 1)
+        return self._wall_array(hs + x_min, vs + y_min, np.full(hs.shape, z), is_window, material)
+    
+    def _execute_z_wall(self, x: int, y_min: int, y_max: int, z_min: int, z_max: int,
+                        material: str, window_func) -> BlockArray:
+        """1-thick wall along Z (X constant): a 2D (y, z) grid."""
+        vs, hs = np.meshgrid(np.arange(y_max - y_min + 1), np.arange(z_max - z_min + 1), indexing="ij")
+        is_window = window_func(hs, vs, z_max - z_min + 1, y_max - y_min + 1)
+        return self._wall_array(np.full(hs.shape, x), vs + y_min, hs + z_min, is_window, material)
+    
+    def _execute_thick(self, x_min: int, x_max: int, y_min: int, y_max: int, z_min: int, z_max: int,
+                       material: str, window_func) -> BlockArray:
+        """Thick wall or single column: full 3D grid, window pattern by height only."""
+        xs, ys, zs = np.meshgrid(
+            np.arange(x_min, x_max + 1),
+            np.arange(y_min, y_max + 1),
+            np.arange(z_min, z_max + 1),
+            indexing="ij",
+        )
+        is_window = window_func(np.zeros_like(xs), ys - y_min, 1, y_max - y_min + 1)
+        return self._wall_array(xs, ys, zs, is_window, material)
+    
+    def _wall_array(self, xs: np.ndarray, ys: np.ndarray, zs: np.ndarray,
+                    is_window, material: str) -> BlockArray:
+        """Flatten coordinate grids (x, y, z order) into a BlockArray: id 0 is the wall, 1 is glass."""
+        is_window = np.broadcast_to(is_window, xs.shape)
+        return BlockArray(xs.ravel(), ys.ravel(), zs.ravel(),
+                          is_window.ravel().astype(np.int16), [material, "glass"])
     
     def _get_window_pattern(self, pattern: str):
         """
         Returns a function that determines if a position should be a window.
         
-        The function takes (h, v, width, height) and returns True for window positions.
+        The function takes (h, v, width, height), where h and v may be integer
+        arrays, and returns a boolean (array) that is True for window positions.
         """
-        if pattern == "none" or not pattern:
-            return lambda h, v, w, ht: False
-        
-        elif pattern == "grid_2x2":
-            # Windows every 4 blocks, 2x2 size, starting at offset 1
-            def check(h, v, w, ht):
-                # Skip edges (frame)
-                if v == 0 or v == ht - 1:
-                    return False
-                if h == 0 or h == w - 1:
-                    return False
-                
-                # 2x2 windows in 4x4 grid pattern
-                h_mod = (h - 1) % 4
-                v_mod = (v - 1) % 4
-                return h_mod < 2 and v_mod < 2 and v > 1  # Not on bottom row
-            
-            return check
-        
-        elif pattern == "grid_3x3":
-            # Larger windows, 3x3 size in 5x5 grid
-            def check(h, v, w, ht):
-                if v == 0 or v == ht - 1:
-                    return False
-                if h == 0 or h == w - 1:
-                    return False
-                
-                h_mod = (h - 1) % 5
-                v_mod = (v - 1) % 5
-                return h_mod < 3 and v_mod < 3 and v > 1
-            
-            return check
-        
-        elif pattern == "arched":
-            # Arched windows (taller than wide)
-            def check(h, v, w, ht):
-                if v == 0 or v == ht - 1 or v == 1:
-                    return False
-                if h == 0 or h == w - 1:
-                    return False
-                
-                h_mod = (h - 1) % 4
-                v_mod = (v - 2) % 6
-                
-                # Arch shape: wider at bottom, narrower at top
-                if v_mod < 4:
-                    return h_mod >= 1 and h_mod <= 2  # Center 2 blocks
-                elif v_mod == 4:
-                    return h_mod >= 1 and h_mod <= 2  # Arch top
-                return False
-            
-            return check
-        
-        else:
-            return lambda h, v, w, ht: False
+        return self._WINDOW_FUNCS.get(pattern or "none", _window_none)
     
     def validate_params(self, params: Dict[str, Any]) -> bool:
         """Validate wall parameters."""
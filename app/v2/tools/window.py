@@ -4,7 +4,10 @@ Window Tool - Place windows in walls
 Creates window openings with glass panes and optional frames.
 """
 from typing import List, Dict, Any
-from .base import BaseTool, Block
+
+import numpy as np
+
+from .base import BaseTool, Block, BlockArray, FACING_AXIS
 
 
 class PlaceWindowTool(BaseTool):
@@ -19,10 +22,9 @@ class PlaceWindowTool(BaseTool):
     
     name = "place_window"
     
-    def get_schema(self) -> Dict[str, Any]:
-        return {
-            "name": "place_window",
-            "description": """Places a window at a specified position on a wall.
+    _SCHEMA: Dict[str, Any] = {
+        "name": "place_window",
+        "description": """Places a window at a specified position on a wall.
 
 Example - simple 2x2 window with oak frame:
 {
@@ -43,51 +45,60 @@ Example - large 3x2 window without frame:
   "facing": "east",
   "glass_type": "glass"
 }""",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "position": {
-                        "type": "array",
-                        "items": {"type": "integer"},
-                        "description": "[x, y, z] - bottom-left corner of window"
-                    },
-                    "width": {
-                        "type": "integer",
-                        "description": "Window width in blocks (1-5)"
-                    },
-                    "height": {
-                        "type": "integer",
-                        "description": "Window height in blocks (1-4)"
-                    },
-                    "facing": {
-                        "type": "string",
-                        "enum": ["north", "south", "east", "west"],
-                        "description": "Direction the window faces"
-                    },
-                    "glass_type": {
-                        "type": "string",
-                        "enum": ["glass", "glass_pane", "white_stained_glass", "light_blue_stained_glass"],
-                        "description": "Type of glass to use"
-                    },
-                    "frame_material": {
-                        "type": "string",
-                        "enum": ["none", "oak_planks", "dark_oak_planks", "spruce_planks", "stone_bricks", "stripped_oak_log"],
-                        "description": "Material for window frame"
-                    },
-                    "has_flower_box": {
-                        "type": "boolean",
-                        "description": "Whether to add a flower box below the window"
-                    }
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "position": {
+                    "type": "array",
+                    "items": {"type": "integer"},
+                    "description": "[x, y, z] - bottom-left corner of window"
+                },
+                "width": {
+                    "type": "integer",
+                    "description": "Window width in blocks (1-5)"
+                },
+                "height": {
+                    "type": "integer",
+                    "description": "Window height in blocks (1-4)"
+                },
+                "facing": {
+                    "type": "string",
+                    "enum": ["north", "south", "east", "west"],
+                    "description": "Direction the window faces"
+                },
+                "glass_type": {
+                    "type": "string",
+                    "enum": ["glass", "glass_pane", "white_stained_glass", "light_blue_stained_glass"],
+                    "description": "Type of glass to use"
                 },
-                "required": ["position", "width", "height", "facing", "glass_type"]
-            }
+                "frame_material": {
+                    "type": "string",
+                    "enum": ["none", "oak_planks", "dark_oak_planks", "spruce_planks", "stone_bricks", "stripped_oak_log"],
+                    "description": "Material for window frame"
+                },
+                "has_flower_box": {
+                    "type": "boolean",
+                    "description": "Whether to add a flower box below the window"
+                }
+            },
+            "required": ["position", "width", "height", "facing", "glass_type"]
         }
+    }
+    
+    _REQUIRED = frozenset(("position", "width", "height", "facing", "glass_type"))
+    
+    def get_schema(self) -> Dict[str, Any]:
+        """Return the (shared, read-only) function-calling schema."""
+        return self._SCHEMA
     
     def validate_params(self, params: Dict[str, Any]) -> bool:
-        required = ["position", "width", "height", "facing", "glass_type"]
-        return all(k in params for k in required)
+        return self._REQUIRED.issubset(params)
     
     def execute(self, params: Dict[str, Any], origin: tuple = (0, 0, 0)) -> List[Block]:
+        return self.execute_array(params, origin).to_blocks()
+    
+    def execute_array(self, params: Dict[str, Any], origin: tuple = (0, 0, 0)) -> BlockArray:
+        """Generate the window as a BlockArray (see execute)."""
         pos = params["position"]
         width = params["width"]
         height = params["height"]
@@ -97,52 +108,35 @@ Example - large 3x2 window without frame:
         has_flower_box = params.get("has_flower_box", False)
         
         x, y, z = pos[0] + origin[0], pos[1] + origin[1], pos[2] + origin[2]
-        blocks = []
         
         # Determine direction offsets based on facing
-        if facing in ["north", "south"]:
-            dx, dz = 1, 0  # Window extends in X direction
-        else:  # east, west
-            dx, dz = 0, 1  # Window extends in Z direction
+        dx, dz = FACING_AXIS.get(facing, (0, 1))
+        
+        # Each region is built on a local (u, v) grid: u along the wall, v up.
+        # The u grid goes in the xs slot and v in ys until the final transform.
+        along = np.arange(width)
+        parts = []
         
         # Place frame if specified
         if frame_material and frame_material != "none":
-            # Top frame
-            for i in range(-1, width + 1):
-                bx = x + i * dx
-                bz = z + i * dz
-                blocks.append(Block(bx, y + height, bz, frame_material))
-            
-            # Bottom frame
-            for i in range(-1, width + 1):
-                bx = x + i * dx
-                bz = z + i * dz
-                blocks.append(Block(bx, y - 1, bz, frame_material))
-            
-            # Side frames
-            for j in range(-1, height + 1):
-                # Left side
-                blocks.append(Block(x - dx, y + j, z - dz, frame_material))
-                # Right side
-                bx = x + (width - 1) * dx + dx
-                bz = z + (width - 1) * dz + dz
-                blocks.append(Block(bx, y + j, bz, frame_material))
+            # Top and bottom frame
+            parts.append(BlockArray.filled(np.arange(-1, width + 1), [[height], [-1]], 0, frame_material))
+            # Side frames (left, right)
+            parts.append(BlockArray.filled([[-1, width]], np.arange(-1, height + 1)[:, None], 0, frame_material))
         
         # Place glass
-        for i in range(width):
-            for j in range(height):
-                bx = x + i * dx
-                bz = z + i * dz
-                blocks.append(Block(bx, y + j, bz, glass_type))
+        parts.append(BlockArray.filled(along[:, None], np.arange(height), 0, glass_type))
         
         # Place flower box if requested
         if has_flower_box:
             flower_box_material = "oak_trapdoor"  # Trapdoors make good flower boxes
-            for i in range(width):
-                bx = x + i * dx
-                bz = z + i * dz
-                blocks.append(Block(bx, y - 2, bz, flower_box_material))
-                # Add flowers
-                blocks.append(Block(bx, y - 1, bz, "potted_red_tulip"))
+            # Trapdoor with flowers on top
+            parts.append(BlockArray(
+                np.repeat(along, 2), np.tile([-2, -1], width), np.zeros(2 * width, dtype=np.int64),
+                np.tile(np.array([0, 1], dtype=np.int16), width),
+                [flower_box_material, "potted_red_tulip"],
+            ))
         
-        return blocks
+        local = BlockArray.concat(parts)
+        us = local.xs
+        return BlockArray(x + us * dx, y + local.ys, z + us * dz, local.material_ids, local.palette)
@@ -1,6 +1,22 @@
 import math
+import numpy as np
+from collections import defaultdict
 from typing import Dict, List, Any
 
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+# Above this many buildings the NxN broadcast gets expensive and the
+# collision broad phase switches to a uniform grid.
+_DENSE_LIMIT = 800
+_GRID_CELL = 20 # blocks
+# Rows rebuilt mid-sweep are widened by this many pushes, so a box pushed
+# repeatedly in one turn only needs a new row every few pushes.
+_ROW_REACH = 4
+
 def rectangles_overlap(r1, r2, padding=1):
     """Check if two rectangles overlap."""
     return not (r1['x'] + r1['width'] + padding <= r2['x'] or
@@ -8,57 +24,384 @@ def rectangles_overlap(r1, r2, padding=1):
                 r1['z'] + r1['depth'] + padding <= r2['z'] or
                 r1['z'] >= r2['z'] + r2['depth'] + padding)
 
-def resolve_collisions(zoning_data: Dict[str, Any], map_width=200, map_depth=200) -> Dict[str, Any]:
+def _overlap_candidates(xs, zs, ws, ds, padding):
     """
-    Detects and resolves overlapping buildings in zoning_data.
-    Also ensures buildings stay within map bounds.
+    Broad phase: tests every pair of padded boxes in one NumPy broadcast.
+    Returns, for each building, the sorted indices of the buildings it overlaps
+    at the given padding.
     """
-    buildings = zoning_data.get("buildings", [])
-    if not buildings:
-        return zoning_data
+    bounds, cols = _overlap_csr(xs, zs, ws, ds, padding)
+    bounds = bounds.tolist()
+    cols = cols.tolist()
+    return [cols[bounds[i]:bounds[i + 1]] for i in range(len(xs))]
 
-    # Simple Iterative Solver
-    MAX_ITER = 50
-    moved = True
+def _overlap_csr(xs, zs, ws, ds, padding):
+    """_overlap_candidates as CSR arrays: building i overlaps cols[bounds[i]:bounds[i + 1]]."""
+    x_lo = np.asarray(xs)
+    z_lo = np.asarray(zs)
+    x_hi = x_lo + np.asarray(ws) + padding
+    z_hi = z_lo + np.asarray(ds) + padding
+
+    overlap = ((x_lo[:, None] < x_hi[None, :]) & (x_hi[:, None] > x_lo[None, :]) &
+               (z_lo[:, None] < z_hi[None, :]) & (z_hi[:, None] > z_lo[None, :]))
+    np.fill_diagonal(overlap, False)
+
+    rows, cols = np.nonzero(overlap)
+    return np.searchsorted(rows, np.arange(len(xs) + 1)), cols
+
+def _grid_candidates(xs, zs, ws, ds, padding, cell=_GRID_CELL):
+    """
+    Broad phase for large layouts: buckets each padded box into the grid cells
+    it touches and only tests boxes that share a cell.
+    Returns the same lists as _overlap_candidates.
+    """
+    n = len(xs)
+    grid = defaultdict(list)
+    for i in range(n):
+        x, z = xs[i], zs[i]
+        for cx in range(int(x // cell), int((x + ws[i] + padding) // cell) + 1):
+            for cz in range(int(z // cell), int((z + ds[i] + padding) // cell) + 1):
+                grid[(cx, cz)].append(i)
+
+    pairs = set()
+    for bucket in grid.values():
+        for a in range(len(bucket)):
+            i = bucket[a]
+            x1, z1 = xs[i], zs[i]
+            x1_hi = x1 + ws[i] + padding
+            z1_hi = z1 + ds[i] + padding
+            for j in bucket[a + 1:]:
+                if (x1 < xs[j] + ws[j] + padding and xs[j] < x1_hi and
+                        z1 < zs[j] + ds[j] + padding and zs[j] < z1_hi):
+                    pairs.add((i, j))
+
+    candidates = [[] for _ in range(n)]
+    for i, j in pairs:
+        candidates[i].append(j)
+        candidates[j].append(i)
+    for c in candidates:
+        c.sort()
+    return candidates
+
+def _overlapping(i, x1, z1, xs, zs, ws, ds, padding, after=-1):
+    """
+    Narrow-phase row from the current positions: indices above `after` of the
+    boxes that overlap box i placed at (x1, z1), in index order. Takes the
+    boxes as arrays.
+    """
+    hit = ((x1 + ws[i] + padding > xs) & (xs + ws + padding > x1) &
+           (z1 + ds[i] + padding > zs) & (zs + ds + padding > z1))
+    hit[:after + 1] = False
+    hit[i] = False
+    return np.flatnonzero(hit).tolist()
+
+def _solve(xs, zs, ws, ds, map_width, map_depth, max_iter, padding, push_dist):
+    """
+    Iterative collision solver over flat coordinate lists.
+    Moves the boxes in place (xs, zs) until nothing overlaps or max_iter sweeps
+    have run.
+    """
+    n = len(xs)
+    if HAS_NUMBA:
+        return _solve_compiled(xs, zs, ws, ds, map_width, map_depth, max_iter, padding, push_dist)
+    hypot = math.hypot
+    broad_phase = _overlap_candidates if n <= _DENSE_LIMIT else _grid_candidates
     
-    for _ in range(MAX_ITER):
-        if not moved: break
+    # Bounds check, once up front: pushes below clamp to the map themselves
+    for i in range(n):
+        x1, z1 = xs[i], zs[i]
+        xs[i] = 0 if x1 < 0 else (map_width - ws[i] if x1 + ws[i] > map_width else x1)
+        zs[i] = 0 if z1 < 0 else (map_depth - ds[i] if z1 + ds[i] > map_depth else z1)
+    
+    # Test the axis the boxes are more spread out along first: it rejects
+    # separated pairs more often, so the and-chain short-circuits sooner
+    z_first = max(zs) - min(zs) > max(xs) - min(xs)
+    
+    # Box centres, kept in step with xs/zs as boxes are pushed
+    cxs = [x + w/2 for x, w in zip(xs, ws)]
+    czs = [z + d/2 for z, d in zip(zs, ds)]
+    
+    # A box needs testing only if it or one of its neighbours was pushed since
+    # it was last tested clean; otherwise every test would repeat a miss.
+    dirty = [True] * n
+    
+    # Array copies of the boxes for rebuilding rows mid-sweep
+    xa, za = np.array(xs, dtype=np.float64), np.array(zs, dtype=np.float64)
+    wa, da = np.array(ws, dtype=np.float64), np.array(ds, dtype=np.float64)
+    
+    for _ in range(max_iter):
         moved = False
+
+        # Widen the broad phase by one push so pairs that a push in this
+        # sweep brings together are still tested in the same sweep. A row only
+        # stays complete while box i and the boxes pushed before it have moved
+        # push_dist between them; past that, box i's row is rebuilt from the
+        # current positions.
+        candidates = broad_phase(xs, zs, ws, ds, padding + push_dist)
+        reach = _ROW_REACH * push_dist
+        moved_by = 0  # Furthest any box has been pushed this sweep (Chebyshev)
+        
+        # Neighbour lists change between sweeps: re-mark around boxes pushed
+        # in the last sweep against their new neighbours
+        for i in [i for i in range(n) if dirty[i]]:
+            for j in candidates[i]:
+                dirty[j] = True
         
-        for i, b1 in enumerate(buildings):
-            p1 = b1['position']
-            # Bounds check
-            if p1['x'] < 0: p1['x'] = 0; moved = True
-            if p1['z'] < 0: p1['z'] = 0; moved = True
-            if p1['x'] + p1['width'] > map_width: p1['x'] = map_width - p1['width']; moved = True
-            if p1['z'] + p1['depth'] > map_depth: p1['z'] = map_depth - p1['depth']; moved = True
+        for i in range(n):
+            if not dirty[i]: continue
+            dirty[i] = False
+            x0, z0 = xs[i], zs[i]
+            # Row built around (xr, zr), complete while box i stays within slack of it
+            xr, zr = x0, z0
+            slack = push_dist - moved_by
+            if slack < 0:
+                neighbours = _overlapping(i, x0, z0, xa, za, wa, da, padding + reach)
+                slack = reach
+            else:
+                neighbours = candidates[i]
+            if not neighbours: continue
+            pushed = False
+            x1, z1 = x0, z0
+            cx1, cz1 = cxs[i], czs[i]
+            w1 = ws[i]
+            d1 = ds[i]
             
-            for j, b2 in enumerate(buildings):
-                if i == j: continue
-                p2 = b2['position']
+            k = 0
+            while k < len(neighbours):
+                j = neighbours[k]
+                k += 1
+                x2, z2 = xs[j], zs[j]
+                w2, d2 = ws[j], ds[j]
                 
-                if rectangles_overlap(p1, p2, padding=2): # 2 blocks padding for roads/buffer
+                if z_first:
+                    hit = (z1 + d1 + padding > z2 and z2 + d2 + padding > z1 and
+                           x1 + w1 + padding > x2 and x2 + w2 + padding > x1)
+                else:
+                    hit = (x1 + w1 + padding > x2 and x2 + w2 + padding > x1 and
+                           z1 + d1 + padding > z2 and z2 + d2 + padding > z1)
+                
+                if hit:
                     # Move b1 away from b2
                     # Find overlap vector
-                    cx1 = p1['x'] + p1['width']/2
-                    cz1 = p1['z'] + p1['depth']/2
-                    cx2 = p2['x'] + p2['width']/2
-                    cz2 = p2['z'] + p2['depth']/2
-                    
-                    dx = cx1 - cx2
-                    dz = cz1 - cz2
+                    dx = cx1 - cxs[j]
+                    dz = cz1 - czs[j]
                     
                     # Normalize and push
-                    dist = math.sqrt(dx*dx + dz*dz)
+                    dist = hypot(dx, dz)
                     if dist == 0: dist = 0.1; dx = 1 # Overlapping centers
                     
-                    push_dist = 5 # blocks
-                    move_x = (dx / dist) * push_dist
-                    move_z = (dz / dist) * push_dist
+                    scale = push_dist / dist
+                    x1 = round(x1 + dx * scale)
+                    z1 = round(z1 + dz * scale)
+                    
+                    # Keep the pushed box on the map
+                    x1 = 0 if x1 < 0 else (map_width - w1 if x1 + w1 > map_width else x1)
+                    z1 = 0 if z1 < 0 else (map_depth - d1 if z1 + d1 > map_depth else z1)
+                    cx1 = x1 + w1/2
+                    cz1 = z1 + d1/2
+                    pushed = True
+                    
+                    # Pushed out of what the row covers: rebuild the rest of
+                    # the sweep's order around the new position
+                    if max(abs(x1 - xr), abs(z1 - zr)) > slack:
+                        neighbours = _overlapping(i, x1, z1, xa, za, wa, da, padding + reach, after=j)
+                        xr, zr, slack = x1, z1, reach
+                        k = 0
+
+            if pushed:
+                xs[i] = x1
+                zs[i] = z1
+                xa[i] = x1
+                za[i] = z1
+                cxs[i] = cx1
+                czs[i] = cz1
+                moved = True
+                dirty[i] = True
+                for j in candidates[i]:
+                    dirty[j] = True
+                # Boxes the row no longer covers may now overlap the new position
+                step = max(abs(x1 - x0), abs(z1 - z0))
+                if step > push_dist:
+                    for j in _overlapping(i, x1, z1, xa, za, wa, da, padding):
+                        dirty[j] = True
+                moved_by = max(moved_by, step)
+
+        # Fixed point: a sweep without pushes leaves nothing to resolve
+        if not moved: break
+
+    return xs, zs
+
+def _solve_compiled(xs, zs, ws, ds, map_width, map_depth, max_iter, padding, push_dist):
+    """
+    _solve with each sweep's narrow phase in a compiled kernel. The broad phase
+    is unchanged; its neighbour lists are handed over as CSR arrays.
+    """
+    n = len(xs)
+    x = np.array(xs, dtype=np.float64)
+    z = np.array(zs, dtype=np.float64)
+    w = np.array(ws, dtype=np.float64)
+    d = np.array(ds, dtype=np.float64)
+    
+    # Bounds check, once up front: pushes below clamp to the map themselves
+    x = np.where(x < 0, 0, np.where(x + w > map_width, map_width - w, x))
+    z = np.where(z < 0, 0, np.where(z + d > map_depth, map_depth - d, z))
+    
+    z_first = z.max() - z.min() > x.max() - x.min()
+    cx = x + w/2
+    cz = z + d/2
+    dirty = np.ones(n, dtype=np.bool_)
+    
+    for _ in range(max_iter):
+        if n <= _DENSE_LIMIT:
+            indptr, indices = _overlap_csr(x, z, w, d, padding + push_dist)
+        else:
+            candidates = _grid_candidates(x.tolist(), z.tolist(), ws, ds, padding + push_dist)
+            indptr = np.zeros(n + 1, dtype=np.int64)
+            np.cumsum([len(c) for c in candidates], out=indptr[1:])
+            indices = np.fromiter((j for c in candidates for j in c), dtype=np.int64, count=indptr[-1])
+        
+        if not _sweep_kernel(x, z, cx, cz, w, d, indptr, indices, dirty,
+                             map_width, map_depth, padding, push_dist, z_first):
+            break
+    
+    # Pushed or clamped positions are whole numbers, like round() gives
+    return ([x0 if x0 == x1 else (int(x1) if x1.is_integer() else x1) for x0, x1 in zip(xs, x.tolist())],
+            [z0 if z0 == z1 else (int(z1) if z1.is_integer() else z1) for z0, z1 in zip(zs, z.tolist())])
+
+if HAS_NUMBA:
+    @njit(cache=True)
+    def _overlapping_kernel(i, x1, z1, xs, zs, ws, ds, padding, after, out):
+        """Compiled _overlapping: writes the row into out, returns its length."""
+        count = 0
+        for j in range(after + 1, xs.shape[0]):
+            if (j != i and x1 + ws[i] + padding > xs[j] and xs[j] + ws[j] + padding > x1 and
+                    z1 + ds[i] + padding > zs[j] and zs[j] + ds[j] + padding > z1):
+                out[count] = j
+                count += 1
+        return count
+
+    @njit(cache=True)
+    def _sweep_kernel(xs, zs, cxs, czs, ws, ds, indptr, indices, dirty,
+                      map_width, map_depth, padding, push_dist, z_first):
+        """One _solve sweep over CSR neighbour lists; returns whether any box moved."""
+        n = xs.shape[0]
+        row = np.empty(n, dtype=np.int64)  # Rebuilt row, when the CSR row no longer covers box i
+        reach = _ROW_REACH * push_dist
+        
+        # Re-mark around boxes pushed in the last sweep against their new neighbours
+        was_dirty = dirty.copy()
+        for i in range(n):
+            if was_dirty[i]:
+                for k in range(indptr[i], indptr[i + 1]):
+                    dirty[indices[k]] = True
+        
+        moved = False
+        moved_by = 0.0  # Furthest any box has been pushed this sweep (Chebyshev)
+        for i in range(n):
+            if not dirty[i]:
+                continue
+            dirty[i] = False
+            x0, z0 = xs[i], zs[i]
+            # Row built around (xr, zr), complete while box i stays within slack of it
+            xr, zr = x0, z0
+            slack = push_dist - moved_by
+            rebuilt = slack < 0
+            if rebuilt:
+                length = _overlapping_kernel(i, x0, z0, xs, zs, ws, ds, padding + reach, -1, row)
+                slack = reach
+            else:
+                length = indptr[i + 1] - indptr[i]
+            if length == 0:
+                continue
+            pushed = False
+            x1, z1 = x0, z0
+            cx1, cz1 = cxs[i], czs[i]
+            w1, d1 = ws[i], ds[i]
+            
+            k = 0
+            while k < length:
+                j = row[k] if rebuilt else indices[indptr[i] + k]
+                k += 1
+                x2, z2 = xs[j], zs[j]
+                w2, d2 = ws[j], ds[j]
+                
+                if z_first:
+                    hit = (z1 + d1 + padding > z2 and z2 + d2 + padding > z1 and
+                           x1 + w1 + padding > x2 and x2 + w2 + padding > x1)
+                else:
+                    hit = (x1 + w1 + padding > x2 and x2 + w2 + padding > x1 and
+                           z1 + d1 + padding > z2 and z2 + d2 + padding > z1)
+                
+                if hit:
+                    # Push b1 away from b2's centre
+                    dx = cx1 - cxs[j]
+                    dz = cz1 - czs[j]
+                    dist = math.hypot(dx, dz)
+                    if dist == 0:
+                        dist = 0.1
+                        dx = 1.0 # Overlapping centers
+                    
+                    scale = push_dist / dist
+                    x1 = np.rint(x1 + dx * scale)
+                    z1 = np.rint(z1 + dz * scale)
+                    
+                    # Keep the pushed box on the map
+                    x1 = 0.0 if x1 < 0 else (map_width - w1 if x1 + w1 > map_width else x1)
+                    z1 = 0.0 if z1 < 0 else (map_depth - d1 if z1 + d1 > map_depth else z1)
+                    cx1 = x1 + w1/2
+                    cz1 = z1 + d1/2
+                    pushed = True
                     
-                    p1['x'] = int(p1['x'] + move_x)
-                    p1['z'] = int(p1['z'] + move_z)
-                    moved = True
+                    # Pushed out of what the row covers: rebuild the rest of
+                    # the sweep's order around the new position
+                    if max(abs(x1 - xr), abs(z1 - zr)) > slack:
+                        rebuilt = True
+                        length = _overlapping_kernel(i, x1, z1, xs, zs, ws, ds, padding + reach, j, row)
+                        xr, zr, slack = x1, z1, reach
+                        k = 0
+            
+            if pushed:
+                xs[i] = x1
+                zs[i] = z1
+                cxs[i] = cx1
+                czs[i] = cz1
+                moved = True
+                dirty[i] = True
+                for k in range(indptr[i], indptr[i + 1]):
+                    dirty[indices[k]] = True
+                # Boxes the row no longer covers may now overlap the new position
+                step = max(abs(x1 - x0), abs(z1 - z0))
+                if step > push_dist:
+                    for k in range(_overlapping_kernel(i, x1, z1, xs, zs, ws, ds, padding, -1, row)):
+                        dirty[row[k]] = True
+                moved_by = max(moved_by, step)
+        return moved
+
+def resolve_collisions(zoning_data: Dict[str, Any], map_width=200, map_depth=200) -> Dict[str, Any]:
+    """
+    Detects and resolves overlapping buildings in zoning_data.
+    Also ensures buildings stay within map bounds.
+    """
+    buildings = zoning_data.get("buildings", [])
+    if not buildings:
+        return zoning_data
+
+    # Pack the positions once; the solver never touches the dicts.
+    positions = [b['position'] for b in buildings]
+    xs = [p['x'] for p in positions]
+    zs = [p['z'] for p in positions]
+    ws = [p['width'] for p in positions]
+    ds = [p['depth'] for p in positions]
+
+    # Simple Iterative Solver
+    xs, zs = _solve(xs, zs, ws, ds, map_width, map_depth,
+                    max_iter=50,
+                    padding=2, # 2 blocks padding for roads/buffer
+                    push_dist=5) # blocks
+
+    for p, x, z in zip(positions, xs, zs):
+        p['x'] = x
+        p['z'] = z
     
     zoning_data['buildings'] = buildings
     return zoning_data
@@ -69,27 +412,28 @@ def assign_orientation(zoning_data: Dict[str, Any], map_width=200, map_depth=200
     Heuristic: Face towards the map center or nearest large open space.
     For now, simply face map center (100, 100).
     """
-    center_x = map_width / 2
-    center_z = map_depth / 2
+    buildings = zoning_data.get("buildings", [])
+    if not buildings:
+        return zoning_data
     
-    for b in zoning_data.get("buildings", []):
-        p = b['position']
-        bx = p['x'] + p['width'] / 2
-        bz = p['z'] + p['depth'] / 2
-        
-        dx = bx - center_x
-        dz = bz - center_z
-        
-        # If building is at (150, 100), it's to the RIGHT of center. It should face LEFT (West) to look at center.
-        # dx > 0 -> Face West
-        # dx < 0 -> Face East
-        # dz > 0 -> Face North
-        # dz < 0 -> Face South
-        
-        if abs(dx) > abs(dz):
-            b['facing'] = "west" if dx > 0 else "east"
-        else:
-            b['facing'] = "north" if dz > 0 else "south"
+    boxes = np.array([(p['x'], p['z'], p['width'], p['depth'])
+                      for p in (b['position'] for b in buildings)], dtype=np.float64)
+    dx = boxes[:, 0] + boxes[:, 2] / 2 - map_width / 2
+    dz = boxes[:, 1] + boxes[:, 3] / 2 - map_depth / 2
+    
+    # If building is at (150, 100), it's to the RIGHT of center. It should face LEFT (West) to look at center.
+    # dx > 0 -> Face West
+    # dx < 0 -> Face East
+    # dz > 0 -> Face North
+    # dz < 0 -> Face South
+    facings = np.where(
+        np.abs(dx) > np.abs(dz),
+        np.where(dx > 0, "west", "east"),
+        np.where(dz > 0, "north", "south"),
+    )
+    
+    for b, facing in zip(buildings, facings.tolist()):
+        b['facing'] = facing
             
     return zoning_data
 
@@ -9,14 +9,21 @@ import streamlit as st
 import os
 import json
 import sys
-from pathlib import Path
 
-# Add parent to path for imports
-sys.path.insert(0, str(Path(__file__).parent.parent))
+# Fix path for imports when running via Streamlit from root
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.append(current_dir)
 
 from dotenv import load_dotenv
 load_dotenv()
 
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
 from v2.carpenter import CarpenterSession
 from v2.preview import create_3d_preview_colored_by_type, get_block_statistics
 from v2.architect import Architect, BuildingInstruction, HAS_GENAI
@@ -52,6 +59,28 @@ st.markdown("""
 st.markdown('<p class="main-header">🍌 Bananacraft 2.0 - AI Architect</p>', unsafe_allow_html=True)
 st.caption("Gemini 3 Pro による建築指示書生成と3Dプレビュー")
 
+def _dump_blocks(blocks) -> str:
+    """Blocks as indented JSON for the download button (orjson when available)."""
+    if HAS_ORJSON:
+        return orjson.dumps(blocks, option=orjson.OPT_INDENT_2).decode()
+    return json.dumps(blocks, indent=2)
+
+def _get_preview(blocks):
+    """
+    Return (stats, figure, blocks_json) for the current blocks.
+    Cached in the session against the blocks list itself: every build stores a
+    new list, so an identity check is enough to tell whether it changed.
+    """
+    cached = st.session_state.get("preview_cache")
+    if cached is None or cached[0] is not blocks:
+        stats = get_block_statistics(blocks)
+        fig = create_3d_preview_colored_by_type(
+            blocks,
+            title=f"Building Preview ({stats['total']} blocks)"
+        )
+        cached = st.session_state.preview_cache = (blocks, stats, fig, _dump_blocks(blocks))
+    return cached[1:]
+
 # Initialize session state
 if 'blocks' not in st.session_state:
     st.session_state.blocks = []
@@ -134,15 +163,20 @@ with col1:
         
         if st.button("🔨 Build from JSON", type="primary"):
             try:
-                instructions = json.loads(json_input)
-                session = CarpenterSession(origin=(origin_x, origin_y, origin_z))
-                blocks = session.build_from_json(instructions)
-                
-                st.session_state.blocks = blocks
-                st.session_state.instructions = instructions
-                st.session_state.raw_json = json_input
+                # Same text at the same origin: keep the current blocks (and the
+                # cached preview) instead of parsing and building again
+                build_key = (json_input, (origin_x, origin_y, origin_z))
+                if build_key != st.session_state.get("last_build_key"):
+                    instructions = json.loads(json_input)
+                    session = CarpenterSession(origin=(origin_x, origin_y, origin_z))
+                    blocks = session.build_from_json(instructions)
+                    
+                    st.session_state.blocks = blocks
+                    st.session_state.instructions = instructions
+                    st.session_state.raw_json = json_input
+                    st.session_state.last_build_key = build_key
                 
-                st.success(f"✅ Generated {len(blocks)} blocks!")
+                st.success(f"✅ Generated {len(st.session_state.blocks)} blocks!")
                 st.rerun()
                 
             except json.JSONDecodeError as e:
@@ -231,6 +265,7 @@ with col1:
                             
                             st.session_state.blocks = blocks
                             st.session_state.instructions = json_instructions
+                            st.session_state.last_build_key = None
                             
                             st.success(f"✅ Gemini generated {len(instructions)} instructions → {len(blocks)} blocks!")
                             st.rerun()
@@ -246,8 +281,9 @@ with col2:
     st.subheader("🎮 3D Preview")
     
     if st.session_state.blocks:
-        # Statistics
-        stats = get_block_statistics(st.session_state.blocks)
+        # Statistics and figure are rebuilt only when a build replaces the blocks,
+        # not on every widget rerun
+        stats, fig, blocks_json = _get_preview(st.session_state.blocks)
         
         cols = st.columns(4)
         with cols[0]:
@@ -260,10 +296,6 @@ with col2:
             st.metric("Height (Y)", stats["dimensions"]["height"])
         
         # 3D Preview
-        fig = create_3d_preview_colored_by_type(
-            st.session_state.blocks,
-            title=f"Building Preview ({stats['total']} blocks)"
-        )
         st.plotly_chart(fig, use_container_width=True)
         
         # Block distribution
@@ -283,7 +315,6 @@ with col2:
                     mime="application/json"
                 )
             with col_b:
-                blocks_json = json.dumps(st.session_state.blocks, indent=2)
                 st.download_button(
                     "📥 Download Blocks (JSON)",
                     data=blocks_json,
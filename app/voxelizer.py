@@ -1,12 +1,141 @@
 import trimesh
 import numpy as np
-from skimage import color
-import collections
+from scipy.spatial import cKDTree
 import requests
 import io
+import shutil
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from numba import njit, prange
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+# sRGB -> CIELAB (D65, 2 degree observer), same constants as skimage.color.rgb2lab
+_XYZ_FROM_RGB = np.array([[0.412453, 0.357580, 0.180423],
+                          [0.212671, 0.715160, 0.072169],
+                          [0.019334, 0.119193, 0.950227]])
+_XYZ_REF_WHITE = np.array([0.95047, 1.0, 1.08883])
+
+# Inverse sRGB gamma for every 8-bit channel value
+_levels = np.arange(256) / 255.0
+_SRGB_TO_LINEAR = np.where(_levels > 0.04045, ((_levels + 0.055) / 1.055) ** 2.4, _levels / 12.92)
+del _levels
+
+def _rgb_to_lab(rgb):
+    """Convert (..., 3) 8-bit RGB values to CIELAB."""
+    linear = _SRGB_TO_LINEAR[np.asarray(rgb, dtype=np.intp)]
+    xyz = (linear @ _XYZ_FROM_RGB.T) / _XYZ_REF_WHITE
+    f = np.where(xyz > 0.008856, np.cbrt(xyz), 7.787 * xyz + 16.0 / 116.0)
+    fx, fy, fz = f[..., 0], f[..., 1], f[..., 2]
+    return np.stack([116.0 * fy - 16.0, 500.0 * (fx - fy), 200.0 * (fy - fz)], axis=-1)
+
+def _delta_e_2000(lab1, lab2):
+    """CIEDE2000 color difference between every row of lab1 (N, 3) and lab2 (M, 3) -> (N, M)."""
+    L1, a1, b1 = (c[:, None] for c in np.asarray(lab1).T)
+    L2, a2, b2 = (c[None, :] for c in np.asarray(lab2).T)
+    
+    # Chroma-dependent a* rescaling
+    c_bar = (np.hypot(a1, b1) + np.hypot(a2, b2)) / 2
+    g = 0.5 * (1 - np.sqrt(c_bar ** 7 / (c_bar ** 7 + 25.0 ** 7)))
+    a1p, a2p = (1 + g) * a1, (1 + g) * a2
+    c1p, c2p = np.hypot(a1p, b1), np.hypot(a2p, b2)
+    h1p = np.degrees(np.arctan2(b1, a1p)) % 360
+    h2p = np.degrees(np.arctan2(b2, a2p)) % 360
+    chroma_zero = (c1p * c2p) == 0
+    
+    # Differences
+    dl = L2 - L1
+    dc = c2p - c1p
+    dh = h2p - h1p
+    dh = np.where(dh > 180, dh - 360, np.where(dh < -180, dh + 360, dh))
+    dh = np.where(chroma_zero, 0.0, dh)
+    dH = 2 * np.sqrt(c1p * c2p) * np.sin(np.radians(dh) / 2)
+    
+    # Means
+    l_bar = (L1 + L2) / 2
+    cp_bar = (c1p + c2p) / 2
+    h_sum = h1p + h2p
+    h_bar = np.where(np.abs(h1p - h2p) <= 180, h_sum / 2,
+                     np.where(h_sum < 360, (h_sum + 360) / 2, (h_sum - 360) / 2))
+    h_bar = np.where(chroma_zero, h_sum, h_bar)
+    
+    # Weighting functions
+    t = (1 - 0.17 * np.cos(np.radians(h_bar - 30)) + 0.24 * np.cos(np.radians(2 * h_bar))
+         + 0.32 * np.cos(np.radians(3 * h_bar + 6)) - 0.20 * np.cos(np.radians(4 * h_bar - 63)))
+    d_theta = 30 * np.exp(-(((h_bar - 275) / 25) ** 2))
+    r_c = 2 * np.sqrt(cp_bar ** 7 / (cp_bar ** 7 + 25.0 ** 7))
+    s_l = 1 + 0.015 * (l_bar - 50) ** 2 / np.sqrt(20 + (l_bar - 50) ** 2)
+    s_c = 1 + 0.045 * cp_bar
+    s_h = 1 + 0.015 * cp_bar * t
+    r_t = -np.sin(np.radians(2 * d_theta)) * r_c
+    
+    dl, dc, dH = dl / s_l, dc / s_c, dH / s_h
+    return np.sqrt(np.maximum(dl ** 2 + dc ** 2 + dH ** 2 + r_t * dc * dH, 0))
+
+def _window_mode(labels, axis, window_size=5):
+    """
+    Most common label in a sliding window along one axis of a label grid.
+    Empty cells (-1) are not counted; ties go to the label seen first in the
+    window, like Counter.most_common. Returns -1 where the window is empty.
+    """
+    half = window_size // 2
+    length = labels.shape[axis]
+    if HAS_NUMBA:
+        lines = np.ascontiguousarray(np.moveaxis(labels, axis, -1))
+        out = np.empty_like(lines)
+        _window_mode_lines(lines.reshape(-1, length), half, out.reshape(-1, length))
+        return np.moveaxis(out, -1, axis)
+    
+    pad = [(0, 0)] * labels.ndim
+    pad[axis] = (half, half)
+    padded = np.moveaxis(np.pad(labels, pad, constant_values=-1), axis, 0)
+    # Label at each window position, in window order
+    window = [padded[i:i + length] for i in range(window_size)]
+    
+    best = np.full(window[0].shape, -1, dtype=labels.dtype)
+    best_count = np.zeros(window[0].shape, dtype=np.int8)
+    for cand in window:
+        count = sum((cand == other).astype(np.int8) for other in window)
+        count[cand < 0] = 0
+        # Strict comparison keeps the earliest candidate on ties
+        better = count > best_count
+        best[better] = cand[better]
+        best_count[better] = count[better]
+    return np.moveaxis(best, 0, axis)
+
+if HAS_NUMBA:
+    @njit(parallel=True, cache=True)
+    def _window_mode_lines(lines, half, out):
+        """Compiled _window_mode over the rows of a 2-D label array."""
+        n_lines, length = lines.shape
+        for r in prange(n_lines):
+            for i in range(length):
+                start = max(0, i - half)
+                end = min(length, i + half + 1)
+                best = -1
+                best_count = 0
+                for j in range(start, end):
+                    cand = lines[r, j]
+                    if cand < 0:
+                        continue
+                    count = 0
+                    for k in range(start, end):
+                        if lines[r, k] == cand:
+                            count += 1
+                    if count > best_count:
+                        best = cand
+                        best_count = count
+                out[r, i] = best
+
+# Derived palette data (LAB colors, KD-trees, lookup tables) shared by every
+# Voxelizer with the same palette: palette items -> _init_lab_palette state
+_PALETTE_CACHE = {}
 
 class Voxelizer:
-    def __init__(self):
+    def __init__(self, metric="euclidean"):
         # Default Palette: RGB -> Block ID
         # Expanded palette for better matching
         self.block_palette_rgb = {
@@ -105,45 +234,123 @@ class Voxelizer:
         }
         
         # Pre-compute LAB palette for faster/better color matching
-        self.block_palette_lab = {} # block_id -> lab_color
+        # Sets block_palette_lab (block_id -> lab_color); computed once per palette
         self._init_lab_palette()
         
         # Reverse map for quick lookup if needed elsewhere (not critical for logic)
         self.block_palette = self.block_palette_rgb
+        
+        # Color distance: "euclidean" (LAB, fast) or "ciede2000" (perceptual)
+        self.metric = metric
 
     def _init_lab_palette(self):
         """Convert RGB palette to CIELAB for perceptual color matching."""
-        for rgb, block_id in self.block_palette_rgb.items():
+        palette_key = tuple(self.block_palette_rgb.items())
+        if palette_key not in _PALETTE_CACHE:
             # Handle RGBA (ignore Alpha for color matching for now, or assume white background)
-            if len(rgb) == 4:
-                rgb = rgb[:3]
-                
-            # Normalize 0-255 to 0.0-1.0 for skimage
-            rgb_norm = np.array([[rgb]]) / 255.0 
-            lab = color.rgb2lab(rgb_norm)[0][0]
-            self.block_palette_lab[block_id] = lab
+            rgbs = [rgb[:3] for rgb in self.block_palette_rgb]
+            palette_lab = dict(zip(self.block_palette_rgb.values(), _rgb_to_lab(rgbs)))
+            _PALETTE_CACHE[palette_key] = {
+                "block_palette_lab": palette_lab,
+                # Stacked copy for vectorized nearest-color search (row i <-> _palette_ids[i])
+                "_palette_ids": list(palette_lab.keys()),
+                "_palette_lab_arr": np.array(list(palette_lab.values())),
+                # Per-filter caches, filled lazily
+                "_palette_trees": {},
+                "_palette_luts": {},
+            }
+        self.__dict__.update(_PALETTE_CACHE[palette_key])
+
+    def _palette_tree(self, palette_filter=None):
+        """
+        KD-tree over the (optionally filtered) LAB palette, cached per filter.
+        Returns (tree, labels) with labels[i] the _palette_ids index for tree
+        row i, or None if the filter matches no palette entry.
+        """
+        key = frozenset(palette_filter) if palette_filter else None
+        if key not in self._palette_trees:
+            rows = [i for i, block_id in enumerate(self._palette_ids)
+                    if key is None or block_id in key]
+            entry = None
+            if rows:
+                # Identical colors (e.g. quartz_block/glass) would make the tree's
+                # choice arbitrary; keep the first, as the linear search did
+                _, first = np.unique(self._palette_lab_arr[rows], axis=0, return_index=True)
+                rows = [rows[i] for i in np.sort(first)]
+                entry = (cKDTree(self._palette_lab_arr[rows]), np.array(rows))
+            self._palette_trees[key] = entry
+        return self._palette_trees[key]
+
+    def _palette_lut(self, palette_filter=None):
+        """
+        Coarse RGB -> label table for the (optionally filtered) palette, cached
+        per filter. Indexed by rgb >> 3; -1 marks cells whose 8 corner colors
+        map to different blocks and need an exact lookup.
+        """
+        key = frozenset(palette_filter) if palette_filter else None
+        if key not in self._palette_luts:
+            tree, rows = self._palette_tree(palette_filter)
+            levels = np.minimum(np.arange(33) * 8, 255)
+            lattice = np.stack(np.meshgrid(levels, levels, levels, indexing='ij'), axis=-1)
+            _, idx = tree.query(_rgb_to_lab(lattice.reshape(-1, 3)), k=1)
+            corners = rows[idx].astype(np.int16).reshape(33, 33, 33)
+            
+            lut = corners[:32, :32, :32].copy()
+            for dr in (0, 1):
+                for dg in (0, 1):
+                    for db in (0, 1):
+                        lut[corners[dr:dr + 32, dg:dg + 32, db:db + 32] != lut] = -1
+            self._palette_luts[key] = lut
+        return self._palette_luts[key]
 
     def _map_color_to_block_lab(self, target_rgb, palette_filter=None):
         """Map a target RGB color to the nearest block using CIELAB distance."""
         # Convert target RGB to LAB
-        target_rgb_norm = np.array([[target_rgb]]) / 255.0
-        target_lab = color.rgb2lab(target_rgb_norm)[0][0]
+        target_lab = _rgb_to_lab(target_rgb)
         
-        min_dist = float('inf')
-        best_block = "cobblestone" # Fallback
+        # Squared Euclidean distance in Lab space (simple Delta E approximation)
+        diffs = self._palette_lab_arr - target_lab
+        d2 = np.einsum('ij,ij->i', diffs, diffs)
         
-        for block_id, palette_lab in self.block_palette_lab.items():
-            # Check filter
-            if palette_filter and block_id not in palette_filter:
-                continue
-                
-            # Calculate Delta E (Euclidean distance in Lab space is simple approximation)
-            dist = np.linalg.norm(target_lab - palette_lab)
-            if dist < min_dist:
-                min_dist = dist
-                best_block = block_id
+        # Check filter
+        if palette_filter:
+            d2[~np.isin(self._palette_ids, list(palette_filter))] = np.inf
+            if np.isinf(d2).all():
+                return "cobblestone" # Fallback
                 
-        return best_block
+        return self._palette_ids[int(d2.argmin())]
+
+    def _map_colors_to_labels(self, rgbs, palette_filter=None):
+        """
+        Vectorized _map_color_to_block_lab: map an (N, 3) array of RGB colors
+        to block labels (indices into _palette_ids) with one LAB conversion
+        and one KD-tree query (or a CIEDE2000 search, see metric).
+        """
+        rgbs = np.asarray(rgbs)
+        if len(rgbs) == 0:
+            return np.zeros(0, dtype=np.int16)
+        
+        palette = self._palette_tree(palette_filter)
+        if palette is None:
+            # Fallback
+            return np.full(len(rgbs), self._palette_ids.index("cobblestone"), dtype=np.int16)
+        tree, rows = palette
+        
+        if self.metric == "ciede2000":
+            unique_rgbs, inverse = np.unique(rgbs, axis=0, return_inverse=True)
+            delta_e = _delta_e_2000(_rgb_to_lab(unique_rgbs), self._palette_lab_arr[rows])
+            return rows[delta_e.argmin(axis=1)].astype(np.int16)[inverse.reshape(-1)]
+        
+        # Table lookup first; only colors in ambiguous cells hit the tree
+        cell = rgbs >> 3
+        labels = self._palette_lut(palette_filter)[cell[:, 0], cell[:, 1], cell[:, 2]]
+        ambiguous = labels < 0
+        if ambiguous.any():
+            # Averaged colors repeat heavily on flat-shaded models; query each once
+            unique_rgbs, inverse = np.unique(rgbs[ambiguous], axis=0, return_inverse=True)
+            _, idx = tree.query(_rgb_to_lab(unique_rgbs), k=1)
+            labels[ambiguous] = rows[idx][inverse.reshape(-1)]
+        return labels
 
     def apply_directional_filter(self, blocks, iterations=1):
         """Applies multi-directional scanline smoothing (XYZ + Diagonals)."""
@@ -154,104 +361,61 @@ class Voxelizer:
         # Build spatial map
         block_map = {}
         for b in blocks:
-            block_map[(b['x'], b['y'], b['z'])] = b.copy() # Work on copies
-            
-        min_x = min(b['x'] for b in blocks)
-        max_x = max(b['x'] for b in blocks)
-        min_y = min(b['y'] for b in blocks)
-        max_y = max(b['y'] for b in blocks)
-        min_z = min(b['z'] for b in blocks)
-        max_z = max(b['z'] for b in blocks)
-
-        from collections import Counter
-
-        def filter_line(line_coords):
-            # line_coords: list of (x,y,z) sorted by sequence
-            # Extract types
-            types = []
-            valid_indices = []
-            for i, c in enumerate(line_coords):
-                if c in block_map:
-                    types.append(block_map[c]['type'])
-                    valid_indices.append(i)
-                else:
-                    types.append(None)
-            
-            if not valid_indices:
-                return {}
+            block_map[(b['x'], b['y'], b['z'])] = b
+        
+        # Dense label grid over the bounding box (-1 = empty)
+        coords = np.fromiter(itertools.chain.from_iterable(block_map),
+                             dtype=np.int32, count=3 * len(block_map)).reshape(-1, 3)
+        min_c = coords.min(axis=0)
+        type_names, type_labels = np.unique(
+            [b['type'] for b in block_map.values()], return_inverse=True)
+        labels = np.full(tuple((coords.max(axis=0) - min_c + 1).tolist()), -1, dtype=np.int16)
+        idx = tuple((coords - min_c).T)
+        labels[idx] = type_labels
 
-            updates = {}
-            window_size = 5
-            half = window_size // 2
+        labels = self._filter_labels(labels, iterations)
+        
+        # Copy only the blocks that changed; input dicts are never mutated
+        result = []
+        for b, label in zip(block_map.values(), labels[idx].tolist()):
+            new_type = str(type_names[label])
+            result.append(b if new_type == b['type'] else {**b, 'type': new_type})
             
-            for i in valid_indices:
-                t = types[i]
-                start = max(0, i - half)
-                end = min(len(types), i + half + 1)
-                
-                window = [x for x in types[start:end] if x is not None]
-                if not window:
-                    continue
-                    
-                most_common = Counter(window).most_common(1)[0][0]
-                
-                if most_common != t:
-                    updates[line_coords[i]] = most_common
-            return updates
+        return result
 
+    def _filter_labels(self, labels, iterations=1):
+        """
+        Scanline mode filter on a dense label grid (-1 = empty).
+        Returns the filtered grid; the input is not modified.
+        """
         for it in range(iterations):
-            all_updates = {}
+            occupied = labels >= 0
+            new_labels = labels.copy()
             
             # --- 1. Axis-Aligned Scans ---
-            # X-Axis (iterate Y, Z)
-            for y in range(min_y, max_y + 1):
-                for z in range(min_z, max_z + 1):
-                    line = [(x, y, z) for x in range(min_x, max_x + 1)]
-                    all_updates.update(filter_line(line))
-            
-            # Y-Axis (iterate X, Z)
-            for x in range(min_x, max_x + 1):
-                for z in range(min_z, max_z + 1):
-                    line = [(x, y, z) for y in range(min_y, max_y + 1)]
-                    all_updates.update(filter_line(line))
-                    
-            # Z-Axis (iterate X, Y)
-            for x in range(min_x, max_x + 1):
-                for y in range(min_y, max_y + 1):
-                    line = [(x, y, z) for z in range(min_z, max_z + 1)]
-                    all_updates.update(filter_line(line))
+            # X, then Y, then Z; later axes override earlier ones
+            for axis in range(3):
+                mode = _window_mode(labels, axis, window_size=5)
+                changed = occupied & (mode != labels)
+                new_labels[changed] = mode[changed]
 
             # --- 2. Diagonal Scans (DISABLED per user request) ---
             # Planar Diagonals were causing noise patterns. Reverting to Axis-Aligned only.
             
             # Apply Updates
-            update_count = 0
-            for coord, new_type in all_updates.items():
-                if block_map[coord]['type'] != new_type:
-                    block_map[coord]['type'] = new_type
-                    update_count += 1
+            update_count = int(np.count_nonzero(new_labels != labels))
+            labels = new_labels
             
             print(f"Iteration {it+1}: Updated {update_count} blocks.")
-            
-        return list(block_map.values())
+        return labels
 
-    def _get_texture_color(self, mesh, face_idx, barycentric):
-        """Sample texture color using barycentric coordinates."""
+    def _texture_array(self, mesh):
+        """
+        Return (uv, texture) for UV texture sampling, or None if the mesh has no
+        usable texture. texture is the base color image as an (H, W, C) array.
+        """
         try:
-            # 1. Get UV coordinates for the face vertices
-            # mesh.visual.uv contains UVs matching mesh.vertices
-            # We need to find which UVs correspond to the face's vertices
-            
-            # mesh.faces[face_idx] gives indices of vertices
-            vertex_indices = mesh.faces[face_idx]
-            uvs = mesh.visual.uv[vertex_indices] # (3, 2) array of UVs
-            
-            # 2. Interpolate UV using barycentric coordinates
-            # uv = u*A + v*B + w*C
-            # shape: (3, 2) * (3,) -> (2,)
-            interpolated_uv = np.dot(barycentric, uvs)
-            
-            # 3. Sample image at UV
+            uv = mesh.visual.uv
             material = mesh.visual.material
             if hasattr(material, 'baseColorTexture') and material.baseColorTexture:
                  img = material.baseColorTexture
@@ -259,28 +423,41 @@ class Voxelizer:
                 img = material.image
             else:
                 return None
-
-            # Handle PIL vs other image types
-            if img:
-                 width, height = img.size
-                 u, v = interpolated_uv
-                 # Wrap UVs
-                 u = u % 1.0
-                 v = v % 1.0
-                 # Flip V if necessary (GLTF usually (0,0) is top-left, but texture coords might be bottom-left. Trimesh usually handles this but sometimes V needs flip)
-                 # img pixel access
-                 x = int(u * (width - 1))
-                 y = int(v * (height - 1)) # No Flip for GLTF standard (Top-Left)
-                 
-                 pixel = img.getpixel((x, y))
-                 if len(pixel) >= 3:
-                     return pixel[:3]
+            if uv is None or not img:
+                return None
             
-            return None
+            texture = np.asarray(img)
+            # Single-band/paletted images have no RGB to sample
+            if texture.ndim != 3 or texture.shape[2] < 3:
+                return None
+            return np.asarray(uv), texture
         except Exception as e:
-            # print(f"Texture sampling error: {e}")
+            # print(f"Texture lookup error: {e}")
             return None
 
+    def _sample_texture_batch(self, uv, texture, faces, barycentric):
+        """
+        Sample texture colors for many hits at once.
+        Returns ((N, 3) colors, (N,) valid mask); hits whose UV is not finite
+        (degenerate triangles) are invalid.
+        """
+        # 1. UV coordinates of each hit face's vertices: (N, 3, 2)
+        face_uvs = uv[faces]
+        
+        # 2. Interpolate UV using barycentric coordinates
+        interpolated_uv = np.einsum('ij,ijk->ik', barycentric, face_uvs)
+        valid = np.isfinite(interpolated_uv).all(axis=1)
+        
+        # 3. Sample image at UV
+        height, width = texture.shape[:2]
+        # Wrap UVs
+        u = np.where(valid, interpolated_uv[:, 0], 0.0) % 1.0
+        v = np.where(valid, interpolated_uv[:, 1], 0.0) % 1.0
+        # No Flip for GLTF standard (Top-Left)
+        x = (u * (width - 1)).astype(int)
+        y = (v * (height - 1)).astype(int)
+        return texture[y, x, :3], valid
+
     def voxelize(self, model_url_or_path, target_width, target_depth, palette_filter=None, use_majority_filter=False):
         """
         Voxelize utilizing 6-Directional Ray Casting for solid shell generation.
@@ -294,8 +471,13 @@ class Voxelizer:
         # Load Mesh (omitted common loading logic for brevity, assuming standard flow follows)
         if model_url_or_path.startswith("http"):
             try:
-                r = requests.get(model_url_or_path)
-                file_obj = io.BytesIO(r.content)
+                # Stream into a single buffer instead of r.content + BytesIO copy
+                with requests.get(model_url_or_path, stream=True, timeout=60) as r:
+                    r.raise_for_status()
+                    r.raw.decode_content = True
+                    file_obj = io.BytesIO()
+                    shutil.copyfileobj(r.raw, file_obj)
+                file_obj.seek(0)
                 scene = trimesh.load(file_obj, file_type='glb')
             except Exception as e:
                 print(f"Failed to load form URL: {e}")
@@ -316,13 +498,22 @@ class Voxelizer:
         else:
             mesh = scene
 
+        if len(getattr(mesh, 'faces', [])) == 0:
+            print("Mesh has no faces.")
+            return []
+
         # --- 1. Rescaling ---
         extents = mesh.extents
-        scale_x = target_width / extents[0]
-        scale_z = target_depth / extents[2]
+        # A zero-extent axis (flat model) cannot set the scale
+        flat = extents <= 1e-6
+        scales = [target / extents[i] for i, target in ((0, target_width), (2, target_depth))
+                  if not flat[i]]
+        if not scales:
+            print(f"Degenerate mesh extents: {extents}")
+            return []
         
         # Uniform scaling to fit within target dimensions
-        scale_factor = min(scale_x, scale_z)
+        scale_factor = min(scales)
         
         transform = trimesh.transformations.scale_matrix(scale_factor)
         mesh.apply_transform(transform)
@@ -346,22 +537,57 @@ class Voxelizer:
         
         print(f"Voxel Grid Size: {size}")
 
-        # Initialize Voxel Data: (x,y,z) -> list of colors
-        voxel_data = collections.defaultdict(list)
+        # Initialize Voxel Data: dense color sum / hit count per voxel of the
+        # grid min_bound..max_bound (inclusive)
+        grid_shape = tuple((max_bound - min_bound + 1).tolist())
+        # 8-bit colors summed in uint32: exact, and half the bytes of float64
+        color_sum = np.zeros(grid_shape + (3,), dtype=np.uint32)
+        hit_count = np.zeros(grid_shape, dtype=np.uint32)
+
+        # Base color texture and face colors, looked up once per mesh
+        texture = self._texture_array(mesh)
+        face_colors = None
+        if hasattr(mesh.visual, 'face_colors') and len(mesh.visual.face_colors) > 0:
+            face_colors = np.asarray(mesh.visual.face_colors)[:, :3]
+
+        face_normals = mesh.face_normals
+        face_origins = mesh.vertices[mesh.faces[:, 0]]
+
+        # Helper to cast one scan
+        def cast_rays(scan):
+            origins, directions = scan
+            # First hit (surface) triangle per ray, -1 for a miss
+            index_tri = mesh.ray.intersects_first(
+                ray_origins=origins,
+                ray_directions=directions
+            )
+            hit = index_tri >= 0
+            origins, directions, index_tri = origins[hit], directions[hit], index_tri[hit]
+            
+            # Hit point from the ray/triangle-plane distance
+            normals = face_normals[index_tri]
+            denom = np.einsum('ij,ij->i', directions, normals)
+            ok = np.abs(denom) > 1e-12
+            t = np.einsum('ij,ij->i', face_origins[index_tri[ok]] - origins[ok], normals[ok]) / denom[ok]
+            locations = origins[ok] + t[:, None] * directions[ok]
+            return locations, index_tri[ok]
 
         # Helper to process hits
-        def process_hits(origins, directions):
-            # Use ray.intersects_location
-            # It returns (locations, index_ray, index_tri)
+        def process_hits(scans):
+            if not scans:
+                return
+            # Scans are independent and embree releases the GIL, so they
+            # overlap well on threads. The rtree index behind trimesh's
+            # fallback intersector is not thread-safe; cast serially there.
+            workers = len(scans) if trimesh.ray.has_embree else 1
             try:
-                locations, index_ray, index_tri = mesh.ray.intersects_location(
-                    ray_origins=origins,
-                    ray_directions=directions,
-                    multiple_hits=False # We only want the first hit (surface)
-                )
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    hits = list(pool.map(cast_rays, scans))
             except Exception as e:
                 print(f"Ray casting error: {e}")
                 return
+            locations = np.concatenate([h[0] for h in hits])
+            index_tri = np.concatenate([h[1] for h in hits])
 
             if len(locations) == 0:
                 return
@@ -371,122 +597,80 @@ class Voxelizer:
             triangles = mesh.vertices[mesh.faces[index_tri]]
             barycentric = trimesh.triangles.points_to_barycentric(triangles, locations)
             
-            # Process each hit
-            for i, loc in enumerate(locations):
-                # Voxel Coordinate
-                vx = int(round(loc[0]))
-                vy = int(round(loc[1]))
-                vz = int(round(loc[2]))
-                
-                # Fetch color
-                color_val = None
-                
-                # UV Texture Sampling
-                idx_tri = index_tri[i]
-                bary = barycentric[i]
-                
-                color_val = self._get_texture_color(mesh, idx_tri, bary)
-                
-                # Fallback Color
-                if color_val is None:
-                     # Face Color
-                    if hasattr(mesh.visual, 'face_colors') and len(mesh.visual.face_colors) > 0:
-                        if idx_tri < len(mesh.visual.face_colors):
-                             color_val = mesh.visual.face_colors[idx_tri][:3]
-                
-                if color_val is None:
-                    color_val = (128, 128, 128) # Gray fallback
+            # Voxel Coordinates (grid indices)
+            voxels = np.rint(locations).astype(int) - min_bound
+            
+            colors = np.full((len(locations), 3), 128, dtype=np.uint8) # Gray fallback
+            has_color = np.zeros(len(locations), dtype=bool)
+            
+            # UV Texture Sampling
+            if texture is not None:
+                tex_colors, has_color = self._sample_texture_batch(
+                    texture[0], texture[1], mesh.faces[index_tri], barycentric)
+                colors[has_color] = tex_colors[has_color]
+            
+            # Fallback Color: Face Color
+            if face_colors is not None:
+                use_fc = ~has_color & (index_tri < len(face_colors))
+                colors[use_fc] = face_colors[index_tri[use_fc]]
 
-                voxel_data[(vx, vy, vz)].append(color_val)
+            inside = np.all((voxels >= 0) & (voxels < grid_shape), axis=1)
+            voxel_idx = tuple(voxels[inside].T)
+            np.add.at(color_sum, voxel_idx, colors[inside])
+            np.add.at(hit_count, voxel_idx, 1)
 
         # --- 3. Execute Ray Casting (6 Directions) ---
         print("Casting rays from 6 directions...")
         
-        # Ranges
-        x_range = range(min_bound[0], max_bound[0] + 1)
-        y_range = range(min_bound[1], max_bound[1] + 1)
-        z_range = range(min_bound[2], max_bound[2] + 1)
-        
         margin = 10.0 # Start rays from outside
         
-        # 3.1 X-Axis Scans (YZ Plane)
-        origins = []
-        directions = []
-        # Positive Direction (+X)
-        for y in y_range:
-            for z in z_range:
-                origins.append([min_bound[0] - margin, y, z])
-                directions.append([1, 0, 0])
-        # Negative Direction (-X)
-        for y in y_range:
-            for z in z_range:
-                origins.append([max_bound[0] + margin, y, z])
-                directions.append([-1, 0, 0])
+        # One grid of rays per axis (X: YZ plane, Y: XZ plane, Z: XY plane),
+        # cast in both directions
+        ranges = [np.arange(min_bound[i], max_bound[i] + 1) for i in range(3)]
+        scans = []
+        for axis in range(3):
+            plane = [i for i in range(3) if i != axis]
+            # Rays along this axis run parallel to a flat model; they cannot hit it
+            if flat[plane].any():
+                continue
+            u, v = np.meshgrid(ranges[plane[0]], ranges[plane[1]], indexing='ij')
+            for start, step in ((min_bound[axis] - margin, 1), (max_bound[axis] + margin, -1)):
+                o = np.empty((u.size, 3))
+                o[:, axis] = start
+                o[:, plane[0]] = u.ravel()
+                o[:, plane[1]] = v.ravel()
+                d = np.zeros(3)
+                d[axis] = step
+                scans.append((o, np.broadcast_to(d, o.shape)))
         
-        if origins:
-            process_hits(np.array(origins), np.array(directions))
-            
-        # 3.2 Y-Axis Scans (XZ Plane)
-        origins = []
-        directions = []
-        # +Y
-        for x in x_range:
-            for z in z_range:
-                origins.append([x, min_bound[1] - margin, z])
-                directions.append([0, 1, 0])
-        # -Y
-        for x in x_range:
-            for z in z_range:
-                origins.append([x, max_bound[1] + margin, z])
-                directions.append([0, -1, 0])
-
-        if origins:
-            process_hits(np.array(origins), np.array(directions))
-
-        # 3.3 Z-Axis Scans (XY Plane)
-        origins = []
-        directions = []
-        # +Z
-        for x in x_range:
-            for y in y_range:
-                origins.append([x, y, min_bound[2] - margin])
-                directions.append([0, 0, 1])
-        # -Z
-        for x in x_range:
-            for y in y_range:
-                origins.append([x, y, max_bound[2] + margin])
-                directions.append([0, 0, -1])
-
-        if origins:
-            process_hits(np.array(origins), np.array(directions))
-
+        process_hits(scans)
 
         # --- 4. Aggregation and Mapping ---
-        blocks = []
-        print(f"Aggregating {len(voxel_data)} active voxels...")
+        active = hit_count > 0
+        print(f"Aggregating {int(active.sum())} active voxels...")
         
-        for (vx, vy, vz), colors in voxel_data.items():
-            if not colors:
-                continue
-            
-            # Average Color
-            avg_rgb = np.mean(colors, axis=0).astype(int)
-            
-            # Map to Block ID (Pass filter)
-            block_type = self._map_color_to_block_lab(avg_rgb, palette_filter=palette_filter)
-            
-            blocks.append({
-                "x": vx,
-                "y": vy,
-                "z": vz,
-                "type": block_type
-            })
+        # Average Color
+        avg_rgbs = color_sum[active] // hit_count[active][:, None]
+        
+        # Map to block labels in one batch (Pass filter); -1 = empty
+        labels = np.full(grid_shape, -1, dtype=np.int16)
+        labels[active] = self._map_colors_to_labels(avg_rgbs, palette_filter=palette_filter)
 
-        print(f"Initial voxel count: {len(blocks)}")
+        print(f"Initial voxel count: {len(avg_rgbs)}")
 
         # --- 5. Post-Processing: Directional Scanline Voting ---
         if use_majority_filter:
-            blocks = self.apply_directional_filter(blocks, iterations=2) # 2 iterations for stability
+            iterations = 2 # 2 iterations for stability
+            print(f"Applying Multi-Directional Filter ({iterations} iterations)...")
+            labels = self._filter_labels(labels, iterations)
+
+        # Materialize block dicts
+        occupied = labels >= 0
+        coords = (np.argwhere(occupied) + min_bound).tolist()
+        blocks = [
+            {"x": vx, "y": vy, "z": vz, "type": self._palette_ids[label]}
+            for (vx, vy, vz), label in zip(coords, labels[occupied].tolist())
+        ]
 
         print(f"Voxelization complete. Generated {len(blocks)} blocks.")
         return blocks
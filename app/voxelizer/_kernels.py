@@ -0,0 +1,335 @@
+"""
+Kernels - Compiled inner loops for the voxelizer (numba, with numpy fallbacks)
+"""
+import math
+import numpy as np
+
+try:
+    from numba import njit, prange
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+
+if HAS_NUMBA:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _nearest_palette_kernel(voxel_rgb, palette_rgb, out_idx):
+        """Scalar nearest-palette scan; the palette stays in cache for every voxel."""
+        for i in prange(voxel_rgb.shape[0]):
+            best_k = 0
+            best_d = np.inf
+            for k in range(palette_rgb.shape[0]):
+                dr = voxel_rgb[i, 0] - palette_rgb[k, 0]
+                dg = voxel_rgb[i, 1] - palette_rgb[k, 1]
+                db = voxel_rgb[i, 2] - palette_rgb[k, 2]
+                d = dr * dr + dg * dg + db * db
+                if d < best_d:
+                    best_d = d
+                    best_k = k
+            out_idx[i] = best_k
+
+    @njit(cache=True, fastmath=True)
+    def _triangle_area(a, b, c):
+        """Area of triangle abc from explicit scalar cross-product math."""
+        e1x, e1y, e1z = b[0] - a[0], b[1] - a[1], b[2] - a[2]
+        e2x, e2y, e2z = c[0] - a[0], c[1] - a[1], c[2] - a[2]
+        cx = e1y * e2z - e1z * e2y
+        cy = e1z * e2x - e1x * e2z
+        cz = e1x * e2y - e1y * e2x
+        return 0.5 * np.sqrt(cx * cx + cy * cy + cz * cz)
+
+    @njit(parallel=True, cache=True, fastmath=True)
+    def _barycentric_kernel(v0, v1, v2, p, out_w, out_degenerate):
+        """Area-based barycentric weights of each point in its triangle."""
+        for i in prange(p.shape[0]):
+            total = _triangle_area(v0[i], v1[i], v2[i])
+            out_degenerate[i] = total < 1e-10
+            if out_degenerate[i]:
+                total = 1.0
+            out_w[i, 0] = _triangle_area(v1[i], v2[i], p[i]) / total
+            out_w[i, 1] = _triangle_area(v2[i], v0[i], p[i]) / total
+            out_w[i, 2] = _triangle_area(v0[i], v1[i], p[i]) / total
+
+    @njit(parallel=True, cache=True)
+    def _denoise_kernel(grid, coords, radius, threshold, out_labels):
+        """Majority-relabel blocks with fewer than `threshold` same-label neighbors."""
+        k = (2 * radius + 1) ** 3 - 1
+        for i in prange(coords.shape[0]):
+            x, y, z = coords[i, 0], coords[i, 1], coords[i, 2]
+            own = grid[x, y, z]
+            out_labels[i] = own
+            
+            # Neighbor labels in scan order
+            neighbors = np.empty(k, dtype=np.int32)
+            m = 0
+            same = 0
+            for dx in range(-radius, radius + 1):
+                for dy in range(-radius, radius + 1):
+                    for dz in range(-radius, radius + 1):
+                        if dx == 0 and dy == 0 and dz == 0:
+                            continue
+                        t = grid[x + dx, y + dy, z + dz]
+                        if t >= 0:
+                            neighbors[m] = t
+                            m += 1
+                            if t == own:
+                                same += 1
+            if m == 0 or same >= threshold:
+                continue
+            
+            # Most common label; ties go to the one seen first
+            best = own
+            best_count = 0
+            for a in range(m):
+                count = 0
+                for b in range(m):
+                    if neighbors[b] == neighbors[a]:
+                        count += 1
+                if count > best_count:
+                    best_count = count
+                    best = neighbors[a]
+            out_labels[i] = best
+
+    @njit(parallel=True, cache=True)
+    def _smooth_block_kernel(normals, base_ids, variant_count, threshold_slab, threshold_stair,
+                             out_ids, out_codes):
+        """Per-voxel shape classification fused with the stair/slab variant lookup."""
+        for i in prange(normals.shape[0]):
+            out_ids[i] = base_ids[i]
+            out_codes[i] = 0
+            base = base_ids[i]
+            x, y, z = normals[i, 0], normals[i, 1], normals[i, 2]
+            if base < 0 or y != y:
+                continue  # No variants, or no surface (NaN normal)
+            
+            abs_y = abs(y)
+            angle = 0.0 if abs_y >= 1.0 else math.degrees(math.acos(abs_y))
+            if angle < threshold_slab:
+                # Slab: SLAB_TOP facing up, SLAB_BOTTOM facing down
+                out_codes[i] = 2 if y > 0 else 1
+                out_ids[i] = base + 2 * variant_count
+            elif angle < threshold_stair:
+                facing = 2  # north
+                if math.hypot(x, z) > 0.01:
+                    if abs(x) <= abs(z):
+                        facing = 3 if z > 0 else 2
+                    else:
+                        facing = 1 if x > 0 else 0
+                half = 0 if y > 0 else 1
+                out_codes[i] = 3 | (facing << 2) | (half << 4)
+                out_ids[i] = base + variant_count
+
+
+def barycentric_weights(
+    v0: np.ndarray,
+    v1: np.ndarray,
+    v2: np.ndarray,
+    positions: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Area-based barycentric weights of points inside their triangles.
+    
+    Args:
+        v0, v1, v2: (N, 3) triangle vertices
+        positions: (N, 3) points on the triangles
+        
+    Returns:
+        ((N, 3) weights, (N,) bool mask of degenerate triangles)
+    """
+    if HAS_NUMBA:
+        weights = np.empty((len(positions), 3), dtype=np.float64)
+        degenerate = np.empty(len(positions), dtype=np.bool_)
+        _barycentric_kernel(
+            np.ascontiguousarray(v0, dtype=np.float64),
+            np.ascontiguousarray(v1, dtype=np.float64),
+            np.ascontiguousarray(v2, dtype=np.float64),
+            np.ascontiguousarray(positions, dtype=np.float64),
+            weights,
+            degenerate
+        )
+        return weights, degenerate
+    
+    def triangle_area(a, b, c):
+        cross = np.cross(b - a, c - a)
+        return 0.5 * np.sqrt(np.einsum('ij,ij->i', cross, cross))
+    
+    total_area = triangle_area(v0, v1, v2)
+    degenerate = total_area < 1e-10
+    total_area = np.where(degenerate, 1.0, total_area)
+    
+    weights = np.stack([
+        triangle_area(v1, v2, positions) / total_area,
+        triangle_area(v2, v0, positions) / total_area,
+        triangle_area(v0, v1, positions) / total_area,
+    ], axis=1)
+    return weights, degenerate
+
+
+def nearest_palette(voxel_rgb: np.ndarray, palette_rgb: np.ndarray) -> np.ndarray:
+    """
+    Index of the nearest palette color (squared RGB distance) for each voxel.
+    
+    Args:
+        voxel_rgb: (N, 3) voxel colors
+        palette_rgb: (M, 3) palette colors
+        
+    Returns:
+        (N,) int array of palette indices
+    """
+    if HAS_NUMBA:
+        out_idx = np.empty(len(voxel_rgb), dtype=np.int32)
+        _nearest_palette_kernel(
+            np.ascontiguousarray(voxel_rgb[:, :3]),
+            np.ascontiguousarray(palette_rgb[:, :3]),
+            out_idx
+        )
+        return out_idx
+    
+    # ||v - p||^2 = ||v||^2 + ||p||^2 - 2 v.p; ||v||^2 is the same for every
+    # palette entry, so the argmin only needs one (B, 3) @ (3, M) matmul.
+    # float64 keeps near-ties resolving like the direct difference.
+    palette = np.asarray(palette_rgb[:, :3], dtype=np.float64)
+    pnorm2 = np.einsum('ij,ij->i', palette, palette) # (M,)
+    dots = np.asarray(voxel_rgb[:, :3], dtype=np.float64) @ palette.T # (B, M)
+    return np.argmin(pnorm2 - 2 * dots, axis=1) # (B,)
+
+
+def denoise_grid(
+    grid: np.ndarray,
+    coords: np.ndarray,
+    radius: int,
+    threshold: int
+) -> np.ndarray:
+    """
+    One majority-denoise pass over the occupied cells of a label grid.
+    
+    A cell with fewer than `threshold` neighbors (within `radius`, center
+    excluded) sharing its label takes the most common neighbor label; ties
+    go to the label met first in dx, dy, dz scan order.
+    
+    Args:
+        grid: (X, Y, Z) int32 labels, -1 for empty, padded by `radius` on every side
+        coords: (N, 3) grid indices of the occupied cells to relabel
+        radius: Neighborhood radius
+        threshold: Minimum same-label neighbors to keep a label
+        
+    Returns:
+        (N,) int32 new labels (the grid itself is not modified)
+    """
+    if HAS_NUMBA:
+        out_labels = np.empty(len(coords), dtype=np.int32)
+        _denoise_kernel(
+            np.ascontiguousarray(grid, dtype=np.int32),
+            np.ascontiguousarray(coords, dtype=np.int64),
+            radius,
+            threshold,
+            out_labels
+        )
+        return out_labels
+    
+    r = np.arange(-radius, radius + 1)
+    offsets = np.stack(np.meshgrid(r, r, r, indexing='ij'), axis=-1).reshape(-1, 3)
+    offsets = offsets[np.any(offsets != 0, axis=1)] # (K, 3), scan order
+    
+    out_labels = grid[tuple(coords.T)].astype(np.int32)
+    label_count = int(grid.max()) + 1
+    chunk_size = 20000
+    for i in range(0, len(coords), chunk_size):
+        own = out_labels[i:i+chunk_size]
+        cells = coords[i:i+chunk_size, np.newaxis, :] + offsets # (B, K, 3)
+        neighbors = grid[cells[..., 0], cells[..., 1], cells[..., 2]] # (B, K)
+        present = neighbors >= 0
+        same = (neighbors == own[:, np.newaxis]).sum(axis=1)
+        noisy = present.any(axis=1) & (same < threshold)
+        if not noisy.any():
+            continue
+        
+        # Per-row label histogram from one bincount, gathered back onto each
+        # neighbor slot; argmax picks the first of the most common labels in
+        # scan order
+        neighbors, present = neighbors[noisy], present[noisy]
+        rows = np.broadcast_to(np.arange(len(neighbors))[:, np.newaxis], neighbors.shape)
+        histogram = np.bincount(
+            (rows * label_count + neighbors)[present], minlength=len(neighbors) * label_count
+        ).reshape(len(neighbors), label_count)
+        counts = np.where(present, histogram[rows, np.maximum(neighbors, 0)], 0)
+        best = np.take_along_axis(neighbors, counts.argmax(axis=1)[:, np.newaxis], axis=1)[:, 0]
+        own[noisy] = best
+    return out_labels
+
+
+def block_state_codes(
+    normals: np.ndarray,
+    threshold_slab: float = 22.5,
+    threshold_stair: float = 67.5
+) -> np.ndarray:
+    """
+    Packed smooth-block state code of many normals, as whole-array numpy ops.
+    See smooth_block_codes for the code layout.
+    
+    Args:
+        normals: (N, 3) unit surface normals, NaN rows where there is no surface
+        threshold_slab: Angle from vertical (degrees) below which slabs are used
+        threshold_stair: Angle from vertical (degrees) below which stairs are used
+        
+    Returns:
+        (N,) uint8 state codes, 0 (full) for NaN rows
+    """
+    normals = np.asarray(normals, dtype=np.float64).reshape(-1, 3)
+    x, y, z = normals.T
+    with np.errstate(invalid='ignore'):
+        # Angle from vertical; NaN compares False everywhere and stays full
+        angle = np.degrees(np.arccos(np.minimum(np.abs(y), 1.0)))
+        shape = np.select([angle < threshold_slab, angle < threshold_stair], [1 + (y > 0), 3], 0)
+        
+        z_dominant = np.abs(x) <= np.abs(z)
+        facing = 2 * z_dominant + (np.where(z_dominant, z, x) > 0)
+        facing = np.where(np.hypot(x, z) > 0.01, facing, 2)
+        half = y <= 0
+    
+    stair = shape == 3
+    return (shape | stair * ((facing << 2) | (half << 4))).astype(np.uint8)
+
+
+def smooth_block_codes(
+    normals: np.ndarray,
+    base_ids: np.ndarray,
+    variant_count: int,
+    threshold_slab: float = 22.5,
+    threshold_stair: float = 67.5
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Smooth-block shape and variant of many voxels in one pass.
+    
+    State codes pack shape | facing << 2 | half << 4 with shape 0 full, 1 bottom
+    slab, 2 top slab, 3 stair; facing 0 west, 1 east, 2 north, 3 south; half
+    0 bottom, 1 top. Voxels that stay full keep their base id and code 0.
+    
+    Args:
+        normals: (N, 3) unit surface normals, NaN rows where there is no surface
+        base_ids: (N,) variant-table index of each voxel's block, -1 if it has no variants
+        variant_count: Number of base blocks in the variant table
+        threshold_slab: Angle from vertical (degrees) below which slabs are used
+        threshold_stair: Angle from vertical (degrees) below which stairs are used
+        
+    Returns:
+        ((N,) int32 block ids: base id, + variant_count for stairs, + 2 * variant_count
+        for slabs; (N,) uint8 state codes)
+    """
+    normals = np.ascontiguousarray(normals, dtype=np.float64).reshape(-1, 3)
+    base_ids = np.ascontiguousarray(base_ids, dtype=np.int32)
+    if HAS_NUMBA:
+        out_ids = np.empty(len(normals), dtype=np.int32)
+        out_codes = np.empty(len(normals), dtype=np.uint8)
+        _smooth_block_kernel(
+            normals, base_ids, variant_count, threshold_slab, threshold_stair, out_ids, out_codes
+        )
+        return out_ids, out_codes
+    
+    codes = block_state_codes(normals, threshold_slab, threshold_stair)
+    codes[base_ids < 0] = 0
+    shape = codes & 3
+    out_ids = base_ids.copy()
+    out_ids[shape == 3] += variant_count
+    out_ids[(shape == 1) | (shape == 2)] += 2 * variant_count
+    return out_ids, codes
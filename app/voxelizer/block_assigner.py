@@ -2,20 +2,54 @@
 Block Assigner - Match voxel colors to Minecraft blocks using atlas data
 """
 import json
+import logging
+import os
+import time
 import numpy as np
 from pathlib import Path
+from scipy.spatial import cKDTree
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from typing import Optional, Literal
 from .voxel_mesh import VoxelMesh, Voxel, FaceVisibility
-from .dithering import apply_dithering, bin_color
+from .dithering import apply_dithering_batch, bin_color, BAYER_4x4x4
+from ._kernels import HAS_NUMBA, nearest_palette
 from .smooth_block_placer import (
-    determine_block_shape,
-    get_smooth_block_name,
-    can_smooth_block,
-    BlockShape,
-    SmoothBlockInfo
+    classify_voxels,
+    smooth_block_strings,
+    SmoothBlockInfo,
+    SHAPE_NAMES
 )
 
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+logger = logging.getLogger(__name__)
+
+# RGB lookup tables: 8-bit colors are bucketed into LUT_SIZE^3 cells
+LUT_SIZE = 32
+_LUT_SHIFT = 3  # 256 // LUT_SIZE == 1 << _LUT_SHIFT
+_LUT_UNKNOWN = -2
+# Palettes at least this large are matched through a KD-tree in batch mode
+KDTREE_MIN_PALETTE = 32
+_CUBE_CORNERS = np.array(
+    [(dr, dg, db) for dr in (0, 1) for dg in (0, 1) for db in (0, 1)], dtype=np.intp
+)
+
+# Faces averaged for contextual matching, in averaging order
+CONTEXT_FACES = (
+    ('up', FaceVisibility.UP),
+    ('down', FaceVisibility.DOWN),
+    ('north', FaceVisibility.NORTH),
+    ('south', FaceVisibility.SOUTH),
+    ('east', FaceVisibility.EAST),
+    ('west', FaceVisibility.WEST),
+)
+_CONTEXT_FACE_BITS = np.array([int(bit) for _, bit in CONTEXT_FACES])
+
 
 @dataclass
 class BlockFace:
@@ -30,6 +64,15 @@ class AtlasBlock:
     name: str
     color: np.ndarray  # Global average RGBA [0, 1]
     faces: dict[str, BlockFace]  # up, down, north, south, east, west
+    face_colors: Optional[np.ndarray] = None  # (6, 4) RGBA per face, CONTEXT_FACES order
+    face_stds: Optional[np.ndarray] = None    # (6,) std per face, CONTEXT_FACES order
+    
+    def __post_init__(self):
+        # Stacked copies of the face data for mask-based averaging
+        if self.face_colors is None:
+            self.face_colors = np.stack([self.faces[face].color for face, _ in CONTEXT_FACES])
+        if self.face_stds is None:
+            self.face_stds = np.array([self.faces[face].std for face, _ in CONTEXT_FACES])
 
 
 @dataclass
@@ -46,6 +89,37 @@ class AssignedBlock:
         return f"{self.block_name}{self.block_state}"
 
 
+@dataclass
+class AssignedBlocks:
+    """
+    Column-wise batch of assigned blocks (row i is one voxel).
+    Indexing or iterating builds AssignedBlock objects on demand.
+    """
+    positions: np.ndarray       # (N, 3) int32
+    voxel_colors: np.ndarray    # (N, 4) float32 original RGBA [0, 1]
+    block_name_idx: np.ndarray  # (N,) int32 index into palette_names
+    palette_names: list[str]
+    
+    def __len__(self) -> int:
+        return len(self.block_name_idx)
+    
+    def __getitem__(self, i: int) -> AssignedBlock:
+        return AssignedBlock(
+            position=tuple(self.positions[i].tolist()),
+            voxel_color=self.voxel_colors[i],
+            block_name=self.palette_names[self.block_name_idx[i]]
+        )
+    
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+    
+    @property
+    def block_names(self) -> list[str]:
+        """Block name of every row"""
+        return [self.palette_names[k] for k in self.block_name_idx.tolist()]
+
+
 class BlockAtlas:
     """
     Manages the atlas of Minecraft block colors.
@@ -68,39 +142,45 @@ class BlockAtlas:
     
     def _load_atlas(self, atlas_path: str | Path) -> None:
         """Load atlas data from JSON file"""
-        with open(atlas_path, 'r') as f:
-            data = json.load(f)
+        with open(atlas_path, 'rb') as f:
+            raw = f.read()
+        data = orjson.loads(raw) if HAS_ORJSON else json.loads(raw)
+        blocks_data = data.get('blocks', [])
+        
+        # Colors for all blocks live in a few contiguous arrays; each
+        # AtlasBlock and BlockFace holds views into them
+        count = len(blocks_data)
+        all_colors = np.empty((count, 4), dtype=np.float32)
+        all_face_colors = np.empty((count, len(CONTEXT_FACES), 4), dtype=np.float32)
+        all_face_stds = np.zeros((count, len(CONTEXT_FACES)))
+        face_index = {face: k for k, (face, _) in enumerate(CONTEXT_FACES)}
         
-        for block_data in data.get('blocks', []):
+        for i, block_data in enumerate(blocks_data):
             name = block_data['name']
             
             # Parse global color
-            color = np.array([
-                block_data['colour']['r'],
-                block_data['colour']['g'],
-                block_data['colour']['b'],
-                block_data['colour']['a']
-            ], dtype=np.float32)
+            colour = block_data['colour']
+            all_colors[i] = (colour['r'], colour['g'], colour['b'], colour['a'])
             
-            # Parse face colors if available
-            faces = {}
-            if 'faceColours' in block_data:
-                for face_name, face_data in block_data['faceColours'].items():
-                    faces[face_name] = BlockFace(
-                        color=np.array([
-                            face_data['colour']['r'],
-                            face_data['colour']['g'],
-                            face_data['colour']['b'],
-                            face_data['colour']['a']
-                        ], dtype=np.float32),
-                        std=face_data.get('std', 0.0)
-                    )
-            else:
-                # Use global color for all faces if face colors not available
-                for face_name in ['up', 'down', 'north', 'south', 'east', 'west']:
-                    faces[face_name] = BlockFace(color=color.copy())
+            # Parse face colors if available, otherwise use the global color for all faces
+            all_face_colors[i] = all_colors[i]
+            for face_name, face_data in block_data.get('faceColours', {}).items():
+                k = face_index[face_name]
+                colour = face_data['colour']
+                all_face_colors[i, k] = (colour['r'], colour['g'], colour['b'], colour['a'])
+                all_face_stds[i, k] = face_data.get('std', 0.0)
             
-            self.blocks[name] = AtlasBlock(name=name, color=color, faces=faces)
+            faces = {
+                face_name: BlockFace(color=all_face_colors[i, k], std=float(all_face_stds[i, k]))
+                for face_name, k in face_index.items()
+            }
+            self.blocks[name] = AtlasBlock(
+                name=name,
+                color=all_colors[i],
+                faces=faces,
+                face_colors=all_face_colors[i],
+                face_stds=all_face_stds[i]
+            )
     
     def get_block(self, name: str) -> Optional[AtlasBlock]:
         """Get a block by name"""
@@ -165,8 +245,97 @@ class BlockAssigner:
         # Filter palette to only include blocks that exist in atlas
         self.palette = [b for b in self.palette if b in self.atlas.blocks]
         
+        # Palette as an (M, 3) matrix for vectorized matching (row i <-> palette[i])
+        self._palette_names = list(self.palette)
+        self._palette_rgb = np.ascontiguousarray(
+            [self.atlas.blocks[name].color[:3] for name in self._palette_names],
+            dtype=np.float32
+        ).reshape(-1, 3)
+        
+        # KD-tree over the distinct palette colors for batch matching. Tree row i
+        # maps back to _tree_rows[i], the first palette entry with that color,
+        # so duplicate colors resolve to the same block as an argmin would.
+        self._palette_tree = None
+        self._tree_rows = None
+        if len(self._palette_names) >= KDTREE_MIN_PALETTE:
+            _, first_rows = np.unique(self._palette_rgb, axis=0, return_index=True)
+            self._tree_rows = np.sort(first_rows)
+            self._palette_tree = cKDTree(self._palette_rgb[self._tree_rows])
+        
+        # Contextual colors for all 64 face-visibility masks: _ctx_rgb[mask] is
+        # the (M, 3) mean color of each block's visible faces, _ctx_std[mask]
+        # the mean face std (mask 0 = global color, std 0)
+        blocks = [self.atlas.blocks[name] for name in self._palette_names]
+        face_rgba = np.array(
+            [b.face_colors for b in blocks], dtype=np.float32
+        ).reshape(-1, len(CONTEXT_FACES), 4)
+        face_std = np.array(
+            [b.face_stds for b in blocks], dtype=np.float64
+        ).reshape(-1, len(CONTEXT_FACES))
+        
+        self._ctx_rgb = np.empty((64,) + self._palette_rgb.shape, dtype=np.float32)
+        self._ctx_std = np.zeros((64, len(blocks)))
+        self._ctx_rgb[0] = self._palette_rgb
+        for mask in range(1, 64):
+            visible = (mask & _CONTEXT_FACE_BITS) != 0
+            self._ctx_rgb[mask] = face_rgba[:, visible].mean(axis=1)[:, :3]
+            self._ctx_std[mask] = face_std[:, visible].mean(axis=1)
+        
         # Cache for color -> block lookups
         self._cache: dict[int, str] = {}
+        
+        # (mask, error_weight) -> (cell LUT, cell-corner labels), filled lazily
+        self._luts: dict[tuple[int, float], tuple[np.ndarray, np.ndarray]] = {}
+    
+    def _palette_errors(
+        self,
+        colors: np.ndarray,
+        mask: int,
+        error_weight: float
+    ) -> np.ndarray:
+        """Matching error of (K, 3) colors against every palette block -> (K, M)"""
+        d = self._ctx_rgb[mask][np.newaxis, :, :] - colors[:, np.newaxis, :3]
+        rgb_error = (d * d).sum(axis=2).astype(np.float64)
+        return rgb_error * (1 - error_weight) + self._ctx_std[mask] * error_weight
+    
+    def _lut_labels(
+        self,
+        cells: np.ndarray,
+        mask: int,
+        error_weight: float
+    ) -> np.ndarray:
+        """
+        Palette indices for (K, 3) LUT cells (8-bit color >> _LUT_SHIFT).
+        
+        A cell is resolved from the best blocks at its 8 corner colors: the
+        error is a (weighted) squared distance, so each block's region is
+        convex and a cell whose corners all agree lies entirely inside it.
+        Cells whose corners disagree get -1 and need an exact match.
+        """
+        key = (mask, error_weight)
+        if key not in self._luts:
+            self._luts[key] = (
+                np.full((LUT_SIZE,) * 3, _LUT_UNKNOWN, dtype=np.int16),
+                np.full((LUT_SIZE + 1,) * 3, -1, dtype=np.int16),
+            )
+        lut, corners = self._luts[key]
+        
+        labels = lut[tuple(cells.T)]
+        unknown = labels == _LUT_UNKNOWN
+        if unknown.any():
+            new_cells = np.unique(cells[unknown], axis=0)
+            corner_idx = (new_cells[:, np.newaxis, :] + _CUBE_CORNERS).reshape(-1, 3)
+            missing = corners[tuple(corner_idx.T)] < 0
+            if missing.any():
+                points = np.unique(corner_idx[missing], axis=0)
+                colors = (points << _LUT_SHIFT).astype(np.float32) / np.float32(255)
+                corners[tuple(points.T)] = self._palette_errors(colors, mask, error_weight).argmin(axis=1)
+            
+            corner_labels = corners[tuple(corner_idx.T)].reshape(-1, len(_CUBE_CORNERS))
+            agree = (corner_labels == corner_labels[:, :1]).all(axis=1)
+            lut[tuple(new_cells.T)] = np.where(agree, corner_labels[:, 0], -1)
+            labels = lut[tuple(cells.T)]
+        return labels
     
     def _color_distance_squared(self, c1: np.ndarray, c2: np.ndarray) -> float:
         """Calculate squared RGB distance between two colors"""
@@ -183,36 +352,15 @@ class BlockAssigner:
         Returns:
             Tuple of (average color, average std)
         """
-        if face_visibility == FaceVisibility.NONE:
-            return block.color, 0.0
-        
-        colors = []
-        stds = []
-        
-        if FaceVisibility.UP in face_visibility:
-            colors.append(block.faces['up'].color)
-            stds.append(block.faces['up'].std)
-        if FaceVisibility.DOWN in face_visibility:
-            colors.append(block.faces['down'].color)
-            stds.append(block.faces['down'].std)
-        if FaceVisibility.NORTH in face_visibility:
-            colors.append(block.faces['north'].color)
-            stds.append(block.faces['north'].std)
-        if FaceVisibility.SOUTH in face_visibility:
-            colors.append(block.faces['south'].color)
-            stds.append(block.faces['south'].std)
-        if FaceVisibility.EAST in face_visibility:
-            colors.append(block.faces['east'].color)
-            stds.append(block.faces['east'].std)
-        if FaceVisibility.WEST in face_visibility:
-            colors.append(block.faces['west'].color)
-            stds.append(block.faces['west'].std)
-        
-        if not colors:
+        # Visible faces as a boolean mask over CONTEXT_FACES
+        visible = (int(face_visibility) & _CONTEXT_FACE_BITS) != 0
+        count = int(visible.sum())
+        if count == 0:
             return block.color, 0.0
         
-        avg_color = np.mean(colors, axis=0)
-        avg_std = np.mean(stds)
+        # Plain sum/divide: np.mean's overhead dominates on at most 6 rows
+        avg_color = block.face_colors[visible].sum(axis=0) / np.float32(count)
+        avg_std = float(block.face_stds[visible].sum()) / count
         
         return avg_color, avg_std
     
@@ -235,34 +383,29 @@ class BlockAssigner:
         Returns:
             Block name that best matches the color
         """
-        # Create cache key from color (quantize to reduce cache size)
+        if not self._palette_names:
+            return None
+        
+        # Visible-face colors of every palette block are precomputed per mask
+        mask = int(face_visibility) if use_contextual else 0
         color_255 = (color[:3] * 255).astype(int)
+        
+        # RGB LUT for in-range colors (cells are only convex for 0 <= weight <= 1)
+        if 0.0 <= error_weight <= 1.0 and (color_255 >= 0).all() and (color_255 <= 255).all():
+            label = int(self._lut_labels((color_255 >> _LUT_SHIFT)[np.newaxis], mask, error_weight)[0])
+            if label >= 0:
+                return self._palette_names[label]
+        
+        # Create cache key from color (quantize to reduce cache size)
         cache_key = (color_255[0] << 16) | (color_255[1] << 8) | color_255[2]
         cache_key = (cache_key << 6) | int(face_visibility)
         
         if cache_key in self._cache:
             return self._cache[cache_key]
         
-        # Find best matching block
-        best_block = None
-        best_error = float('inf')
-        
-        for block_name in self.palette:
-            block = self.atlas.blocks[block_name]
-            
-            if use_contextual and face_visibility != FaceVisibility.NONE:
-                block_color, block_std = self._get_contextual_color(block, face_visibility)
-            else:
-                block_color = block.color
-                block_std = 0.0
-            
-            # Calculate error (RGB distance + optional std weighting)
-            rgb_error = self._color_distance_squared(color, block_color)
-            total_error = rgb_error * (1 - error_weight) + block_std * error_weight
-            
-            if total_error < best_error:
-                best_error = total_error
-                best_block = block_name
+        # Calculate error (RGB distance + optional std weighting)
+        total_error = self._palette_errors(np.asarray(color)[np.newaxis], mask, error_weight)[0]
+        best_block = self._palette_names[int(np.argmin(total_error))]
         
         self._cache[cache_key] = best_block
         return best_block
@@ -297,44 +440,53 @@ class BlockAssigner:
         voxels = voxel_mesh.get_all_voxels()
         results = []
         
+        # Face visibility of every voxel from one occupancy grid
+        visibilities = None
+        if use_contextual and voxels:
+            visibilities = voxel_mesh.compute_all_face_visibility().tolist()
+        
+        # Dither all voxel colors in one pass
+        dithered_colors = None
+        if dithering != 'off' and voxels:
+            dithered_colors = apply_dithering_batch(
+                voxel_mesh.colors,
+                voxel_mesh.positions,
+                dithering,
+                dithering_magnitude
+            )
+        
+        block_names = []
         for i, voxel in enumerate(voxels):
             # Get face visibility for contextual averaging
             # Apply dithering if requested
-            color = voxel.color.copy()
-            if dithering != 'off':
-                color = apply_dithering(
-                    color, 
-                    voxel.position, 
-                    dithering, 
-                    dithering_magnitude
-                )
+            color = dithered_colors[i] if dithered_colors is not None else voxel.color.copy()
             
             # Find best matching block
             if use_contextual:
-                # Calculate face visibility for contextual matching
-                visibility = voxel_mesh.get_face_visibility(voxel.position)
+                # Face visibility for contextual matching
+                visibility = FaceVisibility(visibilities[i])
             else:
                 visibility = FaceVisibility.NONE
             
-            block_name = self.find_best_block(
+            block_names.append(self.find_best_block(
                 color, 
                 visibility, 
                 use_contextual,
                 error_weight
-            )
-            
-            block_state = ""
-            shape = "full"
-            
-            # Smooth block logic
-            if enable_smooth_blocks and voxel.normal is not None:
-                smooth_info = determine_block_shape(voxel.normal)
-                
-                if smooth_info.shape != BlockShape.FULL and can_smooth_block(block_name):
-                    new_name, block_state = get_smooth_block_name(block_name, smooth_info)
-                    block_name = new_name
-                    shape = smooth_info.shape.name.lower()
+            ))
             
+            if progress_callback and i % 1000 == 0:
+                progress_callback(i / len(voxels))
+        
+        # Smooth block logic: classify every voxel's stored normal in one pass
+        if enable_smooth_blocks and voxels:
+            block_ids, state_codes = classify_voxels(voxel_mesh.normals, block_names)
+            final_names, block_states = smooth_block_strings(block_ids, state_codes, block_names)
+            shapes = [SHAPE_NAMES[code & 3] for code in state_codes.tolist()]
+        else:
+            final_names, block_states, shapes = block_names, [""] * len(voxels), ["full"] * len(voxels)
+        
+        for voxel, block_name, block_state, shape in zip(voxels, final_names, block_states, shapes):
             results.append(AssignedBlock(
                 position=voxel.position,
                 voxel_color=voxel.color,
@@ -342,10 +494,7 @@ class BlockAssigner:
                 block_state=block_state,
                 shape=shape
             ))
-            
-            if progress_callback and i % 1000 == 0:
-                progress_callback(i / len(voxels))
-                
+        
         if progress_callback:
             progress_callback(1.0)
             
@@ -355,31 +504,40 @@ class BlockAssigner:
         self,
         voxels: list[Voxel],
         dithering: str,
-        dithering_magnitude: float
-    ) -> list[AssignedBlock]:
+        dithering_magnitude: float,
+        progress_callback: Optional[callable] = None
+    ) -> AssignedBlocks:
         """
         Fast block assignment using numpy broadcasting.
         Ignores face visibility context for performance.
+        
+        Returns:
+            AssignedBlocks holding the results as arrays
         """
+        palette_names = list(self.palette)
         if not voxels:
-            return []
-            
-        import time
-        t0 = time.time()
-        print(f"[BlockAssigner] Batch processing started for {len(voxels)} voxels...")
+            return AssignedBlocks(
+                positions=np.empty((0, 3), dtype=np.int32),
+                voxel_colors=np.empty((0, 4), dtype=np.float32),
+                block_name_idx=np.empty(0, dtype=np.int32),
+                palette_names=palette_names
+            )
+        
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            t0 = time.perf_counter()
             
         # Prepare palette
-        palette_names = self.palette
         # (M, 3)
-        palette_colors = np.array([self.atlas.blocks[name].color[:3] for name in palette_names])
-        print(f"[BlockAssigner] Palette prepared: {len(palette_names)} blocks")
+        palette_colors = self._palette_rgb
         
         # Prepare voxels
-        # (N, 3)
-        print(f"[BlockAssigner] Converting {len(voxels)} voxels to numpy array...")
-        voxel_colors = np.array([v.color[:3] for v in voxels])
-        positions = np.array([v.position for v in voxels])
-        print(f"[BlockAssigner] Voxel arrays prepared in {time.time() - t0:.2f}s")
+        # (N, 4)
+        # float32 colors and int32 positions keep the chunk working set small
+        voxel_colors = np.ascontiguousarray([v.color for v in voxels], dtype=np.float32).reshape(-1, 4)
+        positions = np.array([v.position for v in voxels], dtype=np.int32)
+        if debug:
+            logger.debug("Voxel arrays for %d voxels prepared in %.2fs", len(voxels), time.perf_counter() - t0)
         
         # Apply dithering (vectorized-ish manual loop for now to be safe, or skip)
         # Implementing simple ordered dithering vectorized is possible but complex.
@@ -387,39 +545,58 @@ class BlockAssigner:
         
         # For speed, let's process in chunks
         chunk_size = 10000
-        results = []
+        block_name_idx = np.empty(len(voxels), dtype=np.int32)
         
-        for i in range(0, len(voxels), chunk_size):
+        def process(i: int) -> np.ndarray:
             # Extract chunk
-            v_colors = voxel_colors[i:i+chunk_size].copy() # (B, 3)
+            v_colors = voxel_colors[i:i+chunk_size, :3].copy() # (B, 3)
             v_pos = positions[i:i+chunk_size] # (B, 3)
             
             # Apply dithering (Simplified for performance)
             if dithering == 'random':
                 noise = (np.random.random(v_colors.shape) - 0.5) * (dithering_magnitude / 255.0)
-                v_colors = np.clip(v_colors + noise, 0, 1)
+                v_colors = np.clip(v_colors + noise.astype(np.float32), 0, 1)
             elif dithering == 'ordered':
                 # Simplified ordered dithering based on position sum
-                # Bayer-like pattern based on (x+y+z)%something
-                factors = ((v_pos[:, 0] + v_pos[:, 1] + v_pos[:, 2]) % 4) / 4.0 - 0.5
-                noise = factors[:, np.newaxis] * (dithering_magnitude / 255.0)
+                # Bayer-like pattern based on (x+y+z)%4, gathered from a LUT
+                idx = np.mod(v_pos, 4)
+                factors = BAYER_4x4x4[idx[:, 0], idx[:, 1], idx[:, 2]]
+                noise = factors[:, np.newaxis] * np.float32(dithering_magnitude / 255.0)
                 v_colors = np.clip(v_colors + noise, 0, 1)
             
-            # Find closest colors
-            # (B, 1, 3) - (1, M, 3) -> (B, M, 3) 
-            diff = v_colors[:, np.newaxis, :] - palette_colors[np.newaxis, :, :]
-            dists = np.sum(diff**2, axis=2) # (B, M)
-            best_indices = np.argmin(dists, axis=1) # (B,)
-            
-            # Create AssignedBlock objects
-            for j, idx in enumerate(best_indices):
-                # Map back to global index
-                orig_idx = i + j
-                results.append(AssignedBlock(
-                    position=tuple(v_pos[j]),
-                    voxel_color=voxel_colors[orig_idx], # Original color
-                    block_name=palette_names[idx]
-                ))
-        
-        print(f"[BlockAssigner] Batch assignment finished in {time.time() - t0:.2f}s")
-        return results
+            # Find closest colors: KD-tree for large palettes, otherwise a
+            # linear scan (compiled when numba is available)
+            if self._palette_tree is not None:
+                _, tree_indices = self._palette_tree.query(v_colors, k=1, workers=tree_workers)
+                return self._tree_rows[tree_indices] # (B,)
+            return nearest_palette(v_colors, palette_colors) # (B,)
+        
+        # Chunks are independent and the NumPy/SciPy calls release the GIL, so
+        # they overlap well on threads. The numba kernel is already parallel
+        # and its threading layer must not be entered concurrently; run its
+        # chunks serially.
+        starts = range(0, len(voxels), chunk_size)
+        if self._palette_tree is None and HAS_NUMBA:
+            workers = 1
+        else:
+            workers = min(len(starts), os.cpu_count() or 1)
+        tree_workers = -1 if workers == 1 else 1
+        
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for i, best_indices in zip(starts, pool.map(process, starts)):
+                block_name_idx[i:i+chunk_size] = best_indices
+                
+                if progress_callback:
+                    progress_callback(min(i + chunk_size, len(voxels)) / len(voxels))
+        
+        if debug:
+            logger.debug(
+                "Batch assignment of %d voxels against %d blocks finished in %.2fs",
+                len(voxels), len(palette_names), time.perf_counter() - t0
+            )
+        return AssignedBlocks(
+            positions=positions,
+            voxel_colors=voxel_colors,
+            block_name_idx=block_name_idx,
+            palette_names=palette_names
+        )
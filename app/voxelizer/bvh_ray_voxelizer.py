@@ -1,12 +1,27 @@
 """
 BVH Ray Voxelizer - Convert 3D meshes to voxels using ray casting
 Based on ObjToSchematic's BVHRayVoxeliser algorithm with texture sampling support
+
+Ray casting uses Embree (via the optional `embreex` package) when it is
+installed, and falls back to trimesh's pure-Python intersector otherwise.
 """
+import logging
+import time
 import numpy as np
 import trimesh
 from typing import Optional
-from .mesh_loader import MeshData, load_mesh, scale_mesh_to_size, normalize_mesh_position
+
+try:
+    from trimesh.ray.ray_pyembree import RayMeshIntersector
+    HAS_EMBREE = True
+except ImportError:
+    HAS_EMBREE = False
+
+from .mesh_loader import MeshData, load_mesh, prepare_mesh
 from .voxel_mesh import VoxelMesh
+from ._kernels import barycentric_weights
+
+logger = logging.getLogger(__name__)
 
 
 def voxelize_mesh(
@@ -31,35 +46,19 @@ def voxelize_mesh(
     Returns:
         VoxelMesh containing all voxels
     """
-    # Scale mesh to target size
-    scaled_mesh, scale = scale_mesh_to_size(mesh, target_size, constraint_axis)
-    
-    # Add offset for even sizes (matching ObjToSchematic behavior)
-    axis_index = {'x': 0, 'y': 1, 'z': 2}[constraint_axis.lower()]
-    offset = np.zeros(3)
-    if target_size % 2 == 0:
-        offset[axis_index] = 0.5
-    
-    # Apply offset
-    vertices = scaled_mesh.vertices + offset
-    
-    # Normalize position to positive quadrant (like legacy voxelizer)
-    if normalize_position:
-        min_bound = vertices.min(axis=0)
-        vertices = vertices - min_bound
-    
-    # Create a new MeshData with transformed vertices
-    transformed_mesh = MeshData(
-        vertices=vertices,
-        faces=scaled_mesh.faces,
-        vertex_colors=scaled_mesh.vertex_colors,
-        uv_coords=scaled_mesh.uv_coords,
-        texture_image=scaled_mesh.texture_image,
-        face_colors=scaled_mesh.face_colors
-    )
+    # Scale (and normalize) the mesh in one pass over the vertices
+    transformed_mesh, scale = prepare_mesh(mesh, target_size, constraint_axis, normalize_position)
+    vertices = transformed_mesh.vertices
+    
+    # Add offset for even sizes (matching ObjToSchematic behavior); normalizing
+    # to the positive quadrant would cancel it again, so only unnormalized meshes need it
+    if not normalize_position and target_size % 2 == 0:
+        axis_index = {'x': 0, 'y': 1, 'z': 2}[constraint_axis.lower()]
+        vertices[:, axis_index] += 0.5
     
     # Create trimesh for ray intersection
     tri_mesh = trimesh.Trimesh(vertices=vertices, faces=transformed_mesh.faces)
+    intersector = RayMeshIntersector(tri_mesh) if HAS_EMBREE else tri_mesh.ray
     
     # Get bounds for ray generation
     bounds_min = vertices.min(axis=0)
@@ -75,60 +74,29 @@ def voxelize_mesh(
     # --- Batch Ray Casting ---
     # Instead of casting one ray at a time, we generate all rays for an axis
     # and cast them in a single batch. This drastically reduces Python overhead.
+    # Rays whose grid cell lies outside every triangle's bounding box are dropped
+    # before casting.
+    triangles = vertices[transformed_mesh.faces]
+    tri_min = triangles.min(axis=1)
+    tri_max = triangles.max(axis=1)
     
     # X-axis rays
-    ys = np.arange(bounds_min[1], bounds_max[1] + 1)
-    zs = np.arange(bounds_min[2], bounds_max[2] + 1)
-    yy, zz = np.meshgrid(ys, zs)
-    ray_count = yy.size
-    
-    origins = np.zeros((ray_count, 3))
-    origins[:, 0] = bounds_min[0] - 1
-    origins[:, 1] = yy.flatten()
-    origins[:, 2] = zz.flatten()
-    
-    directions = np.zeros((ray_count, 3))
-    directions[:, 0] = 1
-    
-    _cast_rays_batch(tri_mesh, origins, directions, transformed_mesh, voxel_mesh)
+    origins, directions = _axis_rays(bounds_min, bounds_max, 0, tri_min, tri_max)
+    _cast_rays_batch(intersector, origins, directions, transformed_mesh, voxel_mesh)
     
     if progress_callback:
         progress_callback(0.33)
 
     # Y-axis rays
-    xs = np.arange(bounds_min[0], bounds_max[0] + 1)
-    zs = np.arange(bounds_min[2], bounds_max[2] + 1)
-    xx, zz = np.meshgrid(xs, zs)
-    ray_count = xx.size
-    
-    origins = np.zeros((ray_count, 3))
-    origins[:, 0] = xx.flatten()
-    origins[:, 1] = bounds_min[1] - 1
-    origins[:, 2] = zz.flatten()
-    
-    directions = np.zeros((ray_count, 3))
-    directions[:, 1] = 1
-    
-    _cast_rays_batch(tri_mesh, origins, directions, transformed_mesh, voxel_mesh)
+    origins, directions = _axis_rays(bounds_min, bounds_max, 1, tri_min, tri_max)
+    _cast_rays_batch(intersector, origins, directions, transformed_mesh, voxel_mesh)
     
     if progress_callback:
         progress_callback(0.66)
 
     # Z-axis rays
-    xs = np.arange(bounds_min[0], bounds_max[0] + 1)
-    ys = np.arange(bounds_min[1], bounds_max[1] + 1)
-    xx, yy = np.meshgrid(xs, ys)
-    ray_count = xx.size
-    
-    origins = np.zeros((ray_count, 3))
-    origins[:, 0] = xx.flatten()
-    origins[:, 1] = yy.flatten()
-    origins[:, 2] = bounds_min[2] - 1
-    
-    directions = np.zeros((ray_count, 3))
-    directions[:, 2] = 1
-    
-    _cast_rays_batch(tri_mesh, origins, directions, transformed_mesh, voxel_mesh)
+    origins, directions = _axis_rays(bounds_min, bounds_max, 2, tri_min, tri_max)
+    _cast_rays_batch(intersector, origins, directions, transformed_mesh, voxel_mesh)
     
     if progress_callback:
         progress_callback(1.0)
@@ -136,6 +104,80 @@ def voxelize_mesh(
     return voxel_mesh
 
 
+def _axis_rays(
+    bounds_min: np.ndarray,
+    bounds_max: np.ndarray,
+    axis: int,
+    tri_min: Optional[np.ndarray] = None,
+    tri_max: Optional[np.ndarray] = None
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Build one ray per integer grid cell of the plane perpendicular to `axis`,
+    starting just below the bounds and pointing along +axis.
+    
+    If per-triangle bounds are given, cells not covered by any triangle's
+    projected bounding box are skipped, since their rays cannot hit the mesh.
+    
+    Returns:
+        (origins, directions) as (N, 3) float32; directions is a broadcast view
+    """
+    u, v = (i for i in range(3) if i != axis)
+    # Rows follow v and columns follow u (the same order as np.meshgrid(us, vs))
+    grid = np.mgrid[bounds_min[v]:bounds_max[v] + 1, bounds_min[u]:bounds_max[u] + 1]
+    if tri_min is not None and tri_max is not None:
+        occupied = _occupied_cells(bounds_min[[v, u]], grid.shape[1:], tri_min[:, [v, u]], tri_max[:, [v, u]])
+        grid = grid[:, occupied]
+    else:
+        grid = grid.reshape(2, -1)
+    ray_count = grid.shape[1]
+    
+    origins = np.empty((ray_count, 3), dtype=np.float32)
+    origins[:, axis] = bounds_min[axis] - 1
+    origins[:, u] = grid[1]
+    origins[:, v] = grid[0]
+    
+    direction = np.zeros(3, dtype=np.float32)
+    direction[axis] = 1
+    return origins, np.broadcast_to(direction, (ray_count, 3))
+
+
+def _occupied_cells(
+    grid_min: np.ndarray,
+    grid_shape: tuple[int, int],
+    tri_min: np.ndarray,
+    tri_max: np.ndarray,
+    eps: float = 1e-6
+) -> np.ndarray:
+    """
+    Mark the integer grid points covered by at least one triangle's 2D bounding box.
+    
+    Args:
+        grid_min: (2,) integer coordinates of grid point [0, 0]
+        grid_shape: (rows, cols) of the grid
+        tri_min, tri_max: (T, 2) per-triangle bounds in the same axis order
+        eps: Tolerance so points on a box edge stay covered
+        
+    Returns:
+        (rows, cols) bool mask
+    """
+    # Inclusive integer cell ranges per triangle, clipped to the grid
+    lo = np.ceil(tri_min - eps).astype(np.intp) - grid_min
+    hi = np.floor(tri_max + eps).astype(np.intp) - grid_min
+    lo = np.maximum(lo, 0)
+    hi = np.minimum(hi, np.array(grid_shape) - 1)
+    keep = np.all(lo <= hi, axis=1)
+    lo, hi = lo[keep], hi[keep]
+    
+    # Stamp every rectangle into a 2D difference array, then integrate
+    diff = np.zeros((grid_shape[0] + 1, grid_shape[1] + 1), dtype=np.int32)
+    np.add.at(diff, (lo[:, 0], lo[:, 1]), 1)
+    np.add.at(diff, (lo[:, 0], hi[:, 1] + 1), -1)
+    np.add.at(diff, (hi[:, 0] + 1, lo[:, 1]), -1)
+    np.add.at(diff, (hi[:, 0] + 1, hi[:, 1] + 1), 1)
+    coverage = diff.cumsum(axis=0).cumsum(axis=1)
+    return coverage[:grid_shape[0], :grid_shape[1]] > 0
+
+
 def _count_rays(bounds_min: np.ndarray, bounds_max: np.ndarray) -> int:
     """Count the total number of rays to be cast"""
     dims = bounds_max - bounds_min + 1
@@ -144,7 +186,7 @@ def _count_rays(bounds_min: np.ndarray, bounds_max: np.ndarray) -> int:
 
 
 def _cast_rays_batch(
-    tri_mesh: trimesh.Trimesh,
+    intersector,
     origins: np.ndarray,
     directions: np.ndarray,
     mesh_data: MeshData,
@@ -152,133 +194,107 @@ def _cast_rays_batch(
 ) -> None:
     """
     Cast a batch of rays and add voxels at intersection points with proper color sampling.
+    
+    `intersector` is an Embree RayMeshIntersector or the mesh's default `tri_mesh.ray`.
     """
     if len(origins) == 0:
         return
 
-    import time
-    t0 = time.time()
+    debug = logger.isEnabledFor(logging.DEBUG)
+    if debug:
+        t0 = time.perf_counter()
     
-    # Use trimesh ray casting (batch processing)
-    locations, index_ray, index_tri = tri_mesh.ray.intersects_location(
+    # Batch ray casting, keeping every hit along each ray
+    locations, index_ray, index_tri = intersector.intersects_location(
         ray_origins=origins,
-        ray_directions=directions
+        ray_directions=directions,
+        multiple_hits=True
     )
     
-    t1 = time.time()
     num_hits = len(locations)
-    print(f"[DEBUG] Ray cast finished: {num_hits} hits from {len(origins)} rays in {t1 - t0:.4f}s")
+    if debug:
+        t1 = time.perf_counter()
+        logger.debug("Ray cast finished: %d hits from %d rays in %.4fs", num_hits, len(origins), t1 - t0)
     
     if num_hits == 0:
         return
 
-    # Process hits
-    print(f"[DEBUG] Processing {num_hits} hits...")
+    # Get colors for all hits using texture or vertex colors
+    colors = _get_voxel_colors(mesh_data, index_tri, locations)
     
-    for i, location in enumerate(locations):
-        tri_index = index_tri[i]
-        
-        # Get color for this voxel using texture or vertex colors
-        color = _get_voxel_color(mesh_data, tri_index, location)
-        
-        # Add voxel at the intersection point (no normal calculation for performance)
-        voxel_mesh.add_voxel(location, color)
-        
-        if i % 10000 == 0 and i > 0:
-            print(f"[DEBUG] Processed {i}/{num_hits} hits ({i/num_hits*100:.1f}%)")
-            
-    t2 = time.time()
-    print(f"[DEBUG] Hit processing finished in {t2 - t1:.4f}s")
+    # Add voxels at the intersection points (no normal calculation for performance)
+    voxel_mesh.add_voxels(locations, colors)
+    
+    if debug:
+        logger.debug("Hit processing finished in %.4fs", time.perf_counter() - t1)
 
 
-def _get_triangle_normal(
-    mesh_data: MeshData,
-    triangle_index: int,
+def _get_triangle_normals(
+    tri_mesh: trimesh.Trimesh,
+    triangle_indices: np.ndarray,
     ray_direction: np.ndarray
 ) -> np.ndarray:
     """
-    Calculate the surface normal for a triangle.
-    Ensures the normal faces towards the ray origin (outward).
-    """
-    face = mesh_data.faces[triangle_index]
-    v0, v1, v2 = mesh_data.vertices[face]
-    
-    # Calculate face normal using cross product
-    edge1 = v1 - v0
-    edge2 = v2 - v0
-    normal = np.cross(edge1, edge2)
+    Surface normals for the hit triangles, one per hit.
+    Uses trimesh's cached face normals and flips them to face the ray origin (outward).
     
-    # Normalize
-    norm_magnitude = np.linalg.norm(normal)
-    if norm_magnitude < 1e-10:
-        return np.array([0.0, 1.0, 0.0], dtype=np.float32)  # Default up
-    
-    normal = normal / norm_magnitude
+    Returns:
+        (N, 3) unit normals as float32; degenerate triangles get the default up
+    """
+    normals = tri_mesh.face_normals[triangle_indices]
     
-    # Make sure normal faces outward (opposite to ray direction)
-    if np.dot(normal, ray_direction) > 0:
-        normal = -normal
+    # Make sure normals face outward (opposite to ray direction)
+    facing = (normals * ray_direction).sum(axis=1)
+    normals = normals * np.where(facing > 0, -1.0, 1.0)[:, np.newaxis]
     
-    return normal.astype(np.float32)
+    # trimesh reports zero normals for degenerate faces
+    normals[~normals.any(axis=1)] = (0.0, 1.0, 0.0)  # Default up
+    return normals.astype(np.float32)
 
 
-def _get_voxel_color(
+def _get_voxel_colors(
     mesh_data: MeshData,
-    triangle_index: int,
-    position: np.ndarray
+    triangle_indices: np.ndarray,
+    positions: np.ndarray
 ) -> np.ndarray:
     """
-    Get the color for a voxel at the given position.
+    Get the colors for voxels at the given hit positions, one per hit.
     Uses texture sampling with UV coordinates if available,
     otherwise falls back to vertex colors or face colors.
+    
+    Returns:
+        (N, 4) RGBA colors as float32 [0, 1]
     """
     # Get triangle vertices
-    face = mesh_data.faces[triangle_index]
-    v0, v1, v2 = mesh_data.vertices[face]
+    faces = mesh_data.faces[triangle_indices]  # (N, 3)
+    v0, v1, v2 = (mesh_data.vertices[faces[:, k]] for k in range(3))
     
     # Calculate barycentric coordinates using area-based method
-    def triangle_area(a, b, c):
-        ab = b - a
-        ac = c - a
-        return 0.5 * np.linalg.norm(np.cross(ab, ac))
-    
-    total_area = triangle_area(v0, v1, v2)
-    if total_area < 1e-10:
-        return np.array([0.5, 0.5, 0.5, 1.0], dtype=np.float32)
+    weights, degenerate = barycentric_weights(v0, v1, v2, positions)
+    w0, w1, w2 = (weights[:, k:k + 1] for k in range(3))
     
-    w0 = triangle_area(v1, v2, position) / total_area
-    w1 = triangle_area(v2, v0, position) / total_area
-    w2 = triangle_area(v0, v1, position) / total_area
+    # Fallback: Gray color
+    colors = np.tile(np.array([0.5, 0.5, 0.5, 1.0], dtype=np.float32), (len(faces), 1))
     
-    # Priority 1: Texture sampling with UV coordinates
     if mesh_data.has_texture() and mesh_data.uv_coords is not None:
-        uv0 = mesh_data.uv_coords[face[0]]
-        uv1 = mesh_data.uv_coords[face[1]]
-        uv2 = mesh_data.uv_coords[face[2]]
-        
-        # Interpolate UV coordinates using barycentric weights
-        uv = uv0 * w0 + uv1 * w1 + uv2 * w2
-        
-        # Sample texture at interpolated UV
-        color = mesh_data.sample_texture(uv)
-        return color
-    
-    # Priority 2: Vertex colors
-    if mesh_data.vertex_colors is not None:
-        c0 = mesh_data.vertex_colors[face[0]]
-        c1 = mesh_data.vertex_colors[face[1]]
-        c2 = mesh_data.vertex_colors[face[2]]
-        
-        # Interpolate vertex colors
-        color = c0 * w0 + c1 * w1 + c2 * w2
-        return np.clip(color, 0.0, 1.0).astype(np.float32)
-    
-    # Priority 3: Face colors
-    if mesh_data.face_colors is not None and triangle_index < len(mesh_data.face_colors):
-        return mesh_data.face_colors[triangle_index].astype(np.float32)
-    
-    # Fallback: Gray color
-    return np.array([0.5, 0.5, 0.5, 1.0], dtype=np.float32)
+        # Priority 1: Texture sampling with UV coordinates
+        uv_coords = mesh_data.uv_coords
+        uv = uv_coords[faces[:, 0]] * w0 + uv_coords[faces[:, 1]] * w1 + uv_coords[faces[:, 2]] * w2
+        colors = mesh_data.sample_texture_batch(uv)
+    elif mesh_data.vertex_colors is not None:
+        # Priority 2: Vertex colors
+        vertex_colors = mesh_data.vertex_colors
+        color = (vertex_colors[faces[:, 0]] * w0 + vertex_colors[faces[:, 1]] * w1
+                 + vertex_colors[faces[:, 2]] * w2)
+        colors = np.clip(color, 0.0, 1.0).astype(np.float32)
+    elif mesh_data.face_colors is not None:
+        # Priority 3: Face colors
+        in_range = triangle_indices < len(mesh_data.face_colors)
+        colors[in_range] = mesh_data.face_colors[triangle_indices[in_range]]
+    
+    # Degenerate triangles keep the gray fallback
+    colors[degenerate] = (0.5, 0.5, 0.5, 1.0)
+    return colors
 
 
 def voxelize_file(
@@ -2,7 +2,8 @@
 Dithering - Ordered and random dithering for color quantization
 """
 import numpy as np
-from typing import Literal
+from functools import lru_cache
+from typing import Literal, Optional
 
 
 # Bayer matrix for ordered dithering (8x8)
@@ -17,11 +18,97 @@ BAYER_MATRIX_8x8 = np.array([
     [63, 31, 55, 23, 61, 29, 53, 21]
 ], dtype=np.float32) / 64.0 - 0.5  # Normalize to [-0.5, 0.5)
 
+DEFAULT_MAGNITUDE = 32.0
+
+
+@lru_cache(maxsize=8)
+def _bayer_scaled(magnitude: float) -> np.ndarray:
+    """Bayer thresholds pre-multiplied by `magnitude` (float32, read-only: shared via the cache)"""
+    scaled = BAYER_MATRIX_8x8 * np.float32(magnitude)
+    scaled.setflags(write=False)
+    return scaled
+
+
+@lru_cache(maxsize=8)
+def _bayer_scaled_int16(magnitude: float) -> np.ndarray:
+    """Bayer thresholds pre-multiplied by `magnitude`, rounded for fixed-point uint8 colors (read-only)"""
+    scaled = np.round(BAYER_MATRIX_8x8 * magnitude).astype(np.int16)
+    scaled.setflags(write=False)
+    return scaled
+
+
+# Fixed-point thresholds for uint8 colors at the default magnitude
+BAYER_INT16 = _bayer_scaled_int16(DEFAULT_MAGNITUDE)
+
+# Position-based 4x4x4 threshold volume for batch ordered dithering:
+# ((x + y + z) % 4) / 4 - 0.5, indexed by position % 4
+BAYER_4x4x4 = ((np.indices((4, 4, 4)).sum(axis=0) % 4) / 4.0 - 0.5).astype(np.float32)
+
+# Shared generator for random dithering when no seed is given
+rng = np.random.default_rng()
+
+
+def _dither_buffer(colors: np.ndarray, out: Optional[np.ndarray]) -> np.ndarray:
+    """`colors` copied into `out`, or into a new float buffer when `out` is None"""
+    if out is None:
+        return np.array(colors, dtype=np.result_type(colors, np.float32))
+    if out is not colors:
+        np.copyto(out, colors)
+    return out
+
+
+def apply_ordered_dithering_batch(
+    colors: np.ndarray,
+    positions: np.ndarray,
+    magnitude: float = DEFAULT_MAGNITUDE,
+    out: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Apply ordered dithering to many colors at once.
+    
+    uint8 colors stay in fixed point: thresholds are rounded to int16, added
+    in an int16 buffer and the result is returned as uint8.
+    
+    Args:
+        colors: (N, 4) RGBA colors as float or uint8 array [0, 255]
+        positions: (N, 3) integer voxel positions
+        magnitude: Dithering strength (default 32)
+        out: Optional (N, 4) buffer to write the result into (may be `colors`)
+        
+    Returns:
+        (N, 4) dithered colors as RGBA [0, 255] (uint8 for uint8 input)
+    """
+    colors = np.asarray(colors)
+    positions = np.asarray(positions)
+    
+    # Use position to index into Bayer matrix
+    bayer_x = (positions[:, 0] + positions[:, 2]) & 7
+    bayer_y = positions[:, 1] & 7
+    
+    if colors.dtype == np.uint8:
+        dithered = colors.astype(np.int16)
+        dithered[:, :3] += _bayer_scaled_int16(magnitude)[bayer_y, bayer_x][:, np.newaxis]
+        np.clip(dithered, 0, 255, out=dithered)
+        if out is None:
+            return dithered.astype(np.uint8)
+        out[...] = dithered
+        return out
+    
+    threshold = _bayer_scaled(magnitude)[bayer_y, bayer_x]
+    
+    # Apply dithering to RGB channels
+    dithered = _dither_buffer(colors, out)
+    dithered[:, :3] += threshold[:, np.newaxis]
+    
+    # Clamp to valid range
+    return np.clip(dithered, 0, 255, out=dithered)
+
 
 def apply_ordered_dithering(
     color: np.ndarray,
     position: tuple[int, int, int],
-    magnitude: float = 32.0
+    magnitude: float = DEFAULT_MAGNITUDE,
+    out: Optional[np.ndarray] = None
 ) -> np.ndarray:
     """
     Apply ordered dithering to a color based on position.
@@ -30,28 +117,67 @@ def apply_ordered_dithering(
         color: RGBA color as float array [0, 255]
         position: (x, y, z) voxel position
         magnitude: Dithering strength (default 32)
+        out: Optional (4,) buffer to write the result into (may be `color`)
         
     Returns:
         Dithered color as RGBA [0, 255]
     """
+    color = np.asarray(color)
+    if color.dtype == np.uint8:
+        result = apply_ordered_dithering_batch(color[np.newaxis], np.asarray([position]), magnitude)[0]
+        if out is None:
+            return result
+        out[...] = result
+        return out
+    
     x, y, z = position
     
     # Use position to index into Bayer matrix
-    bayer_x = (x + z) % 8
-    bayer_y = y % 8
-    threshold = BAYER_MATRIX_8x8[bayer_y, bayer_x]
+    threshold = _bayer_scaled(magnitude)[y & 7, (x + z) & 7]
     
     # Apply dithering to RGB channels
-    dithered = color.copy()
-    dithered[:3] = dithered[:3] + threshold * magnitude
+    dithered = _dither_buffer(color, out)
+    dithered[:3] += threshold
+    
+    # Clamp to valid range
+    return np.clip(dithered, 0, 255, out=dithered)
+
+
+def apply_random_dithering_batch(
+    colors: np.ndarray,
+    magnitude: float = DEFAULT_MAGNITUDE,
+    seed: Optional[int] = None,
+    out: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Apply random dithering to many colors at once.
+    
+    Args:
+        colors: (N, 4) RGBA colors as float array [0, 255]
+        magnitude: Dithering strength (default 32)
+        seed: Seed for a dedicated generator, or None to use the module generator
+        out: Optional (N, 4) buffer to write the result into (may be `colors`)
+        
+    Returns:
+        (N, 4) dithered colors as RGBA [0, 255]
+    """
+    generator = rng if seed is None else np.random.default_rng(seed)
+    
+    # Random offset for RGB channels
+    offsets = generator.random((len(colors), 3), dtype=np.float32) - np.float32(0.5)
+    offsets *= np.float32(magnitude)
+    
+    dithered = _dither_buffer(colors, out)
+    dithered[:, :3] += offsets
     
     # Clamp to valid range
-    return np.clip(dithered, 0, 255)
+    return np.clip(dithered, 0, 255, out=dithered)
 
 
 def apply_random_dithering(
     color: np.ndarray,
-    magnitude: float = 32.0
+    magnitude: float = DEFAULT_MAGNITUDE,
+    out: Optional[np.ndarray] = None
 ) -> np.ndarray:
     """
     Apply random dithering to a color.
@@ -59,18 +185,38 @@ def apply_random_dithering(
     Args:
         color: RGBA color as float array [0, 255]
         magnitude: Dithering strength (default 32)
+        out: Optional (4,) buffer to write the result into (may be `color`)
         
     Returns:
         Dithered color as RGBA [0, 255]
     """
     # Random offset for RGB channels
-    offset = (np.random.random(3) - 0.5) * magnitude
+    offsets = rng.random(3, dtype=np.float32) - np.float32(0.5)
+    offsets *= np.float32(magnitude)
     
-    dithered = color.copy()
-    dithered[:3] = dithered[:3] + offset
+    dithered = _dither_buffer(np.asarray(color), out)
+    dithered[:3] += offsets
     
     # Clamp to valid range
-    return np.clip(dithered, 0, 255)
+    return np.clip(dithered, 0, 255, out=dithered)
+
+
+def bin_colors(colors: np.ndarray, resolution: int = 32) -> np.ndarray:
+    """
+    Bin many colors at once to reduce precision (color quantization).
+    
+    Args:
+        colors: (N, 4) RGBA colors as float array [0, 1]
+        resolution: Number of bins per channel (default 32)
+        
+    Returns:
+        (N, 4) binned colors as RGBA [0, 1]
+    """
+    # Convert to [0, resolution] range, floor, and convert back, all in one buffer
+    binned = np.multiply(colors, resolution, dtype=np.result_type(colors, np.float32))
+    np.floor(binned, out=binned)
+    binned *= 1.0 / resolution
+    return np.clip(binned, 0.0, 1.0, out=binned)
 
 
 def bin_color(color: np.ndarray, resolution: int = 32) -> np.ndarray:
@@ -84,16 +230,65 @@ def bin_color(color: np.ndarray, resolution: int = 32) -> np.ndarray:
     Returns:
         Binned color as RGBA [0, 1]
     """
-    # Convert to [0, resolution] range, floor, and convert back
-    binned = np.floor(color * resolution) / resolution
-    return np.clip(binned, 0.0, 1.0)
+    return bin_colors(np.asarray(color)[np.newaxis], resolution)[0]
+
+
+def quantize_colors(colors: np.ndarray, resolution: int = 32) -> np.ndarray:
+    """
+    Quantize colors to integer bin codes (the bins of bin_colors).
+    
+    Args:
+        colors: (N, C) colors as float array [0, 1]
+        resolution: Number of bins per channel, at most 255
+        
+    Returns:
+        (N, C) uint8 codes in [0, resolution]
+    """
+    codes = np.multiply(colors, resolution, dtype=np.float32)
+    np.floor(codes, out=codes)
+    np.clip(codes, 0, resolution, out=codes)
+    return codes.astype(np.uint8)
+
+
+def dequantize_colors(codes: np.ndarray, resolution: int = 32) -> np.ndarray:
+    """
+    Convert bin codes from quantize_colors back to float colors [0, 1].
+    
+    Args:
+        codes: (N, C) uint8 codes
+        resolution: Number of bins per channel used to quantize
+        
+    Returns:
+        (N, C) float32 colors
+    """
+    return codes.astype(np.float32) * np.float32(1.0 / resolution)
+
+
+def _no_dithering(colors: np.ndarray, positions, magnitude: float) -> np.ndarray:
+    """Dithering handler for 'off' (and unknown types): an unchanged copy"""
+    return np.array(colors)
+
+
+# Dithering type -> handler(color, position, magnitude)
+DITHER_HANDLERS = {
+    'off': _no_dithering,
+    'ordered': apply_ordered_dithering,
+    'random': lambda color, _position, magnitude: apply_random_dithering(color, magnitude),
+}
+
+# Dithering type -> handler(colors, positions, magnitude, seed)
+BATCH_DITHER_HANDLERS = {
+    'off': lambda colors, positions, magnitude, _seed: _no_dithering(colors, positions, magnitude),
+    'ordered': lambda colors, positions, magnitude, _seed: apply_ordered_dithering_batch(colors, positions, magnitude),
+    'random': lambda colors, _positions, magnitude, seed: apply_random_dithering_batch(colors, magnitude, seed),
+}
 
 
 def apply_dithering(
     color_255: np.ndarray,
     position: tuple[int, int, int],
     dithering_type: Literal['off', 'ordered', 'random'] = 'ordered',
-    magnitude: float = 32.0
+    magnitude: float = DEFAULT_MAGNITUDE
 ) -> np.ndarray:
     """
     Apply dithering to a color.
@@ -107,11 +302,29 @@ def apply_dithering(
     Returns:
         Dithered color as RGBA [0, 255]
     """
-    if dithering_type == 'off':
-        return color_255.copy()
-    elif dithering_type == 'ordered':
-        return apply_ordered_dithering(color_255, position, magnitude)
-    elif dithering_type == 'random':
-        return apply_random_dithering(color_255, magnitude)
-    else:
-        return color_255.copy()
+    handler = DITHER_HANDLERS.get(dithering_type, _no_dithering)
+    return handler(color_255, position, magnitude)
+
+
+def apply_dithering_batch(
+    colors_255: np.ndarray,
+    positions: np.ndarray,
+    dithering_type: Literal['off', 'ordered', 'random'] = 'ordered',
+    magnitude: float = DEFAULT_MAGNITUDE,
+    seed: Optional[int] = None
+) -> np.ndarray:
+    """
+    Apply dithering to many colors at once.
+    
+    Args:
+        colors_255: (N, 4) RGBA colors as [0, 255]
+        positions: (N, 3) voxel positions (used for ordered dithering)
+        dithering_type: Type of dithering to apply
+        magnitude: Dithering strength
+        seed: Optional seed for random dithering
+        
+    Returns:
+        (N, 4) dithered colors as RGBA [0, 255]
+    """
+    handler = BATCH_DITHER_HANDLERS.get(dithering_type, BATCH_DITHER_HANDLERS['off'])
+    return handler(colors_255, positions, magnitude, seed)
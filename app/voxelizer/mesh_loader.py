@@ -18,6 +18,9 @@ class MeshData:
     uv_coords: Optional[np.ndarray] = None      # (N, 2) float array for UV
     texture_image: Optional[Image.Image] = None  # PIL Image for texture
     face_colors: Optional[np.ndarray] = None    # (M, 4) float array for face colors
+    # Pixel array of texture_image, built on first sample
+    _texture_pixels: Optional[np.ndarray] = field(default=None, init=False, repr=False, compare=False)
+    _texture_source: Optional[Image.Image] = field(default=None, init=False, repr=False, compare=False)
     
     @property
     def bounds(self) -> tuple[np.ndarray, np.ndarray]:
@@ -44,38 +47,44 @@ class MeshData:
         Returns:
             RGBA color as float array [0, 1]
         """
-        if not self.has_texture():
-            return np.array([1.0, 1.0, 1.0, 1.0], dtype=np.float32)
+        return self.sample_texture_batch(np.asarray(uv, dtype=np.float64)[np.newaxis, :2])[0]
+    
+    def _get_texture_pixels(self) -> np.ndarray:
+        """(H, W, 4) contiguous RGBA uint8 pixels of the texture, cached until texture_image changes"""
+        if self._texture_pixels is None or self._texture_source is not self.texture_image:
+            image = self.texture_image
+            if image.mode != 'RGBA':
+                image = image.convert('RGBA')
+            self._texture_pixels = np.ascontiguousarray(np.asarray(image), dtype=np.uint8)
+            self._texture_source = self.texture_image
+        return self._texture_pixels
+
+    def sample_texture_batch(self, uvs: np.ndarray) -> np.ndarray:
+        """
+        Sample texture colors at many UV coordinates at once.
+        Same nearest-pixel lookup as sample_texture.
         
-        # Get texture dimensions
-        width, height = self.texture_image.size
+        Args:
+            uvs: (N, 2) UV coordinates
+            
+        Returns:
+            (N, 4) RGBA colors as float array [0, 1]
+        """
+        if not self.has_texture():
+            return np.ones((len(uvs), 4), dtype=np.float32)
         
-        # Convert UV to pixel coordinates
-        # UV origin is typically bottom-left, image origin is top-left
-        u, v = uv[0], uv[1]
+        pixels = self._get_texture_pixels()
+        height, width = pixels.shape[:2]
         
         # Wrap UVs to [0, 1] range
-        u = u % 1.0
-        v = v % 1.0
+        u = uvs[:, 0] % 1.0
+        v = uvs[:, 1] % 1.0
         
-        # Convert to pixel coordinates
-        x = int(u * (width - 1))
-        y = int((1 - v) * (height - 1))  # Flip V for image coordinates
+        # Convert to pixel coordinates (flip V for image coordinates), clamped
+        x = np.clip((u * (width - 1)).astype(np.int64), 0, width - 1)
+        y = np.clip(((1 - v) * (height - 1)).astype(np.int64), 0, height - 1)
         
-        # Clamp to valid range
-        x = max(0, min(width - 1, x))
-        y = max(0, min(height - 1, y))
-        
-        # Sample pixel
-        pixel = self.texture_image.getpixel((x, y))
-        
-        # Convert to RGBA float
-        if len(pixel) == 4:
-            return np.array(pixel, dtype=np.float32) / 255.0
-        elif len(pixel) == 3:
-            return np.array([pixel[0], pixel[1], pixel[2], 255], dtype=np.float32) / 255.0
-        else:
-            return np.array([pixel[0], pixel[0], pixel[0], 255], dtype=np.float32) / 255.0
+        return pixels[y, x].astype(np.float32) * np.float32(1 / 255.0)
 
 
 def load_mesh(file_path: str | Path) -> MeshData:
@@ -128,7 +137,7 @@ def load_mesh(file_path: str | Path) -> MeshData:
         if isinstance(visual, trimesh.visual.TextureVisuals):
             # Extract UV coordinates
             if hasattr(visual, 'uv') and visual.uv is not None:
-                uv_coords = np.array(visual.uv, dtype=np.float32)
+                uv_coords = np.ascontiguousarray(visual.uv, dtype=np.float32)
             
             # Extract texture image
             if hasattr(visual, 'material') and visual.material is not None:
@@ -138,21 +147,26 @@ def load_mesh(file_path: str | Path) -> MeshData:
                     texture_image = mat.baseColorTexture
                 elif hasattr(mat, 'image') and mat.image is not None:
                     texture_image = mat.image
+                
+                # Normalize to RGBA once so sampling never branches on format
+                if texture_image is not None and texture_image.mode != 'RGBA':
+                    texture_image = texture_image.convert('RGBA')
         
         # Check for ColorVisuals (vertex/face colors)
         elif isinstance(visual, trimesh.visual.ColorVisuals):
             if hasattr(visual, 'vertex_colors') and visual.vertex_colors is not None:
-                vertex_colors = visual.vertex_colors.astype(np.float32) / 255.0
+                vertex_colors = np.divide(visual.vertex_colors, 255.0, dtype=np.float32)
             if hasattr(visual, 'face_colors') and visual.face_colors is not None:
-                face_colors = visual.face_colors.astype(np.float32) / 255.0
+                face_colors = np.divide(visual.face_colors, 255.0, dtype=np.float32)
         
         # Also try direct attribute access
         if vertex_colors is None and hasattr(visual, 'vertex_colors') and visual.vertex_colors is not None:
-            vertex_colors = visual.vertex_colors.astype(np.float32) / 255.0
+            vertex_colors = np.divide(visual.vertex_colors, 255.0, dtype=np.float32)
     
     return MeshData(
-        vertices=np.array(mesh.vertices, dtype=np.float32),
-        faces=np.array(mesh.faces, dtype=np.int32),
+        # ascontiguousarray only copies when the dtype or layout differs
+        vertices=np.ascontiguousarray(mesh.vertices, dtype=np.float32),
+        faces=np.ascontiguousarray(mesh.faces, dtype=np.int32),
         vertex_colors=vertex_colors,
         uv_coords=uv_coords,
         texture_image=texture_image,
@@ -160,7 +174,12 @@ def load_mesh(file_path: str | Path) -> MeshData:
     )
 
 
-def scale_mesh_to_size(mesh: MeshData, target_size: int, constraint_axis: str = 'y') -> tuple[MeshData, float]:
+def scale_mesh_to_size(
+    mesh: MeshData,
+    target_size: int,
+    constraint_axis: str = 'y',
+    inplace: bool = False
+) -> tuple[MeshData, float]:
     """
     Scale mesh so that the constraint axis has the target size.
     
@@ -168,6 +187,7 @@ def scale_mesh_to_size(mesh: MeshData, target_size: int, constraint_axis: str =
         mesh: Input mesh data
         target_size: Desired size along the constraint axis
         constraint_axis: Which axis to constrain ('x', 'y', or 'z')
+        inplace: If True, scale mesh.vertices in place and return `mesh` itself
         
     Returns:
         Tuple of (scaled MeshData, scale factor)
@@ -179,6 +199,9 @@ def scale_mesh_to_size(mesh: MeshData, target_size: int, constraint_axis: str =
     scale = (target_size - 1) / dimensions[axis_index]
     
     # Scale vertices
+    if inplace:
+        mesh.vertices *= scale
+        return mesh, scale
     scaled_vertices = mesh.vertices * scale
     
     return MeshData(
@@ -191,18 +214,22 @@ def scale_mesh_to_size(mesh: MeshData, target_size: int, constraint_axis: str =
     ), scale
 
 
-def normalize_mesh_position(mesh: MeshData) -> MeshData:
+def normalize_mesh_position(mesh: MeshData, inplace: bool = False) -> MeshData:
     """
     Move mesh so all coordinates are positive (like legacy voxelizer).
     Translates the mesh so its minimum bound is at origin.
     
     Args:
         mesh: Input mesh data
+        inplace: If True, shift mesh.vertices in place and return `mesh` itself
         
     Returns:
         MeshData with normalized positions
     """
     min_bound = mesh.vertices.min(axis=0)
+    if inplace:
+        mesh.vertices -= min_bound
+        return mesh
     normalized_vertices = mesh.vertices - min_bound
     
     return MeshData(
@@ -213,3 +240,45 @@ def normalize_mesh_position(mesh: MeshData) -> MeshData:
         texture_image=mesh.texture_image,
         face_colors=mesh.face_colors
     )
+
+
+def prepare_mesh(
+    mesh: MeshData,
+    target_size: int,
+    constraint_axis: str = 'y',
+    normalize_position: bool = True
+) -> tuple[MeshData, float]:
+    """
+    Scale and (optionally) normalize a mesh in a single pass over its vertices.
+    Equivalent to scale_mesh_to_size followed by normalize_mesh_position.
+    
+    Args:
+        mesh: Input mesh data
+        target_size: Desired size along the constraint axis
+        constraint_axis: Which axis to constrain ('x', 'y', or 'z')
+        normalize_position: If True, translate the minimum bound to the origin
+        
+    Returns:
+        Tuple of (transformed MeshData with float64 vertices, scale factor)
+    """
+    axis_index = {'x': 0, 'y': 1, 'z': 2}[constraint_axis.lower()]
+    min_bound = mesh.vertices.min(axis=0)
+    max_bound = mesh.vertices.max(axis=0)
+    scale = (target_size - 1) / float(max_bound[axis_index] - min_bound[axis_index])
+    
+    # (v - min) * scale, written into one output buffer
+    vertices = np.empty(mesh.vertices.shape, dtype=np.float64)
+    if normalize_position:
+        np.subtract(mesh.vertices, min_bound, out=vertices)
+        vertices *= scale
+    else:
+        np.multiply(mesh.vertices, scale, out=vertices)
+    
+    return MeshData(
+        vertices=vertices,
+        faces=mesh.faces,
+        vertex_colors=mesh.vertex_colors,
+        uv_coords=mesh.uv_coords,
+        texture_image=mesh.texture_image,
+        face_colors=mesh.face_colors
+    ), scale
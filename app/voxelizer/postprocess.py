@@ -1,238 +1,290 @@
 """
 Postprocessing - Quality improvement for voxelized blocks
 """
-from collections import Counter
+from dataclasses import dataclass
 from typing import Optional
 
+import numpy as np
+from scipy import ndimage, sparse
+from scipy.sparse import csgraph
+
+from ._kernels import denoise_grid
+
+
+@dataclass
+class BlockArray:
+    """
+    Column-wise form of a block list [{'x': int, 'y': int, 'z': int, 'type': str}, ...]
+    (row i is one block). The postprocess functions accept and return either form.
+    """
+    positions: np.ndarray  # (N, 3) int64
+    type_ids: np.ndarray   # (N,) int32 index into palette
+    palette: list[str]
+    
+    @classmethod
+    def from_dicts(cls, blocks: list[dict]) -> "BlockArray":
+        """Convert a block dict list, keeping block order (types numbered by first appearance)"""
+        palette = list(dict.fromkeys(b['type'] for b in blocks))
+        type_to_id = {name: i for i, name in enumerate(palette)}
+        return cls(
+            positions=np.array([(b['x'], b['y'], b['z']) for b in blocks], dtype=np.int64).reshape(-1, 3),
+            type_ids=np.fromiter((type_to_id[b['type']] for b in blocks), dtype=np.int32, count=len(blocks)),
+            palette=palette
+        )
+    
+    def to_dicts(self) -> list[dict]:
+        """Convert back to a block dict list"""
+        palette = self.palette
+        return [
+            {'x': x, 'y': y, 'z': z, 'type': palette[t]}
+            for (x, y, z), t in zip(self.positions.tolist(), self.type_ids.tolist())
+        ]
+    
+    def __len__(self) -> int:
+        return len(self.type_ids)
+    
+    def palette_colors(self, block_colors: dict[str, tuple[float, float, float]]) -> np.ndarray:
+        """(K, 3) RGB per palette entry (gray for unknown types); index with type_ids"""
+        return np.array(
+            [block_colors.get(name, (0.5, 0.5, 0.5))[:3] for name in self.palette], dtype=np.float64
+        ).reshape(-1, 3)
+    
+    def take(self, index: np.ndarray) -> "BlockArray":
+        """Rows selected by an index or boolean mask, sharing the palette"""
+        return BlockArray(self.positions[index], self.type_ids[index], self.palette)
+
+
+def _as_block_array(blocks: list[dict] | BlockArray) -> BlockArray:
+    return blocks if isinstance(blocks, BlockArray) else BlockArray.from_dicts(blocks)
+
+
+def _like_input(result: BlockArray, blocks: list[dict] | BlockArray) -> list[dict] | BlockArray:
+    """Return `result` in the same form (BlockArray or dict list) as `blocks`"""
+    return result if isinstance(blocks, BlockArray) else result.to_dicts()
+
 
 def denoise_blocks(
-    blocks: list[dict],
+    blocks: list[dict] | BlockArray,
     radius: int = 1,
     threshold: int = 3,
     iterations: int = 1
-) -> list[dict]:
+) -> list[dict] | BlockArray:
     """
     Remove noise by replacing isolated blocks with the majority block type in their neighborhood.
     
     Args:
-        blocks: List of blocks [{'x': int, 'y': int, 'z': int, 'type': str}, ...]
+        blocks: List of blocks [{'x': int, 'y': int, 'z': int, 'type': str}, ...] or a BlockArray
         radius: Search radius (1 = 3x3x3 = 26 neighbors)
         threshold: If fewer than this many neighbors share the same type, replace
         iterations: Number of passes to run (more = smoother, but may lose detail)
         
     Returns:
-        Denoised block list
+        Denoised blocks, in the same form as `blocks`
     """
-    if not blocks:
+    if not len(blocks):
         return blocks
     
-    # Create position -> block mapping for O(1) lookup
-    pos_to_block = {(b['x'], b['y'], b['z']): b for b in blocks}
-    pos_to_type = {(b['x'], b['y'], b['z']): b['type'] for b in blocks}
+    array = _as_block_array(blocks)
+    
+    # One block per position (last entry wins, first-seen order kept)
+    coords = array.positions - array.positions.min(axis=0) + radius
+    shape = tuple(coords.max(axis=0) + radius + 1)
+    cells = np.ravel_multi_index(tuple(coords.T), shape)
+    _, first = np.unique(cells, return_index=True)
+    _, last_reversed = np.unique(cells[::-1], return_index=True)
+    by_first = np.argsort(first)
+    first = first[by_first]
+    coords = coords[first]
+    labels = array.type_ids[len(cells) - 1 - last_reversed[by_first]]
     
-    result = list(blocks)  # Copy
+    # Dense label grid padded by `radius` so neighbor lookups stay in bounds
+    grid = np.full(shape, -1, dtype=np.int32)
+    grid[tuple(coords.T)] = labels
+    
+    # Only blocks within `radius` of a change can get a different result on the
+    # next pass; every block starts dirty
+    dirty = np.arange(len(coords))
+    neighborhood = np.ones((2 * radius + 1,) * 3, dtype=bool)
     
     for iteration in range(iterations):
-        changes = 0
-        new_types = {}
-        
-        for pos, block_type in pos_to_type.items():
-            x, y, z = pos
-            
-            # Count neighbor types
-            neighbor_types = []
-            for dx in range(-radius, radius + 1):
-                for dy in range(-radius, radius + 1):
-                    for dz in range(-radius, radius + 1):
-                        if dx == 0 and dy == 0 and dz == 0:
-                            continue  # Skip self
-                        
-                        neighbor_pos = (x + dx, y + dy, z + dz)
-                        if neighbor_pos in pos_to_type:
-                            neighbor_types.append(pos_to_type[neighbor_pos])
-            
-            if not neighbor_types:
-                continue  # No neighbors, keep as is
-            
-            # Count same-type neighbors
-            same_type_count = sum(1 for t in neighbor_types if t == block_type)
-            
-            # If isolated (too few same-type neighbors), replace with majority
-            if same_type_count < threshold:
-                type_counts = Counter(neighbor_types)
-                majority_type = type_counts.most_common(1)[0][0]
-                
-                if majority_type != block_type:
-                    new_types[pos] = majority_type
-                    changes += 1
+        new_labels = denoise_grid(grid, coords[dirty], radius, threshold)
+        changed = new_labels != labels[dirty]
+        if not changed.any():
+            break  # No more changes needed
         
         # Apply changes
-        for pos, new_type in new_types.items():
-            pos_to_type[pos] = new_type
+        changed_index = dirty[changed]
+        labels[changed_index] = new_labels[changed]
+        grid[tuple(coords[changed_index].T)] = labels[changed_index]
         
-        if changes == 0:
-            break  # No more changes needed
-    
-    # Build result
-    result = []
-    for pos, block_type in pos_to_type.items():
-        result.append({
-            'x': pos[0],
-            'y': pos[1],
-            'z': pos[2],
-            'type': block_type
-        })
-    
-    return result
+        # Next pass revisits the neighborhoods of changed blocks
+        if iteration + 1 < iterations:
+            changed_grid = np.zeros(shape, dtype=bool)
+            changed_grid[tuple(coords[changed_index].T)] = True
+            changed_grid = ndimage.binary_dilation(changed_grid, structure=neighborhood)
+            dirty = np.flatnonzero(changed_grid[tuple(coords.T)])
+    
+    result = BlockArray(array.positions[first], labels.astype(np.int32), array.palette)
+    return _like_input(result, blocks)
 
 
 def remove_isolated_blocks(
-    blocks: list[dict],
+    blocks: list[dict] | BlockArray,
     radius: int = 1,
     min_neighbors: int = 3
-) -> list[dict]:
+) -> list[dict] | BlockArray:
     """
     Remove spatially isolated blocks (noise/outliers) that have too few neighbors.
     
     Args:
-        blocks: List of blocks [{'x': int, 'y': int, 'z': int, 'type': str}, ...]
+        blocks: List of blocks [{'x': int, 'y': int, 'z': int, 'type': str}, ...] or a BlockArray
         radius: Search radius for counting neighbors (1 = 3x3x3 = 26 possible neighbors)
         min_neighbors: Minimum number of neighbors required to keep a block
         
     Returns:
-        Filtered block list with isolated blocks removed
+        Blocks with isolated blocks removed, in the same form as `blocks`
     """
-    if not blocks:
+    if not len(blocks):
         return blocks
     
-    # Create position set for O(1) lookup
-    positions = {(b['x'], b['y'], b['z']) for b in blocks}
+    array = _as_block_array(blocks)
     
-    result = []
-    removed_count = 0
+    # Occupancy grid over the block bounds
+    coords = array.positions - array.positions.min(axis=0)
+    occupancy = np.zeros(tuple(coords.max(axis=0) + 1), dtype=np.int32)
+    occupancy[tuple(coords.T)] = 1
     
-    for b in blocks:
-        x, y, z = b['x'], b['y'], b['z']
-        
-        # Count neighbors
-        neighbor_count = 0
-        for dx in range(-radius, radius + 1):
-            for dy in range(-radius, radius + 1):
-                for dz in range(-radius, radius + 1):
-                    if dx == 0 and dy == 0 and dz == 0:
-                        continue  # Skip self
-                    
-                    if (x + dx, y + dy, z + dz) in positions:
-                        neighbor_count += 1
-        
-        # Keep only if has enough neighbors
-        if neighbor_count >= min_neighbors:
-            result.append(b)
-        else:
-            removed_count += 1
+    # Count occupied neighbors of every cell with one 3D convolution
+    size = 2 * radius + 1
+    kernel = np.ones((size, size, size), dtype=np.int32)
+    kernel[radius, radius, radius] = 0  # Skip self
+    neighbor_counts = ndimage.convolve(occupancy, kernel, mode='constant', cval=0)
+    
+    # Keep only if has enough neighbors
+    keep = neighbor_counts[tuple(coords.T)] >= min_neighbors
+    removed_count = len(array) - int(np.count_nonzero(keep))
     
     if removed_count > 0:
         print(f"[Postprocess] Removed {removed_count} isolated blocks (min_neighbors={min_neighbors})")
     
-    return result
+    return _like_input(array.take(keep), blocks)
 
 
 def segment_by_clustering(
-    blocks: list[dict],
+    blocks: list[dict] | BlockArray,
     block_colors: dict[str, tuple[float, float, float]],
     eps: float = 3.0,
     min_samples: int = 5,
     coord_weight: float = 1.0,
     color_weight: float = 10.0
-) -> list[dict]:
+) -> list[dict] | BlockArray:
     """
-    Segment blocks using DBSCAN clustering based on position and color.
+    Segment blocks into connected clusters of similar color on the voxel grid.
     Each cluster's blocks are unified to the most common block type in that cluster.
     
+    Blocks of one type that touch (26-connectivity) form a component; touching
+    components of different types are merged when their colors are within
+    `eps / color_weight` of each other (RGB distance).
+    
     Args:
-        blocks: List of blocks [{'x': int, 'y': int, 'z': int, 'type': str}, ...]
+        blocks: List of blocks [{'x': int, 'y': int, 'z': int, 'type': str}, ...] or a BlockArray
         block_colors: Dict mapping block name to RGB color (0-1 range)
-        eps: DBSCAN epsilon (maximum distance between samples in a cluster)
-        min_samples: Minimum samples required to form a cluster
-        coord_weight: Weight for spatial coordinates in feature vector
-        color_weight: Weight for color in feature vector
+        eps: Maximum weighted color distance between merged components
+        min_samples: Minimum blocks in a cluster; smaller clusters keep their types
+        coord_weight: Unused; kept for compatibility with the DBSCAN version
+        color_weight: Weight for color distance (higher = stricter merging)
         
     Returns:
-        Segmented block list with unified block types per cluster
+        Segmented blocks with unified block types per cluster, in the same form as `blocks`
     """
-    import numpy as np
-    from sklearn.cluster import DBSCAN
-    from sklearn.preprocessing import StandardScaler
-    
     if len(blocks) < min_samples:
         return blocks
     
-    print(f"[Segmentation] Starting DBSCAN clustering on {len(blocks)} blocks...")
+    print(f"[Segmentation] Starting grid clustering on {len(blocks)} blocks...")
     
-    # Build feature vectors: [x, y, z, r, g, b]
-    features = []
-    for b in blocks:
-        block_type = b['type']
-        # Get color for this block type, default to gray
-        color = block_colors.get(block_type, (0.5, 0.5, 0.5))
-        
-        features.append([
-            b['x'] * coord_weight,
-            b['y'] * coord_weight,
-            b['z'] * coord_weight,
-            color[0] * color_weight,
-            color[1] * color_weight,
-            color[2] * color_weight,
-        ])
+    array = _as_block_array(blocks)
+    type_ids = array.type_ids.astype(np.int64)
+    type_colors = array.palette_colors(block_colors)
     
-    features = np.array(features)
+    labels = _label_color_clusters(array.positions, type_ids, type_colors, eps / color_weight)
     
-    # Normalize features
-    scaler = StandardScaler()
-    features_scaled = scaler.fit_transform(features)
+    # Clusters smaller than min_samples are noise
+    sizes = np.bincount(labels)
+    noise = sizes[labels] < min_samples
+    n_clusters = int(np.count_nonzero(sizes >= min_samples))
+    print(f"[Segmentation] Found {n_clusters} clusters, {int(noise.sum())} noise points")
     
-    # Run DBSCAN
-    print(f"[Segmentation] Running DBSCAN (eps={eps}, min_samples={min_samples})...")
-    db = DBSCAN(eps=eps, min_samples=min_samples, n_jobs=-1)
-    labels = db.fit_predict(features_scaled)
+    # Most common type per cluster (ties go to the type seen first)
+    type_count = len(array.palette)
+    type_counts = np.bincount(labels * type_count + type_ids, minlength=len(sizes) * type_count)
+    dominant = type_counts.reshape(len(sizes), type_count).argmax(axis=1)
     
-    n_clusters = len(set(labels)) - (1 if -1 in labels else 0)
-    n_noise = list(labels).count(-1)
-    print(f"[Segmentation] Found {n_clusters} clusters, {n_noise} noise points")
+    # Unify all clustered blocks to their dominant type; noise keeps its original type
+    new_type_ids = np.where(noise, type_ids, dominant[labels]).astype(np.int32)
     
-    # For each cluster, find the most common block type and unify
-    result = []
-    cluster_types = {}
+    print(f"[Segmentation] Segmentation complete. Clusters: {n_clusters}")
     
-    for cluster_id in set(labels):
-        if cluster_id == -1:
-            continue  # Skip noise points for now
-        
-        # Get blocks in this cluster
-        cluster_blocks = [blocks[i] for i in range(len(blocks)) if labels[i] == cluster_id]
-        
-        # Find most common type
-        type_counts = Counter(b['type'] for b in cluster_blocks)
-        dominant_type = type_counts.most_common(1)[0][0]
-        cluster_types[cluster_id] = dominant_type
+    return _like_input(BlockArray(array.positions, new_type_ids, array.palette), blocks)
+
+
+def _label_color_clusters(
+    positions: np.ndarray,
+    type_ids: np.ndarray,
+    type_colors: np.ndarray,
+    max_color_distance: float
+) -> np.ndarray:
+    """
+    Cluster id of every block: 26-connected same-type components, merged with
+    touching components whose type colors are within `max_color_distance`.
+    
+    Args:
+        positions: (N, 3) integer block positions
+        type_ids: (N,) type index of each block
+        type_colors: (T, 3) RGB color of each type
+        max_color_distance: Largest RGB distance at which touching components merge
         
-        # Unify all blocks to dominant type
-        for b in cluster_blocks:
-            result.append({
-                'x': b['x'],
-                'y': b['y'],
-                'z': b['z'],
-                'type': dominant_type
-            })
-    
-    # Handle noise points (-1 label) - keep their original type
-    for i, b in enumerate(blocks):
-        if labels[i] == -1:
-            result.append(b.copy())
-    
-    print(f"[Segmentation] Segmentation complete. Clusters: {len(cluster_types)}")
-    
-    return result
+    Returns:
+        (N,) int cluster ids in [0, number of clusters)
+    """
+    coords = positions - positions.min(axis=0)
+    shape = tuple(coords.max(axis=0) + 1)
+    structure = np.ones((3, 3, 3), dtype=bool)
+    
+    # Same-type components, numbered globally
+    component = np.empty(len(positions), dtype=np.int64)
+    component_type = []
+    for t in np.unique(type_ids).tolist():
+        members = type_ids == t
+        occupancy = np.zeros(shape, dtype=bool)
+        occupancy[tuple(coords[members].T)] = True
+        grid, count = ndimage.label(occupancy, structure=structure)
+        component[members] = grid[tuple(coords[members].T)] - 1 + len(component_type)
+        component_type.extend([t] * count)
+    component_type = np.array(component_type, dtype=np.int64)
+    
+    # Touching pairs of different components, from the 13 forward neighbor offsets
+    grid = np.full(shape, -1, dtype=np.int64)
+    grid[tuple(coords.T)] = component
+    pairs = []
+    for offset in np.argwhere(structure) - 1:
+        if tuple(offset) <= (0, 0, 0):
+            continue
+        src = tuple(slice(max(0, -d), n - max(0, d)) for d, n in zip(offset, shape))
+        dst = tuple(slice(max(0, d), n - max(0, -d)) for d, n in zip(offset, shape))
+        a, b = grid[src].ravel(), grid[dst].ravel()
+        touching = (a >= 0) & (b >= 0) & (a != b)
+        pairs.append(np.stack([a[touching], b[touching]], axis=1))
+    pairs = np.unique(np.concatenate(pairs), axis=0)
+    
+    # Merge touching components with similar colors
+    color_gap = np.linalg.norm(
+        type_colors[component_type[pairs[:, 0]]] - type_colors[component_type[pairs[:, 1]]], axis=1
+    )
+    pairs = pairs[color_gap <= max_color_distance]
+    n = len(component_type)
+    adjacency = sparse.coo_matrix((np.ones(len(pairs), dtype=bool), (pairs[:, 0], pairs[:, 1])), shape=(n, n))
+    _, merged = csgraph.connected_components(adjacency, directed=False)
+    return merged[component]
 
 
 def get_block_colors_from_atlas(atlas_path: str = None) -> dict[str, tuple[float, float, float]]:
@@ -267,153 +319,150 @@ def get_block_colors_from_atlas(atlas_path: str = None) -> dict[str, tuple[float
 
 
 def fill_cluster_holes(
-    blocks: list[dict],
+    blocks: list[dict] | BlockArray,
     block_colors: dict[str, tuple[float, float, float]],
     eps: float = 0.7,
     min_samples: int = 5
-) -> list[dict]:
+) -> list[dict] | BlockArray:
     """
     Segment blocks into clusters and fill holes within each cluster.
     A "hole" is an empty voxel surrounded by cluster blocks on the same Y layer.
     
     Args:
-        blocks: List of blocks [{'x': int, 'y': int, 'z': int, 'type': str}, ...]
+        blocks: List of blocks [{'x': int, 'y': int, 'z': int, 'type': str}, ...] or a BlockArray
         block_colors: Dict mapping block name to RGB color
         eps: DBSCAN epsilon
         min_samples: DBSCAN min_samples
         
     Returns:
-        Block list with holes filled
+        Blocks with holes filled, in the same form as `blocks`
     """
-    import numpy as np
     from sklearn.cluster import DBSCAN
-    from sklearn.preprocessing import StandardScaler
     
     if len(blocks) < min_samples:
         return blocks
     
     print(f"[HoleFill] Starting hole filling on {len(blocks)} blocks...")
     
-    # Build feature vectors: [x, y, z, r, g, b]
-    features = []
-    for b in blocks:
-        block_type = b['type']
-        color = block_colors.get(block_type, (0.5, 0.5, 0.5))
-        features.append([
-            b['x'], b['y'], b['z'],
-            color[0] * 10, color[1] * 10, color[2] * 10,
-        ])
+    array = _as_block_array(blocks)
     
-    features = np.array(features)
-    scaler = StandardScaler()
-    features_scaled = scaler.fit_transform(features)
+    # Build feature vectors: [x, y, z, r, g, b], colors gathered per type
+    color_lut = array.palette_colors(block_colors) * 10
+    features = np.empty((len(array), 6), dtype=np.float64)
+    features[:, :3] = array.positions
+    features[:, 3:] = color_lut[array.type_ids]
+    
+    # Standardize each feature column in place (constant columns are only centered,
+    # as StandardScaler does)
+    features -= features.mean(axis=0)
+    feature_std = features.std(axis=0)
+    feature_std[feature_std == 0] = 1.0
+    features /= feature_std
     
     # Run DBSCAN
     db = DBSCAN(eps=eps, min_samples=min_samples, n_jobs=-1)
-    labels = db.fit_predict(features_scaled)
+    labels = db.fit_predict(features)
     
     n_clusters = len(set(labels)) - (1 if -1 in labels else 0)
     print(f"[HoleFill] Found {n_clusters} clusters")
     
     # Process each cluster
-    result = []
+    result_positions = []
+    result_types = []
     total_filled = 0
-    existing_positions = {(b['x'], b['y'], b['z']) for b in blocks}
+    existing_positions = set(map(tuple, array.positions.tolist()))
+    
+    # Block indices of every cluster, in input order
+    order = np.argsort(labels, kind='stable')
+    cluster_ids, starts = np.unique(labels[order], return_index=True)
+    members = dict(zip(cluster_ids.tolist(), np.split(order, starts[1:])))
+    
+    # Dominant type of every cluster from one (cluster, type) tabulation;
+    # ties go to the type seen first in the cluster
+    type_count = len(array.palette)
+    clustered = labels >= 0
+    pairs, first_seen, pair_counts = np.unique(
+        labels[clustered].astype(np.int64) * type_count + array.type_ids[clustered],
+        return_index=True, return_counts=True
+    )
+    pair_clusters = pairs // type_count
+    ranked = np.lexsort((first_seen, -pair_counts, pair_clusters))
+    _, best = np.unique(pair_clusters[ranked], return_index=True)
+    dominant_types = dict(zip(
+        pair_clusters[ranked[best]].tolist(), (pairs[ranked[best]] % type_count).tolist()
+    ))
     
     for cluster_id in set(labels):
+        cluster = members[cluster_id]
         if cluster_id == -1:
             # Keep noise as is
-            for i, b in enumerate(blocks):
-                if labels[i] == -1:
-                    result.append(b.copy())
+            result_positions.append(array.positions[cluster])
+            result_types.append(array.type_ids[cluster])
             continue
         
-        # Get blocks in this cluster
-        cluster_blocks = [blocks[i] for i in range(len(blocks)) if labels[i] == cluster_id]
-        
-        # Find dominant type
-        type_counts = Counter(b['type'] for b in cluster_blocks)
-        dominant_type = type_counts.most_common(1)[0][0]
+        dominant_type = dominant_types[cluster_id]
         
         # Add existing blocks (unified to dominant type)
-        cluster_positions = set()
-        for b in cluster_blocks:
-            pos = (b['x'], b['y'], b['z'])
-            cluster_positions.add(pos)
-            result.append({
-                'x': b['x'], 'y': b['y'], 'z': b['z'],
-                'type': dominant_type
-            })
+        result_positions.append(array.positions[cluster])
+        result_types.append(np.full(len(cluster), dominant_type, dtype=np.int32))
         
         # Fill holes per Y layer using morphological closing
-        filled_this_cluster = _fill_holes_per_layer(
-            cluster_positions, dominant_type, existing_positions, result
-        )
-        total_filled += filled_this_cluster
+        holes = _fill_holes_per_layer(array.positions[cluster], existing_positions)
+        result_positions.append(holes)
+        result_types.append(np.full(len(holes), dominant_type, dtype=np.int32))
+        total_filled += len(holes)
     
     print(f"[HoleFill] Filled {total_filled} holes")
-    return result
+    result = BlockArray(
+        np.concatenate(result_positions).reshape(-1, 3),
+        np.concatenate(result_types).astype(np.int32),
+        array.palette
+    )
+    return _like_input(result, blocks)
 
 
 def _fill_holes_per_layer(
-    cluster_positions: set,
-    block_type: str,
-    existing_positions: set,
-    result: list
-) -> int:
+    cluster_positions: np.ndarray,
+    existing_positions: set
+) -> np.ndarray:
     """
-    Fill holes in a cluster by examining each Y layer.
-    Uses flood fill from edges to find internal holes.
-    """
-    if not cluster_positions:
-        return 0
-    
-    # Get bounds
-    xs = [p[0] for p in cluster_positions]
-    ys = [p[1] for p in cluster_positions]
-    zs = [p[2] for p in cluster_positions]
+    Find holes in a cluster by examining each Y layer.
+    Holes already in `existing_positions` are skipped; new ones are added to it.
     
-    min_x, max_x = min(xs), max(xs)
-    min_y, max_y = min(ys), max(ys)
-    min_z, max_z = min(zs), max(zs)
+    Returns:
+        (K, 3) positions of the holes to fill
+    """
+    holes_found = []
+    if len(cluster_positions) == 0:
+        return np.empty((0, 3), dtype=np.int64)
     
-    filled_count = 0
+    positions = np.unique(np.asarray(cluster_positions, dtype=np.int64).reshape(-1, 3), axis=0)
     
     # Process each Y layer
-    for y in range(min_y, max_y + 1):
-        # Get XZ positions at this Y level
-        layer_positions = {(p[0], p[2]) for p in cluster_positions if p[1] == y}
-        
-        if len(layer_positions) < 4:
+    positions = positions[np.argsort(positions[:, 1], kind='stable')]
+    layer_ys, layer_starts = np.unique(positions[:, 1], return_index=True)
+    for y, layer in zip(layer_ys.tolist(), np.split(positions, layer_starts[1:])):
+        if len(layer) < 4:
             continue  # Too few blocks to have holes
         
-        layer_xs = [p[0] for p in layer_positions]
-        layer_zs = [p[1] for p in layer_positions]
-        layer_min_x, layer_max_x = min(layer_xs), max(layer_xs)
-        layer_min_z, layer_max_z = min(layer_zs), max(layer_zs)
+        # XZ occupancy mask of this layer
+        layer_min_x, layer_min_z = layer[:, 0].min(), layer[:, 2].min()
+        mask = np.zeros((layer[:, 0].max() - layer_min_x + 1, layer[:, 2].max() - layer_min_z + 1), dtype=bool)
+        mask[layer[:, 0] - layer_min_x, layer[:, 2] - layer_min_z] = True
         
         # Find holes: empty cells that are enclosed by cluster blocks
-        # Use simple approach: check if empty cell has neighbors on all 4 sides
-        for x in range(layer_min_x, layer_max_x + 1):
-            for z in range(layer_min_z, layer_max_z + 1):
-                if (x, z) in layer_positions:
-                    continue  # Already has a block
-                
-                # Check if enclosed (has cluster blocks in all 4 cardinal directions)
-                has_left = any((nx, z) in layer_positions for nx in range(layer_min_x, x))
-                has_right = any((nx, z) in layer_positions for nx in range(x + 1, layer_max_x + 1))
-                has_front = any((x, nz) in layer_positions for nz in range(layer_min_z, z))
-                has_back = any((x, nz) in layer_positions for nz in range(z + 1, layer_max_z + 1))
-                
-                if has_left and has_right and has_front and has_back:
-                    # This is a hole - fill it
-                    pos = (x, y, z)
-                    if pos not in existing_positions:
-                        result.append({
-                            'x': x, 'y': y, 'z': z,
-                            'type': block_type
-                        })
-                        existing_positions.add(pos)
-                        filled_count += 1
-    
-    return filled_count
+        # (has cluster blocks in all 4 cardinal directions), from prefix-presence scans
+        has_left = np.logical_or.accumulate(mask, axis=0)
+        has_right = np.logical_or.accumulate(mask[::-1], axis=0)[::-1]
+        has_front = np.logical_or.accumulate(mask, axis=1)
+        has_back = np.logical_or.accumulate(mask[:, ::-1], axis=1)[:, ::-1]
+        holes = ~mask & has_left & has_right & has_front & has_back
+        
+        for dx, dz in np.argwhere(holes).tolist():
+            # This is a hole - fill it
+            pos = (int(layer_min_x) + dx, y, int(layer_min_z) + dz)
+            if pos not in existing_positions:
+                existing_positions.add(pos)
+                holes_found.append(pos)
+    
+    return np.array(holes_found, dtype=np.int64).reshape(-1, 3)
@@ -1,11 +1,16 @@
 """
 Smooth Block Placer - Analyze surface normals and select stairs/slabs for smoother voxelization
 """
+import math
+import weakref
 import numpy as np
 from enum import Enum, auto
 from dataclasses import dataclass
 from typing import Optional
 
+from ._kernels import block_state_codes, smooth_block_codes
+from .voxel_mesh import VoxelMesh
+
 
 class BlockShape(Enum):
     """Types of block shapes for smooth placement"""
@@ -15,6 +20,13 @@ class BlockShape(Enum):
     STAIR = auto()          # Stair block
 
 
+# Packed state code parts: shape | facing << 2 | half << 4 (see smooth_block_codes)
+_SHAPES = (BlockShape.FULL, BlockShape.SLAB_BOTTOM, BlockShape.SLAB_TOP, BlockShape.STAIR)
+# Stair facing by 2 * (Z axis dominant) + (component positive)
+_FACINGS = ("west", "east", "north", "south")
+_HALVES = ("bottom", "top")
+
+
 @dataclass
 class SmoothBlockInfo:
     """Information about a smooth block placement"""
@@ -22,19 +34,27 @@ class SmoothBlockInfo:
     facing: Optional[str] = None  # For stairs: north, south, east, west
     half: Optional[str] = None    # For stairs: bottom, top
     
+    @property
+    def code(self) -> int:
+        """Packed uint8 state code (facing/half default to north/bottom for stairs)"""
+        shape = _SHAPES.index(self.shape)
+        if shape != 3:
+            return shape
+        facing = _FACINGS.index(self.facing or "north")
+        half = _HALVES.index(self.half or "bottom")
+        return shape | (facing << 2) | (half << 4)
+    
+    @classmethod
+    def from_code(cls, code: int) -> "SmoothBlockInfo":
+        """Unpack a state code into a SmoothBlockInfo"""
+        shape = _SHAPES[code & 3]
+        if shape != BlockShape.STAIR:
+            return cls(shape=shape)
+        return cls(shape=shape, facing=_FACINGS[(code >> 2) & 3], half=_HALVES[(code >> 4) & 1])
+    
     def get_block_suffix(self) -> str:
         """Get the block state suffix for Minecraft commands"""
-        if self.shape == BlockShape.FULL:
-            return ""
-        elif self.shape == BlockShape.SLAB_BOTTOM:
-            return "[type=bottom]"
-        elif self.shape == BlockShape.SLAB_TOP:
-            return "[type=top]"
-        elif self.shape == BlockShape.STAIR:
-            half = self.half or "bottom"
-            facing = self.facing or "north"
-            return f"[facing={facing},half={half}]"
-        return ""
+        return SUFFIX_LUT[self.code]
 
 
 # Block mapping: base block -> (stair variant, slab variant)
@@ -107,6 +127,170 @@ SMOOTH_BLOCK_VARIANTS = {
 }
 
 
+# Frozen integer-id view of SMOOTH_BLOCK_VARIANTS, in its order. Callers that
+# keep block ids can index VARIANT_TABLE directly instead of hashing names.
+BLOCK_TO_ID = {name: i for i, name in enumerate(SMOOTH_BLOCK_VARIANTS)}
+VARIANT_TABLE = tuple(SMOOTH_BLOCK_VARIANTS.values())  # id -> (stair, slab)
+
+# Name table of the fused classification: ids 0..V-1 are base blocks,
+# V..2V-1 their stairs and 2V..3V-1 their slabs
+_SMOOTH_NAMES = (
+    tuple(SMOOTH_BLOCK_VARIANTS)
+    + tuple(stair for stair, _ in VARIANT_TABLE)
+    + tuple(slab for _, slab in VARIANT_TABLE)
+)
+
+
+def _state_suffix(code: int) -> str:
+    """Block state suffix of a packed state code (see smooth_block_codes)"""
+    shape = code & 3
+    if shape == 1:
+        return "[type=bottom]"
+    if shape == 2:
+        return "[type=top]"
+    if shape == 3:
+        facing = _FACINGS[(code >> 2) & 3]
+        half = _HALVES[(code >> 4) & 1]
+        return f"[facing={facing},half={half}]"
+    return ""
+
+
+# Suffix string of every state code, shared by all voxels with that state
+SUFFIX_LUT = tuple(_state_suffix(code) for code in range(32))
+
+
+def get_block_suffix(code: int) -> str:
+    """Block state suffix of a packed state code"""
+    return SUFFIX_LUT[code]
+
+# Shape name (as in AssignedBlock.shape) by state code & 3
+SHAPE_NAMES = ('full', 'slab_bottom', 'slab_top', 'stair')
+
+
+def classify_voxels(
+    normals: np.ndarray,
+    block_names: list[str],
+    threshold_slab: float = 22.5,
+    threshold_stair: float = 67.5
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    determine_block_shape + get_smooth_block_name for many voxels in one compiled pass.
+    
+    Args:
+        normals: (N, 3) surface normals, NaN rows where there is no surface
+        block_names: Base block name of each voxel
+        threshold_slab: Angle threshold for slab selection (degrees)
+        threshold_stair: Angle threshold for stair selection (degrees)
+        
+    Returns:
+        ((N,) int32 ids into the smooth block name table, -1 for blocks without
+        variants (keep the base name); (N,) uint8 state codes)
+    """
+    base_ids = np.fromiter(
+        (BLOCK_TO_ID.get(name, -1) for name in block_names), dtype=np.int32, count=len(block_names)
+    )
+    return smooth_block_codes(normals, base_ids, len(VARIANT_TABLE), threshold_slab, threshold_stair)
+
+
+def smooth_block_strings(
+    block_ids: np.ndarray,
+    state_codes: np.ndarray,
+    block_names: list[str]
+) -> tuple[list[str], list[str]]:
+    """
+    Render classify_voxels results as (block name, block state suffix) strings.
+    
+    Returns:
+        Lists of block names and state suffixes, one entry per voxel
+    """
+    names = [
+        _SMOOTH_NAMES[i] if i >= 0 else name
+        for i, name in zip(block_ids.tolist(), block_names)
+    ]
+    suffixes = [SUFFIX_LUT[code] for code in state_codes.tolist()]
+    return names, suffixes
+
+
+def make_intersector(mesh_vertices: np.ndarray, mesh_faces: np.ndarray):
+    """
+    Build a ray intersector for a mesh (Embree-backed when available).
+    Build it once and pass it to analyze_surface_normal for every voxel.
+    """
+    import trimesh
+    
+    # process=False keeps face indices aligned with mesh_faces
+    mesh = trimesh.Trimesh(vertices=mesh_vertices, faces=mesh_faces, process=False)
+    return mesh.ray
+
+
+def precompute_face_normals(mesh_vertices: np.ndarray, mesh_faces: np.ndarray) -> np.ndarray:
+    """
+    Unit normal of every face in one vectorized pass.
+    
+    Returns:
+        (F, 3) float64 normals; NaN rows for degenerate faces
+    """
+    vertices = np.asarray(mesh_vertices, dtype=np.float64)
+    faces = np.asarray(mesh_faces)
+    v0 = vertices[faces[:, 0]]
+    normals = np.cross(vertices[faces[:, 1]] - v0, vertices[faces[:, 2]] - v0)
+    norms = np.linalg.norm(normals, axis=1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(norms > 1e-10, normals / norms, np.nan)
+
+
+@dataclass
+class MeshAnalysis:
+    """Per-mesh data reused by every surface-normal query"""
+    mesh_vertices: np.ndarray
+    mesh_faces: np.ndarray
+    face_normals: np.ndarray  # (F, 3) from precompute_face_normals
+    _intersector: object = None
+    
+    @classmethod
+    def build(cls, mesh_vertices: np.ndarray, mesh_faces: np.ndarray) -> "MeshAnalysis":
+        return cls(mesh_vertices, mesh_faces, precompute_face_normals(mesh_vertices, mesh_faces))
+    
+    @property
+    def intersector(self):
+        """Ray intersector, built on first use"""
+        if self._intersector is None:
+            self._intersector = make_intersector(self.mesh_vertices, self.mesh_faces)
+        return self._intersector
+
+
+# Analysis of the most recent mesh seen without one being passed:
+# (weakref to vertices, weakref to faces, MeshAnalysis)
+_cached_analysis: Optional[tuple] = None
+
+
+def _get_analysis(mesh_vertices: np.ndarray, mesh_faces: np.ndarray) -> MeshAnalysis:
+    """MeshAnalysis for the given arrays, reused while the same array objects are passed"""
+    global _cached_analysis
+    if _cached_analysis is not None:
+        vertices_ref, faces_ref, analysis = _cached_analysis
+        if vertices_ref() is mesh_vertices and faces_ref() is mesh_faces:
+            return analysis
+    
+    analysis = MeshAnalysis.build(mesh_vertices, mesh_faces)
+    try:
+        _cached_analysis = (weakref.ref(mesh_vertices), weakref.ref(mesh_faces), analysis)
+    except TypeError:
+        pass  # Not weak-referenceable (e.g. a list); build per call
+    return analysis
+
+
+# Axis directions of the rays cast from each voxel center
+_RAY_DIRECTIONS = np.array([
+    [1, 0, 0], [-1, 0, 0],
+    [0, 1, 0], [0, -1, 0],
+    [0, 0, 1], [0, 0, -1]
+], dtype=np.float64)
+
+# Ray origin relative to the voxel center: slightly inside, opposite each direction
+_RAY_ORIGIN_OFFSETS = -_RAY_DIRECTIONS * 0.6
+
+
 def analyze_surface_normal(
     position: tuple[int, int, int],
     mesh_vertices: np.ndarray,
@@ -120,62 +304,75 @@ def analyze_surface_normal(
         position: Voxel position (x, y, z)
         mesh_vertices: Mesh vertices array
         mesh_faces: Mesh faces array
-        ray_intersector: Optional trimesh ray intersector for faster lookups
+        ray_intersector: MeshAnalysis or ray intersector from make_intersector; if
+            omitted, one is built and reused across calls with the same vertex/face arrays
         
     Returns:
         Normal vector as numpy array, or None if no surface found
     """
-    import trimesh
-    
-    # Create mesh if we don't have a ray intersector
-    if ray_intersector is None:
-        mesh = trimesh.Trimesh(vertices=mesh_vertices, faces=mesh_faces)
-        ray_intersector = mesh.ray
-    
-    # Cast rays from the voxel center in 6 directions
-    voxel_center = np.array(position, dtype=np.float64) + 0.5
-    
-    directions = np.array([
-        [1, 0, 0], [-1, 0, 0],
-        [0, 1, 0], [0, -1, 0],
-        [0, 0, 1], [0, 0, -1]
-    ], dtype=np.float64)
-    
-    # Find closest intersection
-    closest_normal = None
-    closest_distance = float('inf')
+    normal = analyze_surface_normals_batch(
+        np.asarray(position)[np.newaxis], mesh_vertices, mesh_faces, ray_intersector
+    )[0]
+    if np.isnan(normal[0]):
+        return None
+    return normal
+
+
+def analyze_surface_normals_batch(
+    positions: np.ndarray,
+    mesh_vertices: np.ndarray,
+    mesh_faces: np.ndarray,
+    ray_intersector = None
+) -> np.ndarray:
+    """
+    Surface normals for many voxel positions, casting all 6 * N rays in one call.
     
-    for direction in directions:
-        origin = voxel_center - direction * 0.6  # Start slightly inside
+    Args:
+        positions: (N, 3) voxel positions
+        mesh_vertices: Mesh vertices array
+        mesh_faces: Mesh faces array
+        ray_intersector: MeshAnalysis or ray intersector from make_intersector (built if omitted)
         
-        try:
-            locations, index_ray, index_tri = ray_intersector.intersects_location(
-                ray_origins=origin.reshape(1, 3),
-                ray_directions=direction.reshape(1, 3)
-            )
-            
-            if len(locations) > 0:
-                # Get the first intersection
-                hit_point = locations[0]
-                distance = np.linalg.norm(hit_point - voxel_center)
-                
-                if distance < closest_distance and distance < 1.5:
-                    closest_distance = distance
-                    tri_idx = index_tri[0]
-                    
-                    # Calculate face normal
-                    face = mesh_faces[tri_idx]
-                    v0, v1, v2 = mesh_vertices[face]
-                    edge1 = v1 - v0
-                    edge2 = v2 - v0
-                    normal = np.cross(edge1, edge2)
-                    norm = np.linalg.norm(normal)
-                    if norm > 1e-10:
-                        closest_normal = normal / norm
-        except Exception:
-            continue
-    
-    return closest_normal
+    Returns:
+        (N, 3) unit normals; rows are NaN where no surface was found
+    """
+    if isinstance(ray_intersector, MeshAnalysis):
+        analysis = ray_intersector
+    else:
+        analysis = _get_analysis(mesh_vertices, mesh_faces)
+    if ray_intersector is None or ray_intersector is analysis:
+        ray_intersector = analysis.intersector
+    
+    centers = np.asarray(positions, dtype=np.float64).reshape(-1, 3) + 0.5  # (N, 3)
+    normals = np.full(centers.shape, np.nan)
+    if len(centers) == 0:
+        return normals
+    
+    # Rays from each voxel center in 6 directions, each starting slightly inside
+    origins = (centers[:, np.newaxis, :] + _RAY_ORIGIN_OFFSETS).reshape(-1, 3)  # (6N, 3)
+    directions = np.broadcast_to(_RAY_DIRECTIONS, (len(centers), 6, 3)).reshape(-1, 3)
+    try:
+        locations, index_ray, index_tri = ray_intersector.intersects_location(
+            ray_origins=origins,
+            ray_directions=directions,
+            multiple_hits=False
+        )
+    except Exception:
+        return normals
+    if len(locations) == 0:
+        return normals
+    
+    # Closest hit within reach per voxel (ties go to the earlier direction)
+    voxel = index_ray // 6
+    distances = np.linalg.norm(locations - centers[voxel], axis=1)
+    in_reach = np.flatnonzero(distances < 1.5)
+    ranked = in_reach[np.lexsort((index_ray[in_reach], distances[in_reach], voxel[in_reach]))]
+    hit_voxels, first = np.unique(voxel[ranked], return_index=True)
+    closest = ranked[first]
+    
+    # Face normals of the chosen triangles, from the per-mesh table
+    normals[hit_voxels] = analysis.face_normals[index_tri[closest]]
+    return normals
 
 
 def determine_block_shape(
@@ -199,28 +396,20 @@ def determine_block_shape(
     
     # Calculate angle from vertical (Y-axis)
     # normal.y = cos(angle), where angle is from vertical
-    y_component = normal[1]  # Y is up in Minecraft
+    x, y_component, z = float(normal[0]), float(normal[1]), float(normal[2])  # Y is up in Minecraft
     
-    # Angle from vertical in degrees
-    angle_from_vertical = np.degrees(np.arccos(np.clip(abs(y_component), 0, 1)))
+    # Angle from vertical in degrees (NaN stays NaN and falls through to FULL)
+    abs_y = abs(y_component)
+    angle_from_vertical = 0.0 if abs_y >= 1.0 else math.degrees(math.acos(abs_y))
     
     # Determine if surface is facing up or down
     is_facing_up = y_component > 0
     
-    # Determine horizontal direction for stairs
-    xz_component = np.array([normal[0], 0, normal[2]])
-    xz_magnitude = np.linalg.norm(xz_component)
-    
-    if xz_magnitude > 0.01:
-        xz_normalized = xz_component / xz_magnitude
-        
-        # Determine facing direction (opposite to where the slope goes down)
-        if abs(xz_normalized[0]) > abs(xz_normalized[2]):
-            # More X than Z
-            facing = "east" if xz_normalized[0] > 0 else "west"
-        else:
-            # More Z than X
-            facing = "south" if xz_normalized[2] > 0 else "north"
+    # Determine horizontal direction for stairs: dominant XZ axis and its sign
+    # (opposite to where the slope goes down)
+    if math.hypot(x, z) > 0.01:
+        z_dominant = abs(x) <= abs(z)
+        facing = _FACINGS[2 * z_dominant + ((z if z_dominant else x) > 0)]
     else:
         facing = "north"  # Default
     
@@ -246,6 +435,26 @@ def determine_block_shape(
         return SmoothBlockInfo(shape=BlockShape.FULL)
 
 
+def determine_block_shape_batch(
+    normals: np.ndarray,
+    threshold_slab: float = 22.5,
+    threshold_stair: float = 67.5
+) -> np.ndarray:
+    """
+    determine_block_shape for many normals at once.
+    
+    Args:
+        normals: (N, 3) surface normals, NaN rows where there is no surface
+        threshold_slab: Angle threshold for slab selection (degrees)
+        threshold_stair: Angle threshold for stair selection (degrees)
+        
+    Returns:
+        (N,) uint8 packed state codes (shape | facing << 2 | half << 4, see
+        smooth_block_codes); SHAPE_NAMES[code & 3] gives the shape
+    """
+    return block_state_codes(normals, threshold_slab, threshold_stair)
+
+
 def get_smooth_block_name(
     base_block: str,
     smooth_info: SmoothBlockInfo
@@ -264,10 +473,11 @@ def get_smooth_block_name(
         return base_block, ""
     
     # Check if we have variants for this block
-    if base_block not in SMOOTH_BLOCK_VARIANTS:
+    block_id = BLOCK_TO_ID.get(base_block, -1)
+    if block_id < 0:
         return base_block, ""
     
-    stair_variant, slab_variant = SMOOTH_BLOCK_VARIANTS[base_block]
+    stair_variant, slab_variant = VARIANT_TABLE[block_id]
     
     if smooth_info.shape in (BlockShape.SLAB_BOTTOM, BlockShape.SLAB_TOP):
         return slab_variant, smooth_info.get_block_suffix()
@@ -278,6 +488,55 @@ def get_smooth_block_name(
     return base_block, ""
 
 
+def get_smooth_block_name_by_id(block_id: int, state_code: int) -> tuple[str, str]:
+    """
+    get_smooth_block_name for a BLOCK_TO_ID id and a packed state code
+    (see smooth_block_codes), using tuple indexing only.
+    
+    Returns:
+        Tuple of (block_name, block_state_suffix)
+    """
+    shape = state_code & 3
+    if shape == 0:
+        return _SMOOTH_NAMES[block_id], ""
+    return VARIANT_TABLE[block_id][shape != 3], SUFFIX_LUT[state_code]
+
+
 def can_smooth_block(block_name: str) -> bool:
     """Check if a block has stair/slab variants available"""
-    return block_name in SMOOTH_BLOCK_VARIANTS
+    return block_name in BLOCK_TO_ID
+
+
+def classify_all_voxels(
+    voxel_mesh: VoxelMesh,
+    mesh_vertices: np.ndarray,
+    mesh_faces: np.ndarray,
+    block_names: list[str],
+    ray_intersector = None
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Surface normal, block shape and stair/slab variant of every voxel of a mesh:
+    one batched ray cast over the surface voxels followed by one fused
+    classification pass. Interior voxels get no normal and stay full.
+    
+    Args:
+        voxel_mesh: VoxelMesh whose voxels to classify
+        mesh_vertices: Source mesh vertices (in voxel space)
+        mesh_faces: Source mesh faces
+        block_names: Base block name of each voxel (rows matching voxel_mesh.positions)
+        ray_intersector: MeshAnalysis or ray intersector from make_intersector
+        
+    Returns:
+        (block ids, state codes) as from classify_voxels; render them with
+        smooth_block_strings
+    """
+    positions = voxel_mesh.positions
+    
+    # Interior voxels (no visible face) stay full blocks, so only surface voxels cast rays
+    surface_mask = voxel_mesh.compute_all_face_visibility() != 0
+    normals = np.full((len(positions), 3), np.nan)  # (N, 3)
+    if surface_mask.any():
+        normals[surface_mask] = analyze_surface_normals_batch(
+            positions[surface_mask], mesh_vertices, mesh_faces, ray_intersector
+        )
+    return classify_voxels(normals, block_names)
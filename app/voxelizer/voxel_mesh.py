@@ -19,95 +19,427 @@ class FaceVisibility(IntFlag):
     ALL = UP | DOWN | NORTH | EAST | SOUTH | WEST
 
 
+# Packed int64 position keys: 21 bits per axis, offset so coordinates in
+# [-2^20, 2^20) stay non-negative
+_KEY_BITS = 21
+_KEY_OFFSET = 1 << (_KEY_BITS - 1)
+
+
+
+def pack_positions(positions: np.ndarray) -> np.ndarray:
+    """Pack (N, 3) integer positions into one int64 key per position"""
+    p = np.asarray(positions, dtype=np.int64).reshape(-1, 3) + _KEY_OFFSET
+    return (p[:, 0] << (2 * _KEY_BITS)) | (p[:, 1] << _KEY_BITS) | p[:, 2]
+
+
+# Octahedral normal codes: two int8 components packed in a uint16; (-128, -128)
+# never comes out of the encoder and marks "no normal"
+NO_NORMAL = 0x8080
+
+
+def encode_normals(normals: np.ndarray) -> np.ndarray:
+    """
+    Encode (N, 3) unit normals as (N,) uint16 octahedral codes (about 1 degree precision).
+    Rows that are NaN or zero encode as NO_NORMAL.
+    """
+    n = np.asarray(normals, dtype=np.float64).reshape(-1, 3)
+    l1 = np.abs(n).sum(axis=1)
+    valid = l1 > 0  # False for NaN rows too
+    with np.errstate(divide='ignore', invalid='ignore'):
+        u, v, w = (n / l1[:, np.newaxis]).T
+    # Fold the lower hemisphere onto the upper one
+    folded = w < 0
+    u, v = (
+        np.where(folded, (1 - np.abs(v)) * np.where(u >= 0, 1.0, -1.0), u),
+        np.where(folded, (1 - np.abs(u)) * np.where(v >= 0, 1.0, -1.0), v),
+    )
+    qu = np.rint(np.nan_to_num(u) * 127).astype(np.int8).view(np.uint8).astype(np.uint16)
+    qv = np.rint(np.nan_to_num(v) * 127).astype(np.int8).view(np.uint8).astype(np.uint16)
+    return np.where(valid, qu | (qv << 8), NO_NORMAL).astype(np.uint16)
+
+
+def decode_normals(codes: np.ndarray) -> np.ndarray:
+    """Decode uint16 octahedral codes to (N, 3) unit normals (NaN rows for NO_NORMAL)"""
+    codes = np.asarray(codes, dtype=np.uint16).reshape(-1)
+    u = (codes & 0xFF).astype(np.uint8).view(np.int8) / 127.0
+    v = (codes >> 8).astype(np.uint8).view(np.int8) / 127.0
+    w = 1 - np.abs(u) - np.abs(v)
+    folded = w < 0
+    u, v = (
+        np.where(folded, (1 - np.abs(v)) * np.where(u >= 0, 1.0, -1.0), u),
+        np.where(folded, (1 - np.abs(u)) * np.where(v >= 0, 1.0, -1.0), v),
+    )
+    normals = np.stack([u, v, w], axis=1)
+    normals /= np.linalg.norm(normals, axis=1, keepdims=True)
+    normals[codes == NO_NORMAL] = np.nan
+    return normals
+
+
+def _key_delta(dx: int, dy: int, dz: int) -> int:
+    """Packed-key difference between a position and its (dx, dy, dz) neighbor"""
+    return (dx << (2 * _KEY_BITS)) + (dy << _KEY_BITS) + dz
+
+
+# Neighbor offset and visibility bit of each face, in get_face_visibility order
+_FACE_OFFSETS = (
+    ((0, 1, 0), FaceVisibility.UP),
+    ((0, -1, 0), FaceVisibility.DOWN),
+    ((1, 0, 0), FaceVisibility.NORTH),
+    ((-1, 0, 0), FaceVisibility.SOUTH),
+    ((0, 0, 1), FaceVisibility.EAST),
+    ((0, 0, -1), FaceVisibility.WEST),
+)
+
+# Neighbor key delta and visibility bit of each face
+_FACE_NEIGHBORS = tuple((_key_delta(*offset), bit) for offset, bit in _FACE_OFFSETS)
+
+
 @dataclass
 class Voxel:
     """A single voxel with position, color, and surface normal"""
     position: tuple[int, int, int]
-    color: np.ndarray  # RGBA float [0, 1]
+    color: np.ndarray  # RGBA float32 [0, 1]
     collisions: int = 1  # Number of ray hits (for averaging)
     normal: Optional[np.ndarray] = None  # Surface normal vector
 
 
+def _pack_position(x: int, y: int, z: int) -> int:
+    """Packed key of one integer position, same as pack_positions"""
+    return ((x + _KEY_OFFSET) << (2 * _KEY_BITS)) | ((y + _KEY_OFFSET) << _KEY_BITS) | (z + _KEY_OFFSET)
+
+
 @dataclass
 class VoxelMesh:
     """
     Container for a collection of voxels.
-    Uses a dictionary for O(1) lookup by position.
+    Voxels are stored column-wise in growable arrays (rows in insertion order),
+    with a dictionary from packed position key to row for O(1) lookup.
     """
-    voxels: dict[tuple[int, int, int], Voxel] = field(default_factory=dict)
     overlap_rule: str = 'average'  # 'first' or 'average'
+    _positions: np.ndarray = field(init=False, repr=False)   # (capacity, 3) int32
+    _color_sums: np.ndarray = field(init=False, repr=False)  # (capacity, 4) float64 RGBA sum over hits
+    _collisions: np.ndarray = field(init=False, repr=False)  # (capacity,) int32
+    _normal_codes: np.ndarray = field(init=False, repr=False)  # (capacity,) uint16 octahedral
+    _index: dict[int, int] = field(init=False, repr=False)   # packed position key -> row
+    _count: int = field(init=False, repr=False)
+    _visibility: Optional[np.ndarray] = field(init=False, repr=False)  # cached (N,) uint8 face bits
+    _min: Optional[np.ndarray] = field(init=False, repr=False)  # (3,) int64 running bounds
+    _max: Optional[np.ndarray] = field(init=False, repr=False)
     
-    def add_voxel(self, position: np.ndarray, color: np.ndarray, normal: Optional[np.ndarray] = None) -> None:
+    def __post_init__(self):
+        self._positions = np.empty((0, 3), dtype=np.int32)
+        self._color_sums = np.empty((0, 4), dtype=np.float64)
+        self._collisions = np.empty(0, dtype=np.int32)
+        self._normal_codes = np.empty(0, dtype=np.uint16)
+        self._index = {}
+        self._count = 0
+        self._visibility = None
+        self._min = None
+        self._max = None
+        
+        # Bind the overlap rule once instead of checking it on every add_voxel call
+        if self.overlap_rule == 'average':
+            self.add_voxel = self._add_voxel_average
+        else:
+            self.add_voxel = self._add_voxel_first
+    
+    def _extend_bounds(self, low: np.ndarray, high: np.ndarray) -> None:
+        """Grow the running bounds to include [low, high]"""
+        if self._min is None:
+            self._min, self._max = low.astype(np.int64), high.astype(np.int64)
+        else:
+            np.minimum(self._min, low, out=self._min)
+            np.maximum(self._max, high, out=self._max)
+    
+    def _reserve(self, extra: int) -> None:
+        """Make room for `extra` more rows, doubling capacity on overflow"""
+        needed = self._count + extra
+        if needed <= len(self._collisions):
+            return
+        capacity = max(needed, 2 * len(self._collisions), 1024)
+        for name in ('_positions', '_color_sums', '_collisions', '_normal_codes'):
+            old = getattr(self, name)
+            grown = np.empty((capacity,) + old.shape[1:], dtype=old.dtype)
+            grown[:self._count] = old[:self._count]
+            setattr(self, name, grown)
+    
+    @property
+    def positions(self) -> np.ndarray:
+        """(N, 3) int32 voxel positions in insertion order"""
+        return self._positions[:self._count]
+    
+    @property
+    def colors(self) -> np.ndarray:
+        """(N, 4) float32 RGBA voxel colors (mean over hits), rows matching positions"""
+        n = self._count
+        return (self._color_sums[:n] / self._collisions[:n, np.newaxis]).astype(np.float32)
+    
+    @property
+    def collisions(self) -> np.ndarray:
+        """(N,) int32 number of ray hits averaged into each voxel"""
+        return self._collisions[:self._count]
+    
+    @property
+    def normals(self) -> np.ndarray:
+        """(N, 3) surface normals decoded from their 2-byte codes, NaN rows where unset"""
+        return decode_normals(self._normal_codes[:self._count])
+    
+    def set_normals(self, normals: np.ndarray) -> None:
+        """Store (N, 3) surface normals for all voxels (rows matching positions; NaN = none)"""
+        self._normal_codes[:self._count] = encode_normals(normals)
+    
+    @property
+    def voxels(self) -> dict[tuple[int, int, int], Voxel]:
+        """Snapshot of all voxels keyed by position (built on access)"""
+        return {voxel.position: voxel for voxel in self.get_all_voxels()}
+    
+    def add_voxel(
+        self,
+        position: np.ndarray,
+        color: np.ndarray,
+        normal: Optional[np.ndarray] = None,
+        collisions: int = 1
+    ) -> None:
         """
         Add a voxel at the given position with the given color.
         Handles overlap according to overlap_rule.
         
+        Instances bind add_voxel to the rule's specialized method in __post_init__,
+        so the rule is not re-checked per call (set overlap_rule before adding voxels).
+        
         Args:
             position: (x, y, z) position in voxel space
-            color: RGBA color as float array [0, 1]
-            normal: Optional surface normal vector (currently unused for performance)
+            color: RGBA color as float array [0, 1]; read once and not kept, so
+                callers may pass rows of their own buffers without copying
+            normal: Optional surface normal, stored (encoded) when the voxel is created
+            collisions: Number of ray hits `color` already averages over
         """
+        if self.overlap_rule == 'average':
+            self._add_voxel_average(position, color, normal, collisions)
+        else:
+            self._add_voxel_first(position, color, normal, collisions)
+    
+    def _add_voxel_first(
+        self,
+        position: np.ndarray,
+        color: np.ndarray,
+        normal: Optional[np.ndarray] = None,
+        collisions: int = 1
+    ) -> None:
+        """add_voxel for the 'first' rule: one dict probe, existing voxels are kept"""
         # Skip fully transparent voxels
         if color[3] <= 0:
             return
         
         # Round position to integer voxel coordinates
         pos = tuple(int(round(p)) for p in position)
+        row = self._index.setdefault(_pack_position(*pos), self._count)
+        if row == self._count:
+            self._append_row(pos, color, collisions, normal)
+    
+    def _add_voxel_average(
+        self,
+        position: np.ndarray,
+        color: np.ndarray,
+        normal: Optional[np.ndarray] = None,
+        collisions: int = 1
+    ) -> None:
+        """add_voxel for the 'average' rule: hits accumulate into the color sum"""
+        # Skip fully transparent voxels
+        if color[3] <= 0:
+            return
         
-        if pos in self.voxels:
-            if self.overlap_rule == 'average':
-                existing = self.voxels[pos]
-                n = existing.collisions
-                # Rolling average for color
-                existing.color = (existing.color * n + color) / (n + 1)
-                existing.collisions = n + 1
-            # 'first' rule: keep existing voxel
+        # Round position to integer voxel coordinates
+        pos = tuple(int(round(p)) for p in position)
+        row = self._index.setdefault(_pack_position(*pos), self._count)
+        if row == self._count:
+            self._append_row(pos, color, collisions, normal)
+            return
+        
+        # Accumulate in place; colors are averaged only when read
+        if collisions == 1:
+            self._color_sums[row] += color
         else:
-            self.voxels[pos] = Voxel(
-                position=pos,
-                color=color.copy(),
-                collisions=1
-            )
+            self._color_sums[row] += np.multiply(color, collisions)
+        self._collisions[row] += collisions
+        self._visibility = None
+    
+    def _append_row(
+        self,
+        pos: tuple[int, int, int],
+        color: np.ndarray,
+        collisions: int,
+        normal: Optional[np.ndarray] = None
+    ) -> None:
+        """Write a new voxel into the next row (its index entry must already point there)"""
+        self._reserve(1)
+        row = self._count
+        self._positions[row] = pos
+        np.multiply(color, collisions, out=self._color_sums[row])
+        self._collisions[row] = collisions
+        self._normal_codes[row] = NO_NORMAL if normal is None else encode_normals(normal)[0]
+        self._count += 1
+        self._visibility = None
+        self._extend_bounds(self._positions[row], self._positions[row])
+    
+    def add_voxels(self, positions: np.ndarray, colors: np.ndarray) -> None:
+        """
+        Add many voxels at once, with the same result as calling add_voxel
+        for each (position, color) pair in order.
+        
+        Args:
+            positions: (N, 3) positions in voxel space
+            colors: (N, 4) RGBA colors as float [0, 1]
+        """
+        colors = np.asarray(colors, dtype=np.float32)
+        
+        # Skip fully transparent voxels
+        opaque = colors[:, 3] > 0
+        colors = colors[opaque]
+        if len(colors) == 0:
+            return
+        self._visibility = None
+        
+        # Group by integer voxel position; the stable sort keeps input order within a group
+        vox = np.rint(np.asarray(positions)[opaque]).astype(np.int64)
+        vox_min = vox.min(axis=0)
+        dims = vox.max(axis=0) - vox_min + 1
+        rel = vox - vox_min
+        keys = (rel[:, 0] * dims[1] + rel[:, 1]) * dims[2] + rel[:, 2]
+        order = np.argsort(keys, kind='stable')
+        _, starts, counts = np.unique(keys[order], return_index=True, return_counts=True)
+        first = order[starts]
+        
+        # Visit groups in first-occurrence order so row order is unchanged
+        by_first = np.argsort(first)
+        first = first[by_first]
+        if self.overlap_rule == 'average':
+            group_sums = np.add.reduceat(colors[order].astype(np.float64), starts, axis=0)[by_first]
+            counts = counts[by_first]
+        else:
+            group_sums = colors[first].astype(np.float64)
+            counts = np.ones(len(first), dtype=np.int64)
+        
+        group_positions = vox[first]
+        group_keys = pack_positions(group_positions).tolist()
+        rows = np.fromiter(
+            (self._index.get(key, -1) for key in group_keys), dtype=np.int64, count=len(group_keys)
+        )
+        present = rows >= 0
+        
+        if self.overlap_rule == 'average' and present.any():
+            # Merge into the sums of voxels already in the mesh (keys are unique per call)
+            merged = rows[present]
+            self._color_sums[merged] += group_sums[present]
+            self._collisions[merged] += counts[present].astype(np.int32)
+        # 'first' rule: keep existing voxels
+        
+        # Append new voxels as rows
+        new = np.flatnonzero(~present)
+        if len(new) == 0:
+            return
+        self._reserve(len(new))
+        new_rows = slice(self._count, self._count + len(new))
+        self._positions[new_rows] = group_positions[new]
+        self._color_sums[new_rows] = group_sums[new]
+        self._collisions[new_rows] = counts[new]
+        self._normal_codes[new_rows] = NO_NORMAL
+        self._index.update(zip([group_keys[i] for i in new.tolist()], range(new_rows.start, new_rows.stop)))
+        self._count += len(new)
+        new_positions = group_positions[new]
+        self._extend_bounds(new_positions.min(axis=0), new_positions.max(axis=0))
     
     def is_voxel_at(self, position: tuple[int, int, int]) -> bool:
         """Check if a voxel exists at the given position"""
-        return position in self.voxels
+        return _pack_position(*position) in self._index
     
     def is_opaque_voxel_at(self, position: tuple[int, int, int]) -> bool:
         """Check if an opaque voxel exists at the given position"""
-        voxel = self.voxels.get(position)
-        return voxel is not None and voxel.color[3] >= 1.0
+        row = self._index.get(_pack_position(*position))
+        # Compare at float32, as the colors property reports it
+        return row is not None and np.float32(self._color_sums[row, 3] / self._collisions[row]) >= 1.0
     
     def get_face_visibility(self, position: tuple[int, int, int]) -> FaceVisibility:
         """
         Calculate which faces of a voxel are visible (not blocked by opaque neighbors).
         """
-        x, y, z = position
+        # Pack once; neighbor keys are fixed deltas from it
+        key = _pack_position(*position)
+        index = self._index
         visibility = FaceVisibility.NONE
+        for delta, bit in _FACE_NEIGHBORS:
+            row = index.get(key + delta)
+            if row is None or np.float32(self._color_sums[row, 3] / self._collisions[row]) < 1.0:
+                visibility |= bit
+        return visibility
+    
+    def get_face_visibilities(self, positions: np.ndarray) -> np.ndarray:
+        """
+        Face visibility for many positions at once, same as get_face_visibility.
+        Opaque neighbors are found by searching packed int64 keys, not tuple lookups.
+        
+        Args:
+            positions: (N, 3) integer voxel positions
+            
+        Returns:
+            (N,) int array of FaceVisibility bits
+        """
+        positions = np.asarray(positions, dtype=np.int64).reshape(-1, 3)
+        opaque_keys = np.sort(pack_positions(self.positions[self.colors[:, 3] >= 1.0]))
         
-        if not self.is_opaque_voxel_at((x, y + 1, z)):
-            visibility |= FaceVisibility.UP
-        if not self.is_opaque_voxel_at((x, y - 1, z)):
-            visibility |= FaceVisibility.DOWN
-        if not self.is_opaque_voxel_at((x + 1, y, z)):
-            visibility |= FaceVisibility.NORTH
-        if not self.is_opaque_voxel_at((x - 1, y, z)):
-            visibility |= FaceVisibility.SOUTH
-        if not self.is_opaque_voxel_at((x, y, z + 1)):
-            visibility |= FaceVisibility.EAST
-        if not self.is_opaque_voxel_at((x, y, z - 1)):
-            visibility |= FaceVisibility.WEST
+        visibility = np.zeros(len(positions), dtype=np.int64)
+        if len(opaque_keys) == 0:
+            visibility[:] = int(FaceVisibility.ALL)
+            return visibility
         
+        keys = pack_positions(positions)
+        for delta, bit in _FACE_NEIGHBORS:
+            neighbor_keys = keys + delta
+            found = np.searchsorted(opaque_keys, neighbor_keys)
+            blocked = opaque_keys[np.minimum(found, len(opaque_keys) - 1)] == neighbor_keys
+            visibility[~blocked] |= int(bit)
         return visibility
     
+    def compute_all_face_visibility(self) -> np.ndarray:
+        """
+        Face visibility of every voxel (rows matching positions), same as
+        get_face_visibility, from a dense occupancy grid of the opaque voxels.
+        
+        Returns:
+            (N,) uint8 array of FaceVisibility bits (cached until the mesh changes)
+        """
+        if self._visibility is not None:
+            return self._visibility
+        visibility = np.zeros(self._count, dtype=np.uint8)
+        if self._count == 0:
+            return visibility
+        
+        # Opaque occupancy padded by one cell so every neighbor index is in bounds
+        coords = self.positions.astype(np.int64)
+        coords -= coords.min(axis=0) - 1
+        occupied = np.zeros(tuple(coords.max(axis=0) + 2), dtype=bool)
+        occupied[tuple(coords.T)] = self.colors[:, 3] >= 1.0
+        
+        x, y, z = coords.T
+        for (dx, dy, dz), bit in _FACE_OFFSETS:
+            visibility[~occupied[x + dx, y + dy, z + dz]] |= int(bit)
+        visibility.flags.writeable = False
+        self._visibility = visibility
+        return visibility
+    
+    def total_visible_faces(self) -> int:
+        """Total number of visible voxel faces, by popcount over the packed visibility bits"""
+        visibility = self.compute_all_face_visibility()
+        if hasattr(np, 'bitwise_count'):
+            return int(np.bitwise_count(visibility).sum())
+        return int(np.unpackbits(visibility).sum())
+    
     @property
     def bounds(self) -> tuple[np.ndarray, np.ndarray]:
         """Return (min, max) bounds of all voxels"""
-        if not self.voxels:
+        if self._min is None:
             return np.array([0, 0, 0]), np.array([0, 0, 0])
-        
-        positions = np.array([v.position for v in self.voxels.values()])
-        return positions.min(axis=0), positions.max(axis=0)
+        return self._min.copy(), self._max.copy()
     
     @property
     def dimensions(self) -> np.ndarray:
@@ -117,8 +449,16 @@ class VoxelMesh:
     
     def get_voxel_count(self) -> int:
         """Return the number of voxels"""
-        return len(self.voxels)
+        return self._count
     
     def get_all_voxels(self) -> list[Voxel]:
-        """Return all voxels as a list"""
-        return list(self.voxels.values())
+        """Return all voxels as a list of Voxel records (copies of the stored rows)"""
+        colors = self.colors
+        normals = self.normals
+        has_normal = (self._normal_codes[:self._count] != NO_NORMAL).tolist()
+        return [
+            Voxel(position=tuple(position), color=color, collisions=n, normal=normal if has else None)
+            for position, color, n, normal, has in zip(
+                self.positions.tolist(), colors, self.collisions.tolist(), normals, has_normal
+            )
+        ]